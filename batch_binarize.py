@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量二值化（无界面命令行）
+
+用法示例：
+    python batch_binarize.py scans/ -o output/binarized -j 8
+    python batch_binarize.py "scans/**/*.jpg" -o out --format tiff-g4
+    python batch_binarize.py @filelist.txt -o out --block-size 21 --c-value 5
+
+输入可以是目录（递归查找图片）、glob 模式、图片文件，或以 @ 开头的
+文件列表（每行一个路径）。每个工作进程只创建一个处理器实例，结果按
+输入顺序输出；输出文件已存在且不旧于输入时跳过。指定 --cache-dir 时，
+内容和参数都未变化的页面直接使用磁盘缓存的结果。
+
+多页文档（PDF、多页 TIFF）逐页解码，输出为多页 CCITT G4 TIFF；
+--page-workers 指定每个文档同时处理的页数。
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# 避免 Kivy 解析本脚本的命令行参数
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from main import (SimpleBinarizationProcessor, ResultCache, OUTPUT_GRAY, OUTPUT_PACKED,
+                  OUTPUT_ENCODERS, BILEVEL_ENCODERS, THRESHOLD_ADAPTIVE, THRESHOLD_METHODS,
+                  DENOISE_NLM, DENOISE_METHODS,
+                  load_grayscale_file, open_raw_image, save_image_file,
+                  is_document_file, binarize_document)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.pgm', '.raw', '.pdf')
+
+# 可能含多页的 TIFF：是否多页需要读取文件头，在工作进程中判断
+MULTIPAGE_TIFF_EXTENSIONS = ('.tif', '.tiff')
+
+# 每个工作进程持有的处理器（由 _init_worker 创建）
+_worker_processor = None
+_worker_page_processors = []
+_worker_denoise = True
+_worker_tile_size = None
+_worker_encoder = 'png1'
+_worker_raw_size = None
+
+
+def collect_inputs(specs):
+    """
+    展开输入参数为 (输入路径, 相对输出路径) 列表
+
+    Args:
+        specs: 目录、glob 模式、文件或 @文件列表
+
+    Returns:
+        按输入顺序排列的 (Path, Path) 列表
+    """
+    items = []
+    for spec in specs:
+        if spec.startswith('@'):
+            with open(spec[1:], encoding='utf-8') as f:
+                paths = [line.strip() for line in f if line.strip()]
+            items.extend((Path(p), Path(Path(p).name)) for p in paths)
+        elif os.path.isdir(spec):
+            root = Path(spec)
+            for path in sorted(root.rglob('*')):
+                if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS:
+                    items.append((path, path.relative_to(root)))
+        elif glob.has_magic(spec):
+            for p in sorted(glob.glob(spec, recursive=True)):
+                if os.path.isfile(p):
+                    items.append((Path(p), Path(Path(p).name)))
+        else:
+            items.append((Path(spec), Path(Path(spec).name)))
+    return items
+
+
+def plan_outputs(items, output_dir, encoder):
+    """
+    为每个输入生成输出路径（扩展名由编码器决定，PDF 为 .tif），重名时报错
+
+    只按扩展名决定，不读取输入文件：TIFF 是否多页由工作进程判断，多页时
+    输出改为同名 .tif（_document_output），因此 .tif 名称也预先检查重名。
+
+    Returns:
+        [(输入路径, 输出路径), ...]
+    """
+    ext = OUTPUT_ENCODERS[encoder][1]
+    tasks = []
+    seen = {}
+    for src, rel in items:
+        suffix = src.suffix.lower()
+        dst = Path(output_dir) / rel.with_suffix('.tif' if suffix == '.pdf' else ext)
+        names = [dst]
+        if suffix in MULTIPAGE_TIFF_EXTENSIONS and dst.suffix != '.tif':
+            names.append(_document_output(dst))
+        for name in names:
+            if name in seen:
+                raise ValueError(f'Output name collision: {seen[name]} and {src} -> {name}')
+            seen[name] = src
+        tasks.append((src, dst))
+    return tasks
+
+
+def _document_output(dst):
+    """多页文档的输出路径（多页 CCITT G4 TIFF）"""
+    return Path(dst).with_suffix('.tif')
+
+
+def is_done(src, dst):
+    """输出已存在且不旧于输入"""
+    try:
+        return os.path.getmtime(dst) >= os.path.getmtime(src)
+    except OSError:
+        return False
+
+
+def _init_worker(block_size, c_value, denoise_h, denoise, tile_size=None, encoder='png1',
+                 cache_dir=None, threshold_method=THRESHOLD_ADAPTIVE, k=None,
+                 denoise_method=DENOISE_NLM, noise_gate=None, auto_denoise=False,
+                 normalize_illumination=False, auto_parameters=False, raw_size=None,
+                 page_workers=1):
+    """工作进程初始化：每个进程只创建一个处理器（多页文档每个页面线程一个）"""
+    global _worker_processor, _worker_page_processors, _worker_denoise, _worker_tile_size
+    global _worker_encoder, _worker_raw_size
+    # 批量处理中同一页面很少在一次运行内重复出现，只使用磁盘缓存
+    cache = ResultCache(max_bytes=0, cache_dir=cache_dir) if cache_dir else None
+    _worker_page_processors = [
+        SimpleBinarizationProcessor(block_size, c_value, denoise_h, cache=cache,
+                                    threshold_method=threshold_method, k=k,
+                                    denoise_method=denoise_method,
+                                    noise_gate=noise_gate,
+                                    auto_denoise=auto_denoise,
+                                    normalize_illumination=normalize_illumination,
+                                    auto_parameters=auto_parameters)
+        for _ in range(max(1, page_workers))]
+    _worker_processor = _worker_page_processors[0]
+    _worker_denoise = denoise
+    _worker_tile_size = tile_size
+    _worker_encoder = encoder
+    _worker_raw_size = raw_size
+
+
+def _process_one(task):
+    """
+    处理单个文件
+
+    Returns:
+        (状态, 输入路径, 输入字节数, 写入页数, 错误信息)，
+        状态为 'ok' / 'cached' / 'skipped' / 'failed'（跳过和失败时写入页数为 0）
+    """
+    src, dst, force = task
+    try:
+        # 多页 TIFF 的判断要读取文件头，在工作进程中并行进行
+        document = is_document_file(src)
+        if document:
+            dst = _document_output(dst)
+        if not force and is_done(src, dst):
+            return 'skipped', str(src), 0, 0, None
+
+        size = os.path.getsize(src)
+        if document:
+            # 多页文档：逐页解码、并行处理，按页序写入多页 TIFF
+            os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+            pages = binarize_document(src, dst, _worker_page_processors,
+                                      denoise=_worker_denoise, tile_size=_worker_tile_size)
+            return 'ok', str(src), size, pages, None
+
+        # 直接读为灰度：未压缩的 PGM / TIFF / raw 按内存映射读取，不生成 3 通道图像
+        if Path(src).suffix.lower() == '.raw':
+            if _worker_raw_size is None:
+                return 'failed', str(src), 0, 0, 'raw input needs --raw-size'
+            image = open_raw_image(src, *_worker_raw_size)
+        else:
+            image = load_grayscale_file(src)
+        if image is None:
+            return 'failed', str(src), 0, 0, 'cannot load image'
+
+        # 1 位编码器直接使用打包结果，省去 8 位中间图
+        output_format = OUTPUT_PACKED if _worker_encoder in BILEVEL_ENCODERS else OUTPUT_GRAY
+        cache = _worker_processor.cache
+        hits = cache.hits if cache is not None else 0
+        if _worker_tile_size:
+            result = _worker_processor.apply_binarization_tiled(
+                image, denoise=_worker_denoise, tile_size=_worker_tile_size,
+                output_format=output_format)
+        else:
+            result = _worker_processor.apply_binarization(
+                image, denoise=_worker_denoise, output_format=output_format)
+
+        os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+        save_image_file(dst, result, encoder=_worker_encoder)
+        if cache is not None and cache.hits > hits:
+            return 'cached', str(src), size, 1, None
+        return 'ok', str(src), size, 1, None
+    except Exception as e:
+        return 'failed', str(src), 0, 0, str(e)
+
+
+def run_batch(tasks, workers=1, force=False, block_size=11, c_value=2,
+              denoise_h=5, denoise=True, tile_size=None, encoder='png1', cache_dir=None,
+              chunksize=4, threshold_method=THRESHOLD_ADAPTIVE, k=None,
+              denoise_method=DENOISE_NLM, noise_gate=None, auto_denoise=False,
+              normalize_illumination=False, auto_parameters=False, raw_size=None,
+              page_workers=1):
+    """
+    批量处理，结果按输入顺序逐个产出
+
+    Args:
+        tasks: [(输入路径, 输出路径), ...]
+        workers: 工作进程数（1 表示在当前进程处理）
+        tile_size: 分块大小，None 表示整幅处理
+        encoder: 输出编码器（OUTPUT_ENCODERS 中的名称）
+        cache_dir: 结果缓存目录（None 表示不缓存）
+        threshold_method: 阈值方法（THRESHOLD_METHODS 中的名称）
+        k: Niblack / Sauvola / Wolf 的 k（None 使用默认值）
+        denoise_method: 去噪方法（DENOISE_METHODS 中的名称）
+        noise_gate: 估计噪声标准差低于此值时跳过去噪（None 表示总是去噪）
+        auto_denoise: 按每页估计噪声决定是否去噪以及 denoise_h
+        normalize_illumination: 阈值前除去低分辨率估计的背景光照（阴影）
+        auto_parameters: 按每页估计的字高和噪声选择 block_size / c_value
+        raw_size: .raw 文件（无文件头的 8 位灰度数据）的 (宽, 高)
+        page_workers: 多页文档每个进程同时处理的页数（线程数）
+
+    Yields:
+        _process_one 的返回值
+    """
+    init_args = (block_size, c_value, denoise_h, denoise, tile_size, encoder, cache_dir,
+                 threshold_method, k, denoise_method, noise_gate, auto_denoise,
+                 normalize_illumination, auto_parameters, raw_size, page_workers)
+    jobs = [(src, dst, force) for src, dst in tasks]
+
+    if workers <= 1:
+        _init_worker(*init_args)
+        for job in jobs:
+            yield _process_one(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=init_args) as executor:
+        # map 保证结果与输入顺序一致
+        for result in executor.map(_process_one, jobs, chunksize=chunksize):
+            yield result
+
+
+def build_parser():
+    """命令行参数"""
+    parser = argparse.ArgumentParser(description='Headless batch binarization')
+    parser.add_argument('inputs', nargs='+',
+                        help='directories, glob patterns, image files or @filelist')
+    parser.add_argument('-o', '--output', default=os.path.join('output', 'binarized'),
+                        help='output directory')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes')
+    parser.add_argument('--format', default='png1', choices=list(OUTPUT_ENCODERS),
+                        help='output encoder (png1 / tiff-g4 write 1-bit data)')
+    parser.add_argument('--block-size', type=int, default=11)
+    parser.add_argument('--c-value', type=float, default=2)
+    parser.add_argument('--denoise-h', type=float, default=5)
+    parser.add_argument('--method', default=THRESHOLD_ADAPTIVE, choices=list(THRESHOLD_METHODS),
+                        help='threshold method (sauvola / wolf for low-contrast pages, '
+                             'global with --normalize)')
+    parser.add_argument('--k', type=float, default=None,
+                        help='k for niblack / sauvola / wolf (default per method)')
+    parser.add_argument('--no-denoise', action='store_true', help='skip denoising')
+    parser.add_argument('--denoise-method', default=DENOISE_NLM, choices=list(DENOISE_METHODS),
+                        help='denoise method (see benchmark_denoise.py for quality vs time)')
+    parser.add_argument('--noise-gate', type=float, default=None,
+                        help='skip denoising pages whose estimated noise sigma is below this')
+    parser.add_argument('--auto-denoise', action='store_true',
+                        help='estimate noise per page to choose whether and how hard to denoise')
+    parser.add_argument('--normalize', action='store_true',
+                        help='divide out a low-resolution background estimate before thresholding')
+    parser.add_argument('--auto-params', action='store_true',
+                        help='choose block size and C per page from the estimated text height and noise')
+    parser.add_argument('--raw-size', default=None,
+                        help='WxH of headerless 8-bit grayscale .raw inputs')
+    parser.add_argument('--page-workers', type=int, default=1,
+                        help='pages of a multi-page PDF / TIFF processed in parallel per process')
+    parser.add_argument('--tile-size', type=int, default=None,
+                        help='process in overlapping tiles of this size (bounded memory)')
+    parser.add_argument('--cache-dir', default=None,
+                        help='reuse results of unchanged pages across runs')
+    parser.add_argument('--force', action='store_true',
+                        help='reprocess files whose output is up to date')
+    parser.add_argument('--chunksize', type=int, default=4,
+                        help='tasks handed to a worker at a time')
+    return parser
+
+
+def main(argv=None):
+    """主函数"""
+    args = build_parser().parse_args(argv)
+
+    try:
+        tasks = plan_outputs(collect_inputs(args.inputs), args.output, args.format)
+        raw_size = (tuple(int(v) for v in args.raw_size.lower().split('x'))
+                    if args.raw_size else None)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 2
+
+    if not tasks:
+        print("⚠️  没有找到输入图片")
+        return 1
+
+    print(f"🚀 批量二值化: {len(tasks)} 个文件, {args.workers} 个进程")
+
+    counts = {'ok': 0, 'cached': 0, 'skipped': 0, 'failed': 0}
+    total_bytes = 0
+    total_pages = 0
+    start = time.perf_counter()
+
+    for status, src, size, pages, error in run_batch(
+            tasks, workers=args.workers, force=args.force,
+            block_size=args.block_size, c_value=args.c_value,
+            denoise_h=args.denoise_h, denoise=not args.no_denoise,
+            tile_size=args.tile_size, encoder=args.format, cache_dir=args.cache_dir,
+            chunksize=args.chunksize, threshold_method=args.method, k=args.k,
+            denoise_method=args.denoise_method, noise_gate=args.noise_gate,
+            auto_denoise=args.auto_denoise, normalize_illumination=args.normalize,
+            auto_parameters=args.auto_params, raw_size=raw_size,
+            page_workers=args.page_workers):
+        counts[status] += 1
+        total_bytes += size
+        total_pages += pages
+        if error:
+            print(f"❌ {src}: {error}")
+
+    elapsed = time.perf_counter() - start
+    # 多页文档按实际写入的页数计（跳过的文件不计）
+    files_per_s = (counts['ok'] + counts['cached']) / elapsed if elapsed > 0 else 0.0
+    pages_per_s = total_pages / elapsed if elapsed > 0 else 0.0
+    mb_per_s = total_bytes / 1e6 / elapsed if elapsed > 0 else 0.0
+
+    print("=" * 60)
+    print(f"✅ 完成: {counts['ok']}  💾 缓存: {counts['cached']}  "
+          f"⏭️  跳过: {counts['skipped']}  ❌ 失败: {counts['failed']}")
+    print(f"⏱️  耗时: {elapsed:.2f} s, 写入 {total_pages} 页")
+    print(f"📈 吞吐量: {pages_per_s:.2f} pages/s, {files_per_s:.2f} files/s, {mb_per_s:.2f} MB/s")
+    print("=" * 60)
+
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
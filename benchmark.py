@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段性能基准测试
+
+对 OpenCV 和 Pillow 两条处理路径，在多个分辨率的合成页面上计时
+应用实际使用的函数：load_image_file、SimpleBinarizationProcessor.apply_binarization
+（各处理阶段由 StageRecorder 记录）、display_buffer 和 save_image_file。
+处理器中未单独记录的部分（噪声估计、参数估计、缓存查找等）计入 overhead。
+输出格式默认与应用相同（gray）；--output-format color 时 output 阶段为 3 通道扩展。
+预热后重复运行，报告中位数和 p95（time.perf_counter）。
+
+用法：
+    # 运行并保存基线
+    python benchmark.py --save-baseline bench_baseline.json
+
+    # 与基线对比，任一阶段中位数变慢超过 20% 时返回非 0
+    python benchmark.py --baseline bench_baseline.json --max-regression 20
+
+    # 计时彩色输出（3 通道扩展）
+    python benchmark.py --output-format color
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+# 避免 Kivy 解析本脚本的命令行参数
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, StageRecorder, USE_OPENCV, OUTPUT_GRAY,
+                  OUTPUT_FORMATS, load_image_file, save_image_file, display_buffer)
+from synthetic_docs import make_document
+
+# 处理器内部由 StageRecorder 记录的阶段（未出现的阶段记为 0）
+PROCESS_STAGES = ('illumination', 'gray', 'denoise', 'normalize', 'threshold', 'postprocess',
+                  'output')
+STAGES = ('load',) + PROCESS_STAGES + ('overhead', 'display', 'encode')
+DEFAULT_SIZES = ('640x480', '1280x960', '2480x3508')
+
+
+class StageTimer:
+    """按阶段收集耗时样本（毫秒）"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, stage, ms):
+        """记录一个样本"""
+        self.samples.setdefault(stage, []).append(ms)
+
+    @contextmanager
+    def __call__(self, stage):
+        start = time.perf_counter()
+        yield
+        self.add(stage, (time.perf_counter() - start) * 1000)
+
+
+def run_pipeline(path, backend, processor, timer, encoder, out_path, output_format=OUTPUT_GRAY):
+    """
+    按指定后端执行一次完整流程（读取 -> 二值化 -> 显示缓冲区 -> 编码）
+
+    处理阶段来自处理器自身的 StageRecorder 记录，main.py 中的任何变化都会反映在结果中。
+    """
+    use_opencv = main_module.USE_OPENCV
+    recorder, processor.recorder = processor.recorder, StageRecorder()
+    try:
+        main_module.USE_OPENCV = backend == 'opencv'
+        with timer('load'):
+            image = load_image_file(path)
+
+        start = time.perf_counter()
+        result = processor.apply_binarization(image, output_format=output_format)
+        process_ms = (time.perf_counter() - start) * 1000
+
+        recorded = processor.recorder.summary()
+        for stage in PROCESS_STAGES:
+            timer.add(stage, recorded.get(stage, {}).get('wall_ms', 0.0))
+        timer.add('overhead', max(0.0, process_ms - sum(
+            entry['wall_ms'] for entry in recorded.values())))
+
+        with timer('display'):
+            display_buffer(result)
+        with timer('encode'):
+            save_image_file(out_path, result, encoder=encoder)
+    finally:
+        main_module.USE_OPENCV = use_opencv
+        processor.recorder = recorder
+
+
+def percentile(samples, q):
+    """线性插值百分位数"""
+    return float(np.percentile(np.asarray(samples), q))
+
+
+def run_benchmark(backends, sizes, repeat=5, warmup=1, encoder='png1', processor=None,
+                  output_format=OUTPUT_GRAY):
+    """
+    执行基准测试
+
+    Args:
+        backends: 后端名称列表（'opencv' / 'pillow'）
+        sizes: [(宽, 高), ...]
+        repeat: 计时次数
+        warmup: 预热次数（不计时）
+        encoder: 编码阶段使用的编码器
+        processor: 被测处理器（默认不缓存去噪结果：重复处理同一页面时每次都去噪）
+        output_format: apply_binarization 的输出格式（应用使用 OUTPUT_GRAY）
+
+    Returns:
+        {'<backend>/<W>x<H>/<stage>': {'median_ms', 'p95_ms', 'samples'}}
+    """
+    processor = processor or SimpleBinarizationProcessor(denoise_cache_size=0)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height in sizes:
+            # 输入保存为 PNG，读取阶段包含真实的解码开销
+            from PIL import Image
+            path = os.path.join(tmp, f'page_{width}x{height}.png')
+            Image.fromarray(make_document(width, height, channels=1)).convert('RGB').save(path)
+            out_path = os.path.join(tmp, 'out')
+
+            for backend in backends:
+                for _ in range(warmup):
+                    run_pipeline(path, backend, processor, StageTimer(), encoder, out_path,
+                                 output_format)
+
+                timer = StageTimer()
+                for _ in range(repeat):
+                    run_pipeline(path, backend, processor, timer, encoder, out_path,
+                                 output_format)
+
+                totals = np.sum([timer.samples[stage] for stage in STAGES], axis=0)
+                timer.samples['total'] = totals.tolist()
+
+                for stage, samples in timer.samples.items():
+                    results[f'{backend}/{width}x{height}/{stage}'] = {
+                        'median_ms': percentile(samples, 50),
+                        'p95_ms': percentile(samples, 95),
+                        'samples': len(samples),
+                    }
+    return results
+
+
+def compare(results, baseline, max_regression, min_ms=1.0):
+    """
+    与基线对比中位数
+
+    Args:
+        results: 本次结果
+        baseline: 基线结果（同结构）
+        max_regression: 允许的变慢百分比
+        min_ms: 基线中位数低于此值的阶段不参与判断（计时噪声）
+
+    Returns:
+        [(名称, 基线 ms, 本次 ms, 变化百分比), ...]，只包含超出阈值的阶段
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        # 未出现的阶段（如未启用光照归一化）中位数为 0
+        if base is None or base['median_ms'] < min_ms or base['median_ms'] <= 0:
+            continue
+        change = (current['median_ms'] / base['median_ms'] - 1) * 100
+        if change > max_regression:
+            regressions.append((name, base['median_ms'], current['median_ms'], change))
+    return regressions
+
+
+def print_table(results):
+    """打印结果表"""
+    print(f"{'backend/size/stage':<36}{'median ms':>12}{'p95 ms':>12}")
+    for name, stats in results.items():
+        print(f"{name:<36}{stats['median_ms']:>12.2f}{stats['p95_ms']:>12.2f}")
+
+
+def parse_size(text):
+    """'WxH' -> (W, H)"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main(argv=None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Per-stage binarization benchmark')
+    parser.add_argument('--backends', default='opencv,pillow' if USE_OPENCV else 'pillow',
+                        help='comma separated: opencv,pillow')
+    parser.add_argument('--sizes', nargs='+', default=list(DEFAULT_SIZES), help='WxH ...')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--encoder', default='png1')
+    parser.add_argument('--output-format', default=OUTPUT_GRAY, choices=OUTPUT_FORMATS,
+                        help='binarization output format (the app uses gray; color times '
+                             'the 3-channel expansion)')
+    parser.add_argument('--auto', action='store_true',
+                        help='estimate denoise strength and block size / C per page, as the app does')
+    parser.add_argument('--save-baseline', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON baseline')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='allowed slowdown of a stage median, in percent')
+    parser.add_argument('--min-ms', type=float, default=1.0,
+                        help='ignore stages faster than this in the baseline')
+    args = parser.parse_args(argv)
+
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    sizes = [parse_size(s) for s in args.sizes]
+
+    print("=" * 60)
+    print(f"⚡ 分阶段基准测试: {', '.join(backends)} | output={args.output_format}, "
+          f"repeat={args.repeat}, warmup={args.warmup}")
+    print("=" * 60)
+    processor = SimpleBinarizationProcessor(denoise_cache_size=0, auto_denoise=args.auto,
+                                            auto_parameters=args.auto)
+    results = run_benchmark(backends, sizes, args.repeat, args.warmup, args.encoder, processor,
+                            args.output_format)
+    print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': {'python': platform.python_version(),
+                                'machine': platform.machine(),
+                                'repeat': args.repeat,
+                                'output_format': args.output_format},
+                       'results': results}, f, indent=2)
+        print(f"💾 基线已保存: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            saved = json.load(f)
+        baseline_format = saved.get('meta', {}).get('output_format', OUTPUT_GRAY)
+        if baseline_format != args.output_format:
+            print(f"❌ 基线的输出格式为 {baseline_format}，本次为 {args.output_format}")
+            return 2
+        baseline = saved['results']
+        regressions = compare(results, baseline, args.max_regression, args.min_ms)
+        if regressions:
+            print(f"❌ {len(regressions)} 个阶段变慢超过 {args.max_regression:.0f}%:")
+            for name, base_ms, current_ms, change in regressions:
+                print(f"   {name}: {base_ms:.2f} ms -> {current_ms:.2f} ms (+{change:.0f}%)")
+            return 1
+        print(f"✅ 没有阶段变慢超过 {args.max_regression:.0f}%")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
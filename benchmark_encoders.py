@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+二值化结果编码器性能对比
+
+对同一批二值化页面，比较各编码器的每页字节数和每页编码耗时，
+基准为旧的 3 通道 JPEG（quality=95）保存方式。
+
+用法：
+    python benchmark_encoders.py --pages 5 --size 2480x3508
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+# 避免 Kivy 解析本脚本的命令行参数
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from main import (SimpleBinarizationProcessor, OUTPUT_COLOR, OUTPUT_PACKED,
+                  OUTPUT_ENCODERS, BILEVEL_ENCODERS, USE_OPENCV, save_image_file)
+from synthetic_docs import make_document
+
+
+def run(pages, width, height, repeat):
+    """执行对比，返回 {编码器: (平均字节数, 中位耗时 ms)}"""
+    processor = SimpleBinarizationProcessor()
+    results = {}
+
+    inputs = []
+    for i in range(pages):
+        image = make_document(width, height, noise=6.0, seed=i)
+        if not USE_OPENCV:
+            from PIL import Image
+            image = Image.fromarray(image)
+        inputs.append((processor.apply_binarization(image, output_format=OUTPUT_COLOR),
+                       processor.apply_binarization(image, output_format=OUTPUT_PACKED)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (_, ext) in OUTPUT_ENCODERS.items():
+            sizes, times = [], []
+            for i, (color, packed) in enumerate(inputs):
+                # 1 位编码器使用打包结果，其余沿用旧的 3 通道结果
+                image = packed if name in BILEVEL_ENCODERS else color
+                path = os.path.join(tmp, f'{name}_{i}{ext}')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    save_image_file(path, image, encoder=name)
+                    times.append((time.perf_counter() - start) * 1000)
+                sizes.append(os.path.getsize(path))
+            results[name] = (statistics.mean(sizes), statistics.median(times))
+
+    return results
+
+
+def main(argv=None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Compare output encoders for binarized pages')
+    parser.add_argument('--pages', type=int, default=3)
+    parser.add_argument('--size', default='2480x3508', help='page size WxH (default A4 @ 300 dpi)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    results = run(args.pages, width, height, args.repeat)
+
+    base_size, base_ms = results['jpeg']
+    print("=" * 72)
+    print(f"📊 编码器对比: {args.pages} 页, {width}x{height}")
+    print("=" * 72)
+    print(f"{'encoder':<10}{'KB/page':>12}{'vs jpeg':>10}{'ms/page':>12}{'vs jpeg':>10}")
+    for name, (size, ms) in results.items():
+        print(f"{name:<10}{size / 1024:>12.1f}{size / base_size:>9.2f}x"
+              f"{ms:>12.1f}{ms / base_ms:>9.2f}x")
+    print("=" * 72)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
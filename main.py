@@ -18,6 +18,8 @@ from kivy.uix.label import Label
 from kivy.uix.popup import Popup
 from kivy.uix.filechooser import FileChooserIconView
 from kivy.uix.checkbox import CheckBox
+from kivy.uix.spinner import Spinner
+from kivy.uix.slider import Slider
 from kivy.graphics.texture import Texture
 from kivy.clock import Clock
 from kivy.utils import platform
@@ -25,6 +27,15 @@ from kivy.core.text import LabelBase
 
 import numpy as np
 from pathlib import Path
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+import threading
+import queue
+import tracemalloc
+import hashlib
+import json
+import time
 import os
 
 # 尝试导入 OpenCV（优先）或 Pillow（备用）
@@ -53,203 +64,2970 @@ except Exception as e:
     print(f"⚠️ 字体注册失败: {e}")
     print("   中文可能显示为方框，但不影响功能")
 
+# fastNlMeansDenoising 窗口参数（分块处理时用于计算重叠边宽）
+NLM_TEMPLATE_WINDOW = 7
+NLM_SEARCH_WINDOW = 21
+
+# bilateralFilter 邻域直径
+BILATERAL_DIAMETER = 5
+
+# 分块处理默认块大小（像素）
+DEFAULT_TILE_SIZE = 1024
+
+# 批量处理时一次向量化处理的像素数（帧数 x 每帧像素，决定临时缓冲区大小；
+# 过大时 float64 中间结果超出 CPU 缓存，反而变慢）
+BATCH_CHUNK_PIXELS = 1024 * 1024
+
+# 处理器临时缓冲区池中每个名称保留的尺寸数（预览代理图 + 全分辨率图交替处理时都不重新分配）
+BUFFER_POOL_SHAPES = 2
+
+# 预览图最长边（与界面显示尺寸一致）
+PREVIEW_MAX_SIZE = 400
+
+# 滑块调参：停止调整多久后计算全分辨率结果（秒）
+TUNE_REFINE_DELAY = 0.5
+
+# 缩放查看器：按块懒惰二值化的块大小（原图像素）和缓存的块数
+VIEW_TILE_SIZE = 512
+VIEW_CACHE_TILES = 64
+
+# PDF 页面渲染分辨率（DPI）
+PDF_RENDER_DPI = 200
+
+# 界面保存多页文档时的并行页数（同时驻留内存的页面约为其 2 倍）
+DOCUMENT_PAGE_WORKERS = min(4, os.cpu_count() or 1)
+
+# 自动模式下去噪阶段的延迟预算（毫秒），按图像尺寸选择去噪方法
+AUTO_DENOISE_BUDGET_MS = 500
+
+# 二值化结果输出格式
+OUTPUT_COLOR = 'color'    # 3 通道（OpenCV 为 BGR ndarray，Pillow 为 RGB Image）
+OUTPUT_GRAY = 'gray'      # 8 位单通道（OpenCV 为 2 维 ndarray，Pillow 为 'L' Image）
+OUTPUT_PACKED = 'packed'  # 1 位打包（PackedBitmap，np.packbits 按行打包）
+OUTPUT_FORMATS = (OUTPUT_COLOR, OUTPUT_GRAY, OUTPUT_PACKED)
+
+# 阈值方法
+THRESHOLD_ADAPTIVE = 'adaptive'  # OpenCV GAUSSIAN_C / Pillow 局部均值 - C（默认）
+THRESHOLD_NIBLACK = 'niblack'    # T = m + k * s
+THRESHOLD_SAUVOLA = 'sauvola'    # T = m * (1 + k * (s / R - 1))
+THRESHOLD_WOLF = 'wolf'          # T = (1 - k) * m + k * M + k * s / max(s) * (m - M)
+THRESHOLD_GLOBAL = 'global'      # 整幅 Otsu（配合 normalize_illumination，与 block_size 无关）
+THRESHOLD_METHODS = (THRESHOLD_ADAPTIVE, THRESHOLD_NIBLACK, THRESHOLD_SAUVOLA, THRESHOLD_WOLF,
+                     THRESHOLD_GLOBAL)
+
+# 去噪方法（Pillow 后端只有中值滤波可用，所有方法都使用 3x3 中值滤波）
+DENOISE_NLM = 'nlm'              # cv2.fastNlMeansDenoising（质量最好，最慢）
+DENOISE_HYBRID = 'hybrid'        # 缩小 1/2 -> NLM -> 放大
+DENOISE_BILATERAL = 'bilateral'  # cv2.bilateralFilter (d=5)
+DENOISE_MEDIAN = 'median'        # cv2.medianBlur (3x3)
+DENOISE_METHODS = (DENOISE_NLM, DENOISE_HYBRID, DENOISE_BILATERAL, DENOISE_MEDIAN)
+
+# 各去噪方法每百万像素耗时（ms，开发机 OpenCV 单线程实测，见 benchmark_denoise.py，
+# 目标设备上可重新测量后传给 select_denoise_method）。按合成页面 σ=8 时的
+# 二值化一致率从高到低排列，select_denoise_method 选择预算内排在最前的方法
+DENOISE_COST_MS_PER_MP = OrderedDict([
+    (DENOISE_BILATERAL, 5.0),
+    (DENOISE_NLM, 1300.0),
+    (DENOISE_MEDIAN, 0.5),
+    (DENOISE_HYBRID, 330.0),
+])
+
+# 噪声估计采样：等间距取若干 16 行的水平条带，总像素数不超过此值
+NOISE_SAMPLE_PIXELS = 256 * 1024
+NOISE_SAMPLE_BAND = 16
+
+# 自动去噪：估计噪声低于 AUTO_DENOISE_MIN_SIGMA 时跳过去噪，否则 denoise_h 取
+# AUTO_DENOISE_H_PER_SIGMA * σ（合成页面上 1.0 ~ 1.5 倍 σ 的二值化一致率最高），
+# 并限制在 [AUTO_DENOISE_MIN_H, AUTO_DENOISE_MAX_H]
+AUTO_DENOISE_MIN_SIGMA = 2.5
+AUTO_DENOISE_H_PER_SIGMA = 1.2
+AUTO_DENOISE_MIN_H = 3.0
+AUTO_DENOISE_MAX_H = 30.0
+
+# 光照场估计：缩小到最长边约 ILLUMINATION_MAX_SIZE（整数倍块平均），在小图上
+# 用 ILLUMINATION_KERNEL 的闭运算去掉文字、再平滑，放大后除去
+ILLUMINATION_MAX_SIZE = 256
+ILLUMINATION_KERNEL = 7
+ILLUMINATION_SMOOTH = 5
+
+# 文字尺度估计：在等间距的 TEXT_SCALE_TILE 窗口（高, 宽）上统计墨迹游程，
+# 缩小后的总像素数不超过 TEXT_SCALE_SAMPLE_PIXELS；文字与背景的亮度差低于
+# TEXT_SCALE_MIN_CONTRAST 的窗口视为没有文字
+TEXT_SCALE_SAMPLE_PIXELS = 1024 * 1024
+TEXT_SCALE_TILE = (256, 512)
+TEXT_SCALE_MIN_CONTRAST = 40
+
+# 自动参数：block_size 取 AUTO_BLOCK_PER_CHAR_HEIGHT 倍字高（GAUSSIAN_C 的耗时随窗口
+# 增长，合成页面上 1 倍字高已接近最佳一致率），限制在 AUTO_BLOCK_RANGE；
+# c_value 取 AUTO_C_PER_SIGMA 倍噪声 σ，不小于 AUTO_C_MIN、不大于文字对比度的 1/4
+AUTO_BLOCK_PER_CHAR_HEIGHT = 1.0
+AUTO_BLOCK_RANGE = (7, 255)
+AUTO_C_PER_SIGMA = 2.5
+AUTO_C_MIN = 2.0
+
+# 各方法 k 的默认值，以及 Sauvola 的标准差动态范围 R
+THRESHOLD_DEFAULT_K = {THRESHOLD_NIBLACK: -0.2, THRESHOLD_SAUVOLA: 0.2, THRESHOLD_WOLF: 0.5}
+SAUVOLA_R = 128.0
+
+
+def _box_sum(array, window_size):
+    """
+    计算每个像素 window_size x window_size 窗口内的像素和（积分图实现）
+
+    边界使用对称反射填充（与 scipy.ndimage 的 mode='reflect' 一致），
+    因此每个窗口的像素数恒为 window_size²，不需要逐像素统计边界计数。
+    只对最后两个轴计算，支持 (H, W) 以及 (N, H, W) 图像栈。
+
+    Args:
+        array: 输入数组，形状为 (..., H, W)
+        window_size: 窗口大小
+
+    Returns:
+        与输入最后两个轴同尺寸的 float64 窗口和
+    """
+    h, w = array.shape[-2:]
+    before = window_size // 2
+    after = window_size - 1 - before
+    pad_width = [(0, 0)] * (array.ndim - 2) + [(before, after), (before, after)]
+    padded = np.pad(array.astype(np.float64, copy=False), pad_width, mode='symmetric')
+
+    # 积分图：首行首列补 0，便于用四个角点相减得到窗口和
+    integral = np.zeros(padded.shape[:-2] + (padded.shape[-2] + 1, padded.shape[-1] + 1))
+    np.cumsum(padded, axis=-2, out=integral[..., 1:, 1:])
+    np.cumsum(integral[..., 1:, 1:], axis=-1, out=integral[..., 1:, 1:])
+
+    k = window_size
+    return (integral[..., k:k + h, k:k + w] -
+            integral[..., :h, k:k + w] -
+            integral[..., k:k + h, :w] +
+            integral[..., :h, :w])
+
+
+def _symmetric_index(size, before, after):
+    """对称反射填充后每个位置对应的源索引（与 np.pad(mode='symmetric') 相同）"""
+    position = np.arange(-before, size + after) % (2 * size)
+    return np.where(position < size, position, 2 * size - 1 - position)
+
+
+def _axis_part(array, axis, start, stop):
+    """array 沿 axis 的 [start:stop] 视图"""
+    index = [slice(None)] * array.ndim
+    index[axis] = slice(start, stop)
+    return array[tuple(index)]
+
+
+def _extreme3_axis_into(src, dst, reducer, axis):
+    """沿一个轴的 3 邻域最小 / 最大值（边缘复制），写入 dst（不能与 src 重叠）"""
+    n = src.shape[axis]
+    if n == 1:
+        dst[...] = src
+        return dst
+    part = _axis_part
+    # 内部：左右（上下）邻居与自身；两端：自身与唯一的邻居（边缘复制）
+    reducer(part(src, axis, 0, n - 2), part(src, axis, 1, n - 1), out=part(dst, axis, 1, n - 1))
+    reducer(part(dst, axis, 1, n - 1), part(src, axis, 2, n), out=part(dst, axis, 1, n - 1))
+    reducer(part(src, axis, 0, 1), part(src, axis, 1, 2), out=part(dst, axis, 0, 1))
+    reducer(part(src, axis, n - 2, n - 1), part(src, axis, n - 1, n), out=part(dst, axis, n - 1, n))
+    return dst
+
+
+def _extreme3_into(mask, out, scratch, reducer):
+    """
+    3x3 最小 / 最大值滤波（边缘复制，与 PIL MinFilter / MaxFilter 相同），按最后两个轴
+
+    Args:
+        mask: bool 数组 (..., H, W)
+        out, scratch: 与 mask 同形状的 bool 缓冲区（out 可以就是 mask）
+        reducer: np.logical_and（最小值）或 np.logical_or（最大值）
+    """
+    _extreme3_axis_into(mask, scratch, reducer, -1)
+    return _extreme3_axis_into(scratch, out, reducer, -2)
+
+
+def _median3_into(src, out, rows, lo, mid, hi):
+    """
+    3x3 中值滤波（边缘复制，与 PIL MedianFilter(3) 相同），按最后两个轴
+
+    每列上下 3 个像素先排序，中值 = 三列最小值中的最大者、三列中值的中值、
+    三列最大值中的最小者这三者的中值。
+
+    Args:
+        src: uint8 数组 (..., H, W)
+        out: 与 src 同形状的结果缓冲区（不能与 src 重叠）
+        rows: (..., H + 2, W) 的缓冲区（上下各复制一行边缘）
+        lo, mid, hi: 与 src 同形状的缓冲区
+    """
+    h, w = src.shape[-2:]
+    np.take(src, np.clip(np.arange(-1, h + 1), 0, h - 1), axis=-2, out=rows, mode='clip')
+    up, center, down = rows[..., :h, :], rows[..., 1:h + 1, :], rows[..., 2:, :]
+
+    # 每列上下 3 个像素排序：lo <= mid <= hi
+    np.minimum(up, center, out=lo)
+    np.maximum(up, center, out=hi)
+    np.minimum(hi, down, out=mid)
+    np.maximum(hi, down, out=hi)
+    np.maximum(lo, mid, out=mid)
+    np.minimum(lo, down, out=lo)
+
+    # 三列的 max(lo) -> out，min(hi) -> lo，med(mid) -> hi
+    _extreme3_axis_into(lo, out, np.maximum, -1)
+    _extreme3_axis_into(hi, lo, np.minimum, -1)
+    hi[...] = mid  # 两端：med(x0, x0, x1) = x0
+    if w > 2:
+        # med(l, c, r) = max(min(l, r), min(max(l, r), c))，rows 已用完，作为临时空间
+        left, right, inner = mid[..., :-2], mid[..., 2:], hi[..., 1:-1]
+        np.maximum(left, right, out=inner)
+        np.minimum(inner, mid[..., 1:-1], out=inner)
+        np.minimum(left, right, out=rows[..., :h, 1:-1])
+        np.maximum(inner, rows[..., :h, 1:-1], out=inner)
+
+    # 三者的中值
+    np.minimum(out, hi, out=mid)
+    np.maximum(out, hi, out=out)
+    np.minimum(out, lo, out=out)
+    np.maximum(out, mid, out=out)
+    return out
+
+
+def _window_sums(gray, window_size):
+    """
+    每个像素窗口内的像素和与平方和（积分图 / 滑动和，代价与窗口大小无关）
+
+    两个后端边界都使用对称反射，整数输入的结果是精确的，彼此逐位一致。
+
+    Args:
+        gray: uint8 灰度图 (H, W)
+        window_size: 窗口大小
+
+    Returns:
+        (窗口和, 窗口平方和)，均为 float64
+    """
+    if USE_OPENCV:
+        ksize = (window_size, window_size)
+        window_sum = cv2.boxFilter(gray, cv2.CV_64F, ksize, normalize=False,
+                                   borderType=cv2.BORDER_REFLECT)
+        window_sqsum = cv2.sqrBoxFilter(gray, cv2.CV_64F, ksize, normalize=False,
+                                        borderType=cv2.BORDER_REFLECT)
+        return window_sum, window_sqsum
+
+    values = gray.astype(np.float64)
+    return _box_sum(values, window_size), _box_sum(values * values, window_size)
+
+
+def _otsu_level(gray):
+    """Otsu 全局阈值（类间方差最大的灰度级，纯 NumPy，两个后端结果一致）"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    prob = hist / hist.sum()
+    weight = np.cumsum(prob)
+    mean = np.cumsum(prob * np.arange(256))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (mean[-1] * weight - mean) ** 2 / (weight * (1 - weight))
+    between[~np.isfinite(between)] = 0
+    return int(np.argmax(between))
+
+
+def _local_statistics_threshold(gray, window_size, method, k):
+    """
+    基于局部均值和标准差的阈值（Niblack / Sauvola / Wolf），以及整幅 Otsu
+
+    Args:
+        gray: uint8 灰度图 (H, W)
+        window_size: 窗口大小
+        method: THRESHOLD_NIBLACK / THRESHOLD_SAUVOLA / THRESHOLD_WOLF / THRESHOLD_GLOBAL
+        k: 方法参数
+
+    Returns:
+        二值图（uint8，背景 255，文字 0）
+    """
+    if method == THRESHOLD_GLOBAL:
+        return (gray > _otsu_level(gray)).astype(np.uint8) * 255
+
+    area = window_size * window_size
+    mean, std = _window_sums(gray, window_size)
+    mean /= area
+    std /= area
+    std -= mean * mean
+    np.maximum(std, 0, out=std)
+    np.sqrt(std, out=std)
+
+    if method == THRESHOLD_NIBLACK:
+        threshold = mean + k * std
+    elif method == THRESHOLD_SAUVOLA:
+        threshold = mean * (1 + k * (std / SAUVOLA_R - 1))
+    elif method == THRESHOLD_WOLF:
+        # 用整幅图像的最小灰度和最大局部标准差归一化对比度
+        min_gray = float(gray.min())
+        max_std = float(std.max()) or 1.0
+        threshold = (1 - k) * mean + k * min_gray + k * (std / max_std) * (mean - min_gray)
+    else:
+        raise ValueError(f'Unknown threshold method: {method}')
+
+    return (gray > threshold).astype(np.uint8) * 255
+
+
+def _noise_sample(image, max_pixels):
+    """
+    噪声估计用的灰度样本：图像不大于 max_pixels 时返回整幅灰度图，
+    否则等间距截取若干水平条带，只转换这些条带
+
+    Returns:
+        灰度数组列表
+    """
+    if isinstance(image, np.ndarray):
+        h, w = image.shape[:2]
+    else:
+        w, h = image.size
+
+    if max_pixels is None or h * w <= max_pixels or h <= NOISE_SAMPLE_BAND:
+        return [_gray_of(image)]
+
+    count = max(1, min(h // NOISE_SAMPLE_BAND, max_pixels // (NOISE_SAMPLE_BAND * w)))
+    starts = np.linspace(0, h - NOISE_SAMPLE_BAND, count).astype(int)
+    if isinstance(image, np.ndarray):
+        return [_gray_of(image[y:y + NOISE_SAMPLE_BAND]) for y in starts]
+    return [np.asarray(image.crop((0, int(y), w, int(y) + NOISE_SAMPLE_BAND)).convert('L'))
+            for y in starts]
+
+
+def estimate_noise_sigma(image, max_pixels=NOISE_SAMPLE_PIXELS):
+    """
+    估计图像高斯噪声标准差（灰度级）
+
+    使用 Immerkær 的 3x3 拉普拉斯差分核（对平滑区域和线性渐变响应为 0，
+    对 i.i.d. 噪声响应的标准差为 6σ），取响应绝对值的中位数做稳健估计。
+    第二遍排除梯度远大于噪声的像素（文字和线条边缘）后重新取中位数，
+    避免文字较密的页面高估噪声。
+
+    Args:
+        image: 灰度数组、OpenCV BGR 图像或 PIL Image
+        max_pixels: 采样像素上限（大图只转换和计算等间距的水平条带），
+                    None 表示使用整幅图像
+
+    Returns:
+        噪声标准差估计值（float）
+    """
+    responses, gradients = [], []
+    for gray in _noise_sample(image, max_pixels):
+        g = np.asarray(gray, dtype=np.int16)
+        if g.shape[0] < 3 or g.shape[1] < 3:
+            continue
+        responses.append(np.abs(4 * g[1:-1, 1:-1]
+                                - 2 * (g[:-2, 1:-1] + g[2:, 1:-1] + g[1:-1, :-2] + g[1:-1, 2:])
+                                + g[:-2, :-2] + g[:-2, 2:] + g[2:, :-2] + g[2:, 2:]).ravel())
+        gradients.append((np.abs(g[1:-1, 2:] - g[1:-1, :-2]) +
+                          np.abs(g[2:, 1:-1] - g[:-2, 1:-1])).ravel())
+    if not responses:
+        return 0.0
+    response = np.concatenate(responses)
+    gradient = np.concatenate(gradients)
+
+    # 中位数绝对值 / 0.6745 为正态分布标准差的稳健估计
+    sigma = float(np.median(response)) / 0.6745 / 6.0
+
+    # 纯噪声的 |dx| + |dy| 几乎不会超过 6√2σ ≈ 8.5σ
+    flat = gradient <= max(8.5 * sigma, 1.0)
+    if flat.mean() > 0.1:
+        sigma = float(np.median(response[flat])) / 0.6745 / 6.0
+    return sigma
+
+
+def denoise_h_for_sigma(sigma):
+    """按估计噪声标准差选择去噪强度 denoise_h"""
+    return float(min(AUTO_DENOISE_MAX_H,
+                     max(AUTO_DENOISE_MIN_H, round(AUTO_DENOISE_H_PER_SIGMA * sigma, 1))))
+
+
+def select_denoise_method(width, height, budget_ms, costs=None):
+    """
+    按延迟预算选择去噪方法
+
+    Args:
+        width, height: 图像尺寸
+        budget_ms: 去噪阶段可用的时间（毫秒）
+        costs: 每百万像素耗时表（按质量从高到低排列的 OrderedDict），
+               默认 DENOISE_COST_MS_PER_MP
+
+    Returns:
+        预算内质量最好的方法；都超出预算时返回 None（不去噪）
+    """
+    costs = DENOISE_COST_MS_PER_MP if costs is None else costs
+    megapixels = width * height / 1e6
+    for method, ms_per_mp in costs.items():
+        if ms_per_mp * megapixels <= budget_ms:
+            return method
+    return None
+
+
+def _filter_extreme(array, size, reducer):
+    """size x size 最大 / 最小值滤波（边缘复制填充，只用于光照场小图）"""
+    r = size // 2
+    padded = np.pad(array, r, mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (size, size))
+    return reducer(windows, axis=(-2, -1))
+
+
+def _linear_weights(out_size, factor, in_size):
+    """
+    线性插值的源索引和权重（像素中心对齐，与 cv2.INTER_LINEAR 的坐标映射相同）
+
+    Returns:
+        (下侧索引, 上侧索引, 上侧权重)，权重为 float32
+    """
+    src = (np.arange(out_size, dtype=np.float64) + 0.5) / factor - 0.5
+    src = np.clip(src, 0, in_size - 1)
+    low = np.floor(src).astype(np.intp)
+    high = np.minimum(low + 1, in_size - 1)
+    return low, high, (src - low).astype(np.float32)
+
+
+def _run_lengths(mask):
+    """
+    每行中连续 True 段的长度（不含接触左右边缘的段，它们可能被截断）
+
+    Args:
+        mask: 2 维 bool 数组
+
+    Returns:
+        长度数组（int）
+    """
+    h, w = mask.shape
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    # np.nonzero 按行优先顺序返回，每行的起点和终点一一对应
+    start = np.nonzero(edges == 1)[1]
+    end = np.nonzero(edges == -1)[1]
+    keep = (start > 0) & (end < w)
+    return (end - start)[keep]
+
+
+def _text_scale_tiles(image, max_pixels):
+    """
+    文字尺度估计用的灰度窗口：在页面上等间距取 TEXT_SCALE_TILE 大小的窗口，
+    大图先按整数倍块平均缩小（字高随分辨率增长，缩小后窗口仍能包含完整的文字行）
+
+    Returns:
+        (uint8 灰度窗口列表, 缩小倍数)
+    """
+    if isinstance(image, np.ndarray):
+        h, w = image.shape[:2]
+    else:
+        w, h = image.size
+
+    # 缩小到约 4 倍采样像素的代理尺度
+    factor = max(1, int(round(np.sqrt(h * w / (4.0 * max_pixels)))))
+    tile_h = min(h // factor, TEXT_SCALE_TILE[0])
+    tile_w = min(w // factor, TEXT_SCALE_TILE[1])
+    if tile_h < 8 or tile_w < 8:
+        return [], factor
+
+    count = max(1, max_pixels // (tile_h * tile_w))
+    rows = max(1, min(h // (tile_h * factor), int(round(np.sqrt(count * h / w)))))
+    cols = max(1, min(w // (tile_w * factor), count // rows))
+    span_h, span_w = tile_h * factor, tile_w * factor
+
+    tiles = []
+    for y in np.linspace(0, h - span_h, rows).astype(int):
+        for x in np.linspace(0, w - span_w, cols).astype(int):
+            if isinstance(image, np.ndarray):
+                gray = _gray_of(image[y:y + span_h, x:x + span_w])
+            else:
+                gray = np.asarray(image.crop((int(x), int(y), int(x) + span_w,
+                                              int(y) + span_h)).convert('L'))
+            if factor > 1:
+                sums = gray.reshape(tile_h, factor, tile_w, factor).sum(axis=(1, 3),
+                                                                        dtype=np.uint32)
+                gray = (sums // (factor * factor)).astype(np.uint8)
+            tiles.append(gray)
+    return tiles, factor
+
+
+def _flatten_tile(gray, block=32):
+    """窗口内粗略去除阴影：gray * 255 / 背景，背景取 block 块最大值再做 3x3 最大值滤波"""
+    h, w = gray.shape
+    bh, bw = -(-h // block), -(-w // block)
+    padded = np.pad(gray, ((0, bh * block - h), (0, bw * block - w)), mode='edge')
+    peaks = padded.reshape(bh, block, bw, block).max(axis=(1, 3))
+    background = _filter_extreme(peaks, 3, np.max).astype(np.float32)
+    background = np.repeat(np.repeat(background, block, axis=0), block, axis=1)[:h, :w]
+    flat = gray.astype(np.float32) * (np.float32(255.0) / np.maximum(background, 1.0))
+    return np.minimum(flat, 255).astype(np.uint8)
+
+
+def estimate_text_scale(image, max_pixels=TEXT_SCALE_SAMPLE_PIXELS):
+    """
+    估计文字笔画宽度和字高（像素）
+
+    在采样窗口上去除阴影后用 Otsu 分出墨迹：笔画宽度取水平墨迹游程的中位数；
+    字高按 32 列一组，取“组内有墨迹的行”连成的段长的中位数（约为 x 高度到
+    大写字母高度）。只读取采样窗口，代价远小于一次完整的二值化。
+
+    Args:
+        image: 灰度数组、OpenCV BGR 图像或 PIL Image
+        max_pixels: 采样像素上限（缩小后）
+
+    Returns:
+        {'stroke_width', 'char_height', 'contrast'}（原图像素 / 灰度级），
+        没有找到文字时返回 None
+    """
+    tiles, factor = _text_scale_tiles(image, max_pixels)
+    strokes, heights, contrasts = [], [], []
+    for gray in tiles:
+        gray = _flatten_tile(gray)
+        level = _otsu_level(gray)
+        hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+        ink_count, total = hist[:level + 1].sum(), hist.sum()
+        if not 0.005 < ink_count / total < 0.5:
+            continue
+        levels = np.arange(256)
+        contrast = float(hist[level + 1:] @ levels[level + 1:] / (total - ink_count)
+                         - hist[:level + 1] @ levels[:level + 1] / ink_count)
+        if contrast < TEXT_SCALE_MIN_CONTRAST:
+            continue
+
+        ink = gray <= level
+        strokes.append(_run_lengths(ink))
+        usable = ink.shape[1] // 32 * 32
+        groups = ink[:, :usable].reshape(ink.shape[0], -1, 32).any(axis=2)
+        heights.append(_run_lengths(groups.T))
+        contrasts.append(contrast)
+
+    if not contrasts:
+        return None
+    strokes, heights = np.concatenate(strokes), np.concatenate(heights)
+    if strokes.size == 0 or heights.size == 0:
+        return None
+    return {'stroke_width': float(np.median(strokes)) * factor,
+            'char_height': float(np.median(heights)) * factor,
+            'contrast': float(np.median(contrasts))}
+
+
+def parameters_for_text_scale(scale, sigma, block_size=11, c_value=2):
+    """
+    按文字尺度和噪声选择 block_size / c_value
+
+    Args:
+        scale: estimate_text_scale() 的结果（None 时返回传入的 block_size / c_value）
+        sigma: 估计噪声标准差（None 时不调整 c_value）
+        block_size, c_value: 无法估计时使用的值
+
+    Returns:
+        (block_size, c_value)，block_size 为奇数
+    """
+    if scale is None:
+        return block_size, c_value
+
+    low, high = AUTO_BLOCK_RANGE
+    size = int(round(AUTO_BLOCK_PER_CHAR_HEIGHT * scale['char_height']))
+    size = min(high, max(low, size, 3 * int(round(scale['stroke_width']))))
+    block_size = size if size % 2 == 1 else size + 1
+
+    if sigma is not None:
+        c = max(AUTO_C_MIN, AUTO_C_PER_SIGMA * sigma)
+        c_value = round(float(min(c, max(AUTO_C_MIN, scale['contrast'] / 4))), 1)
+    return block_size, c_value
+
+
+class IlluminationField:
+    """
+    低分辨率背景光照场
+
+    在按 factor 整数倍缩小的灰度图上估计，normalize() 把任意区域线性插值回
+    全分辨率后除去。插值只依赖像素在原图中的坐标，分块处理与整幅处理逐位一致。
+    """
+
+    def __init__(self, background, factor, shape):
+        """
+        Args:
+            background: 小图背景亮度（float32，(ceil(H / factor), ceil(W / factor))）
+            factor: 缩小倍数
+            shape: 原图 (H, W)
+        """
+        self.background = background
+        self.factor = factor
+        self.shape = shape
+
+    @classmethod
+    def estimate(cls, image, max_size=ILLUMINATION_MAX_SIZE, kernel=ILLUMINATION_KERNEL):
+        """
+        估计光照场（按条带读取和转换灰度，不生成整幅灰度图）
+
+        Args:
+            image: PIL Image 或 OpenCV 图像
+            max_size: 小图最长边上限
+            kernel: 闭运算窗口（小图像素），应大于缩小后的文字笔画和字高
+        """
+        if isinstance(image, np.ndarray):
+            h, w = image.shape[:2]
+        else:
+            w, h = image.size
+        factor = max(1, -(-max(h, w) // max_size))
+        small_h, small_w = -(-h // factor), -(-w // factor)
+
+        # 每次处理 factor 的整数倍行，块平均（不足一块的边缘用边缘像素补齐）
+        rows_per_strip = factor * max(1, (4 * 1024 * 1024) // (w * factor))
+        small = np.empty((small_h, small_w), dtype=np.float32)
+        for y0 in range(0, h, rows_per_strip):
+            y1 = min(h, y0 + rows_per_strip)
+            if isinstance(image, np.ndarray):
+                strip = _gray_of(image[y0:y1])
+            else:
+                strip = np.asarray(image.crop((0, y0, w, y1)).convert('L'))
+            rows = -(-(y1 - y0) // factor)
+            strip = np.pad(strip, ((0, rows * factor - (y1 - y0)), (0, small_w * factor - w)),
+                           mode='edge')
+            sums = strip.reshape(rows, factor, small_w, factor).sum(axis=(1, 3), dtype=np.uint32)
+            small[y0 // factor:y0 // factor + rows] = sums / np.float32(factor * factor)
+
+        # 闭运算（先最大值后最小值）去掉比窗口窄的深色文字，再平均平滑
+        closed = _filter_extreme(_filter_extreme(small, kernel, np.max), kernel, np.min)
+        smooth = _box_sum(closed, ILLUMINATION_SMOOTH) / (ILLUMINATION_SMOOTH ** 2)
+        return cls(np.maximum(smooth, 1.0).astype(np.float32), factor, (h, w))
+
+    def upsample(self, y0, y1, x0, x1):
+        """把原图 [y0:y1, x0:x1] 区域的背景插值回全分辨率（float32）"""
+        small_h, small_w = self.background.shape
+        low, high, weight = _linear_weights(self.shape[0], self.factor, small_h)
+        top = self.background[low[y0:y1]]
+        rows = top + (self.background[high[y0:y1]] - top) * weight[y0:y1, None]
+
+        low, high, weight = _linear_weights(self.shape[1], self.factor, small_w)
+        left = rows[:, low[x0:x1]]
+        return left + (rows[:, high[x0:x1]] - left) * weight[None, x0:x1]
+
+    def normalize(self, gray, origin=(0, 0)):
+        """
+        除去光照：gray * 255 / 背景（截断到 255）
+
+        Args:
+            gray: uint8 灰度图（原图中从 origin 开始的区域）
+            origin: 区域左上角在原图中的坐标 (y, x)
+
+        Returns:
+            uint8 灰度图
+        """
+        y0, x0 = origin
+        h, w = gray.shape
+        scale = np.float32(255.0) / self.upsample(y0, y0 + h, x0, x0 + w)
+        normalized = gray.astype(np.float32) * scale
+        np.minimum(normalized, 255, out=normalized)
+        return normalized.astype(np.uint8)
+
+
+class PackedBitmap:
+    """
+    1 位打包的二值图像
+
+    data 为 np.packbits(binary > 0, axis=1) 的结果（每行单独补齐到整字节，
+    高位在前，1 表示白色），与 PIL '1' 模式的原始数据布局一致。
+    """
+
+    def __init__(self, data, shape):
+        """
+        Args:
+            data: 打包数据 (H, ceil(W / 8))，uint8
+            shape: 原图尺寸 (H, W)
+        """
+        self.data = data
+        self.shape = tuple(shape)
+
+    @classmethod
+    def from_binary(cls, binary):
+        """由 0/255 灰度二值图打包"""
+        binary = np.asarray(binary)
+        # np.packbits 把非零元素作为 1：0/255 的 uint8 直接打包，不生成中间的 bool 数组
+        bits = binary if binary.dtype in (np.uint8, np.bool_) else binary > 0
+        return cls(np.packbits(bits, axis=1), binary.shape)
+
+    @property
+    def size(self):
+        """(宽, 高)，与 PIL Image.size 一致"""
+        return self.shape[1], self.shape[0]
+
+    def unpack(self, row_step=1):
+        """
+        解包为 0/255 的 uint8 灰度图
+
+        Args:
+            row_step: 行采样间隔（用于缩略图，只解包需要的行）
+
+        Returns:
+            (ceil(H / row_step), W) 的 uint8 数组
+        """
+        bits = np.unpackbits(self.data[::row_step], axis=1, count=self.shape[1])
+        return bits * np.uint8(255)
+
+    def to_pil(self):
+        """转换为 PIL '1' 模式图像（直接复用打包数据，无需解包）"""
+        from PIL import Image
+        return Image.frombytes('1', self.size, self.data.tobytes())
+
+
+def _gray_of(image):
+    """PIL Image 或 OpenCV 图像 -> uint8 灰度数组（3 通道数组 OpenCV 后端为 BGR，否则为 RGB）"""
+    if isinstance(image, np.ndarray):
+        if image.ndim == 2:
+            return image
+        if USE_OPENCV:
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        from PIL import Image
+        image = Image.fromarray(np.ascontiguousarray(image))
+    return np.asarray(image.convert('L'))
+
+
+def _content_digest(image):
+    """
+    计算输入图像的内容哈希（包含尺寸、类型和像素数据）
+
+    Args:
+        image: ndarray（含 np.memmap）或 PIL Image
+
+    Returns:
+        十六进制哈希字符串
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(image, np.ndarray):
+        array = np.ascontiguousarray(image)
+        digest.update(f'{array.shape}{array.dtype.str}'.encode())
+        digest.update(array.data)
+    else:
+        digest.update(f'{image.mode}{image.size}'.encode())
+        digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _result_nbytes(result):
+    """处理结果占用的字节数（近似）"""
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, PackedBitmap):
+        return result.data.nbytes
+    return result.size[0] * result.size[1] * len(result.getbands())
+
+
+class ResultCache:
+    """
+    二值化结果 LRU 缓存
+
+    键为输入内容哈希 + 处理参数。内存部分按字节数限制大小，可选的磁盘
+    目录可在多次运行、多个进程之间共享。命中时返回的 ndarray 和 PackedBitmap
+    的打包数据为只读。
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, cache_dir=None):
+        """
+        Args:
+            max_bytes: 内存缓存上限（字节），0 表示只使用磁盘
+            cache_dir: 磁盘缓存目录（None 表示不使用磁盘）
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(digest, params):
+        """由内容哈希和参数元组生成缓存键"""
+        return hashlib.blake2b(f'{digest}|{params!r}'.encode(), digest_size=20).hexdigest()
+
+    def get(self, key):
+        """
+        查询缓存
+
+        Returns:
+            缓存的结果，未命中返回 None
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy_out(self._entries[key][0])
+
+        result = self._load(key) if self.cache_dir else None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, result)
+            return self._copy_out(result)
+
+    def put(self, key, result):
+        """写入缓存（内存 + 磁盘）"""
+        if isinstance(result, np.ndarray):
+            result = result.copy()
+            result.flags.writeable = False
+        elif isinstance(result, PackedBitmap):
+            data = result.data.copy()
+            data.flags.writeable = False
+            result = PackedBitmap(data, result.shape)
+        else:
+            result = result.copy()
+
+        with self._lock:
+            self._store(key, result)
+        if self.cache_dir:
+            self._save(key, result)
+
+    def stats(self):
+        """命中统计"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'disk_hits': self.disk_hits,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+    def clear(self):
+        """清空内存缓存（磁盘缓存保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _store(self, key, result):
+        """写入内存 LRU 并淘汰最久未使用的条目（调用方持有锁）"""
+        nbytes = _result_nbytes(result)
+        if nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (result, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    @staticmethod
+    def _copy_out(result):
+        """PIL 图像可变，命中时返回副本；数组和打包数据已是只读，PackedBitmap 只复制外壳"""
+        if isinstance(result, np.ndarray):
+            return result
+        if isinstance(result, PackedBitmap):
+            return PackedBitmap(result.data, result.shape)
+        return result.copy()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.npz')
+
+    def _save(self, key, result):
+        """保存到磁盘（先写临时文件再改名，多进程共享目录时不会读到半个文件）"""
+        if isinstance(result, np.ndarray):
+            fields = {'kind': 'array', 'data': result}
+        elif isinstance(result, PackedBitmap):
+            fields = {'kind': 'packed', 'data': result.data, 'shape': np.array(result.shape)}
+        else:
+            fields = {'kind': 'pil', 'data': np.asarray(result), 'mode': result.mode}
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **fields)
+        os.replace(tmp_path, path)
+
+    def _load(self, key):
+        """从磁盘读取，文件不存在或损坏时返回 None"""
+        try:
+            with np.load(self._path(key), allow_pickle=False) as data:
+                kind = str(data['kind'])
+                if kind == 'array':
+                    result = data['data']
+                    result.flags.writeable = False
+                    return result
+                if kind == 'packed':
+                    packed = data['data']
+                    packed.flags.writeable = False
+                    return PackedBitmap(packed, tuple(data['shape']))
+                from PIL import Image
+                return Image.fromarray(data['data'], mode=str(data['mode']))
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+class StageRecorder:
+    """
+    分阶段性能记录器
+
+    记录每个处理阶段的墙钟时间、线程 CPU 时间和（可选）峰值内存分配，
+    导出为结构化记录（字典列表 / JSON Lines），用于统计不同设备和图像尺寸的耗时。
+    可在多个线程间共用，阶段可以嵌套。
+
+    用法：
+        recorder = StageRecorder(track_memory=True)
+        processor = SimpleBinarizationProcessor(recorder=recorder)
+        processor.apply_binarization(image)
+        recorder.stop()
+        recorder.export_jsonl('stages.jsonl')
+    """
+
+    def __init__(self, track_memory=False, callback=None, **context):
+        """
+        Args:
+            track_memory: 是否用 tracemalloc 记录每个阶段的峰值分配（有额外开销；
+                          创建时开始跟踪，stop() 结束）
+            callback: 每条记录生成后调用 callback(record)
+            **context: 附加到每条记录的字段（如 device='pixel-7'）
+        """
+        self.track_memory = track_memory
+        self.callback = callback
+        self.context = context
+        self.records = []
+        self._lock = threading.Lock()
+        # 进行中的阶段（所有线程）已观察到的峰值；tracemalloc 只有一个全局峰值
+        self._open_peaks = {}
+        self._started_tracing = False
+        if track_memory:
+            self.start()
+
+    def start(self):
+        """开始内存跟踪（已在跟踪时沿用，stop() 不会结束别人开启的跟踪）"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+
+    def stop(self):
+        """结束本记录器开启的内存跟踪（之后的阶段不再记录 peak_kb）"""
+        with self._lock:
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """
+        记录一个阶段
+
+        峰值为阶段期间（含嵌套的内层阶段）已分配内存的最大值减去开始时的值；
+        多线程同时处理时包含其他线程的分配。
+
+        Args:
+            name: 阶段名称
+            **fields: 附加到本条记录的字段（如 backend、width、height）
+        """
+        peak = None
+        if self.track_memory and tracemalloc.is_tracing():
+            with self._lock:
+                # 重置全局峰值前，先把它计入所有进行中的阶段（外层阶段、其他线程）
+                current, global_peak = tracemalloc.get_traced_memory()
+                for entry in self._open_peaks.values():
+                    entry[0] = max(entry[0], global_peak)
+                tracemalloc.reset_peak()
+                base_memory = current
+                peak = [current]
+                self._open_peaks[id(peak)] = peak
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            record = dict(self.context)
+            record.update(fields)
+            record['stage'] = name
+            record['wall_ms'] = (time.perf_counter() - wall_start) * 1000
+            record['cpu_ms'] = (time.thread_time() - cpu_start) * 1000
+
+            with self._lock:
+                if peak is not None:
+                    del self._open_peaks[id(peak)]
+                    if tracemalloc.is_tracing():
+                        peak[0] = max(peak[0], tracemalloc.get_traced_memory()[1])
+                    record['peak_kb'] = max(0, peak[0] - base_memory) / 1024
+                self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def summary(self):
+        """按阶段汇总：{阶段: {'count', 'wall_ms', 'cpu_ms'}}（时间为总和）"""
+        totals = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            entry = totals.setdefault(record['stage'], {'count': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0})
+            entry['count'] += 1
+            entry['wall_ms'] += record['wall_ms']
+            entry['cpu_ms'] += record['cpu_ms']
+        return totals
+
+    def export_jsonl(self, filepath):
+        """追加写入 JSON Lines 文件（每行一条记录），返回写入的记录数"""
+        with self._lock:
+            records = list(self.records)
+        with open(filepath, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return len(records)
+
+    def clear(self):
+        """清空记录"""
+        with self._lock:
+            self.records.clear()
+
+
+class PagePlan:
+    """
+    整页处理决定（SimpleBinarizationProcessor.plan_page 的结果）
+
+    去噪 / 参数决定、光照场和内容哈希只依赖整幅图像，同一页面的多个区域
+    （缩放查看器的各块）传入同一个 PagePlan，不再逐块重新估计。
+    """
+
+    def __init__(self, settings, plan, illumination, digest):
+        """
+        Args:
+            settings: 计算时处理器的设置（设置变化后不能再使用）
+            plan: _plan_denoise / _plan_parameters 的处理决定
+            illumination: IlluminationField（未启用光照归一化时为 None）
+            digest: 整幅图像的内容哈希（未启用结果缓存时为 None）
+        """
+        self.settings = settings
+        self.plan = plan
+        self.illumination = illumination
+        self.digest = digest
+
+
+class SimpleBinarizationProcessor:
+    """
+    高级动态二值化处理器
+
+    使用 one_step_document_processor.py 的二值化算法：
+    - 去噪：cv2.fastNlMeansDenoising (h=5)
+    - 二值化：cv2.adaptiveThreshold (GAUSSIAN_C, blockSize=11, C=2)
+    """
+
+    def __init__(self, block_size=11, c_value=2, denoise_h=5, cache=None, denoise_cache_size=2,
+                 recorder=None, verbose=False, threshold_method=THRESHOLD_ADAPTIVE, k=None,
+                 denoise_method=DENOISE_NLM, noise_gate=None, auto_denoise=False,
+                 normalize_illumination=False, auto_parameters=False):
+        """
+        初始化处理器
+
+        Args:
+            block_size: 自适应阈值的窗口大小（奇数，默认11）
+            c_value: 阈值常数（默认2）
+            denoise_h: 去噪强度（默认5）
+            cache: ResultCache 实例（None 表示不缓存结果）
+            denoise_cache_size: 保留的去噪灰度图数量（0 表示不缓存）；
+                                默认 2，可同时保留预览代理图和全分辨率图
+            recorder: StageRecorder 实例（None 表示不记录各阶段耗时）
+            verbose: 是否打印处理进度（默认关闭）
+            threshold_method: 阈值方法（THRESHOLD_METHODS），默认 THRESHOLD_ADAPTIVE
+            k: Niblack / Sauvola / Wolf 的 k（None 使用 THRESHOLD_DEFAULT_K）
+            denoise_method: 去噪方法（DENOISE_METHODS），默认 DENOISE_NLM
+            noise_gate: 估计噪声标准差低于此值时跳过去噪（None 表示总是去噪）
+            auto_denoise: 按每幅图像的估计噪声决定是否去噪以及 denoise_h
+                          （未设置 noise_gate 时门限为 AUTO_DENOISE_MIN_SIGMA）
+            normalize_illumination: 阈值前除去低分辨率估计的背景光照场
+                                    （大面积阴影不再依赖大的 block_size）
+            auto_parameters: 按每幅图像估计的字高和噪声选择 block_size / c_value
+                             （估计失败时使用上面设置的值）
+        """
+        self.block_size = block_size if block_size % 2 == 1 else block_size + 1
+        self.c_value = c_value
+        self.denoise_h = denoise_h
+        self.cache = cache
+        self.denoise_cache_size = denoise_cache_size
+        self._denoise_cache = OrderedDict()
+        self.recorder = recorder
+        self.verbose = verbose
+        self.set_threshold_method(threshold_method, k)
+        self.set_denoise_method(denoise_method, noise_gate)
+        self.auto_denoise = auto_denoise
+        self.normalize_illumination = normalize_illumination
+        self.auto_parameters = auto_parameters
+        self._illumination = None
+        # 临时缓冲区池（按 名称 + 尺寸 + 类型 复用，同一尺寸重复处理时不再分配大块内存）
+        self._buffers = OrderedDict()
+        # 最近一次 apply_binarization / apply_binarization_tiled 的处理决定
+        self.last_metadata = {}
+
+    def _log(self, message):
+        """verbose 时打印进度信息"""
+        if self.verbose:
+            print(message)
+
+    def _stage(self, name, backend, shape):
+        """阶段计时上下文（未设置 recorder 时不做任何事）"""
+        if self.recorder is None:
+            return nullcontext()
+        h, w = shape[:2]
+        return self.recorder.stage(name, backend=backend, width=w, height=h,
+                                   block_size=self.block_size)
+
+    def set_parameters(self, block_size, c_value, denoise_h):
+        """
+        设置处理参数
+
+        Args:
+            block_size: 自适应阈值的窗口大小（奇数）
+            c_value: 阈值常数
+            denoise_h: 去噪强度
+        """
+        self.block_size = block_size if block_size % 2 == 1 else block_size + 1
+        self.c_value = c_value
+        self.denoise_h = denoise_h
+
+    def set_threshold_method(self, method, k=None):
+        """
+        设置阈值方法
+
+        Args:
+            method: THRESHOLD_METHODS 之一
+            k: 方法参数（None 使用该方法的默认值；THRESHOLD_ADAPTIVE 不使用 k，
+               仍由 c_value 控制）
+        """
+        if method not in THRESHOLD_METHODS:
+            raise ValueError(f'Unknown threshold method: {method}')
+        self.threshold_method = method
+        self.k = THRESHOLD_DEFAULT_K.get(method) if k is None else k
+
+    def set_denoise_method(self, method, noise_gate=None):
+        """
+        设置去噪方法
+
+        Args:
+            method: DENOISE_METHODS 之一
+            noise_gate: 估计噪声标准差（灰度级）低于此值时跳过去噪，None 表示总是去噪
+        """
+        if method not in DENOISE_METHODS:
+            raise ValueError(f'Unknown denoise method: {method}')
+        self.denoise_method = method
+        self.noise_gate = noise_gate
+
+    def _plan_denoise(self, image, denoise):
+        """
+        去噪决定（噪声门限 / 自动去噪按整幅图像判断一次，分块处理时所有块相同）
+
+        Returns:
+            元数据字典：noise_sigma（未估计时为 None）、denoise、denoise_method、denoise_h
+        """
+        plan = {'noise_sigma': None, 'denoise': bool(denoise),
+                'denoise_method': self.denoise_method, 'denoise_h': self.denoise_h}
+
+        if denoise and (self.auto_denoise or self.noise_gate is not None):
+            sigma = estimate_noise_sigma(image)
+            gate = self.noise_gate if self.noise_gate is not None else AUTO_DENOISE_MIN_SIGMA
+            plan['noise_sigma'] = sigma
+            if sigma < gate:
+                self._log(f"⏭️  噪声估计 σ={sigma:.2f} < {gate}，跳过去噪")
+                plan['denoise'] = False
+            elif self.auto_denoise:
+                plan['denoise_h'] = denoise_h_for_sigma(sigma)
+                self._log(f"🔍 噪声估计 σ={sigma:.2f}，denoise_h={plan['denoise_h']}")
+
+        if not plan['denoise']:
+            plan['denoise_method'] = None
+        return plan
+
+    def _plan_parameters(self, image, plan):
+        """
+        阈值参数决定（auto_parameters 时按整幅图像估计一次）
+
+        在 plan 中加入 block_size、c_value，以及估计得到的 stroke_width、char_height
+        （未估计或没有找到文字时为 None）
+        """
+        plan.update(block_size=self.block_size, c_value=self.c_value,
+                    stroke_width=None, char_height=None)
+        if not self.auto_parameters:
+            return plan
+
+        scale = estimate_text_scale(image)
+        if scale is None:
+            self._log("⚠️  未找到文字，使用默认 block_size / c_value")
+            return plan
+
+        sigma = plan['noise_sigma']
+        if sigma is None:
+            sigma = estimate_noise_sigma(image)
+        block_size, c_value = parameters_for_text_scale(scale, sigma, self.block_size,
+                                                        self.c_value)
+        plan.update(block_size=block_size, c_value=c_value,
+                    stroke_width=scale['stroke_width'], char_height=scale['char_height'])
+        self._log(f"🔍 笔画宽度≈{scale['stroke_width']:.0f}px，字高≈{scale['char_height']:.0f}px"
+                  f" -> block_size={block_size}, C={c_value}")
+        return plan
+
+    def _page_settings(self, denoise):
+        """影响整页处理决定的设置（PagePlan 据此判断是否仍然有效）"""
+        return self._cache_params(denoise, None) + (self.auto_denoise, self.auto_parameters,
+                                                    self.noise_gate)
+
+    def plan_page(self, image, denoise=True):
+        """
+        按整幅图像计算一次处理决定，供同一页面的多次区域处理共用
+
+        Args:
+            image: PIL Image 或 OpenCV 图像（可为 np.memmap）
+            denoise: 是否去噪
+
+        Returns:
+            PagePlan（传给 apply_binarization_roi 的 page 参数）
+        """
+        plan = self._plan_parameters(image, self._plan_denoise(image, denoise))
+        illumination = None
+        if self.normalize_illumination:
+            # 光照场按整幅图像估计一次，分块处理时各块插值自己的区域
+            shape = image.shape if isinstance(image, np.ndarray) else image.size[::-1]
+            with self._stage('illumination', 'opencv' if USE_OPENCV else 'pillow', shape):
+                illumination = IlluminationField.estimate(image)
+        digest = _content_digest(image) if self.cache is not None else None
+        return PagePlan(self._page_settings(denoise), plan, illumination, digest)
+
+    def _process(self, image, denoise, output_format, compute, region=None, page=None):
+        """
+        去噪决定 + 结果缓存 + 记录 last_metadata（整幅、分块和区域处理共用）
+
+        Args:
+            compute: compute(image, denoise, output_format)，实际处理函数
+            region: 只处理的区域 (x, y, 宽, 高)（区分缓存键），None 表示整幅
+            page: 同一图像预先计算的 PagePlan，None 表示现在计算
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'Unknown output format: {output_format}')
+
+        if page is None:
+            page = self.plan_page(image, denoise)
+        elif page.settings != self._page_settings(denoise):
+            raise ValueError('Page plan was computed with different settings')
+        plan = dict(page.plan)
+
+        # 自动去噪 / 自动参数时本次使用估计得到的值（缓存键也使用实际参数）
+        saved = (self.denoise_h, self.block_size, self.c_value)
+        self.denoise_h, self.block_size, self.c_value = (plan['denoise_h'], plan['block_size'],
+                                                         plan['c_value'])
+        try:
+            self._illumination = page.illumination
+            key = self._cache_key(image, plan['denoise'], output_format, region, page.digest)
+            result = self.cache.get(key) if key is not None else None
+            from_cache = result is not None
+            if result is None:
+                result = compute(image, plan['denoise'], output_format)
+                if key is not None:
+                    self.cache.put(key, result)
+        finally:
+            self.denoise_h, self.block_size, self.c_value = saved
+            self._illumination = None
+
+        plan['from_cache'] = from_cache
+        self.last_metadata = plan
+        return result
+
+    def apply_binarization(self, image, denoise=True, output_format=OUTPUT_COLOR):
+        """
+        应用高级动态二值化处理
+
+        特点：
+        1. 消除阴影：使用局部自适应阈值
+        2. 保护文字：自适应算法保留文字细节
+        3. 保护图片：检测并保留图片区域
+
+        Args:
+            image: PIL Image 或 OpenCV 图像
+            denoise: 是否去噪
+            output_format: 输出格式，OUTPUT_COLOR（默认，3 通道）、
+                           OUTPUT_GRAY（8 位单通道）或 OUTPUT_PACKED（1 位打包）
+
+        Returns:
+            处理后的图像（与输入格式相同；OUTPUT_PACKED 时为 PackedBitmap）；
+            处理决定（噪声估计、是否去噪、denoise_h、block_size / c_value、是否命中缓存）
+            记录在 last_metadata
+        """
+        return self._process(image, denoise, output_format, self._binarize)
+
+    def _binarize(self, image, denoise, output_format, origin=(0, 0)):
+        """
+        按当前后端执行二值化（不经过结果缓存）
+
+        Args:
+            origin: image 左上角在原图中的坐标 (y, x)（分块处理时用于光照场插值）
+        """
+        if USE_OPENCV:
+            return self._apply_binarization_opencv(image, denoise, output_format, origin)
+        else:
+            return self._apply_binarization_pillow(image, denoise, output_format, origin)
+
+    def _cache_params(self, denoise, output_format):
+        """影响处理结果的全部参数（结果缓存键的一部分）"""
+        return ('opencv' if USE_OPENCV else 'pillow', self.block_size, self.c_value,
+                self.denoise_h, bool(denoise), output_format, self.threshold_method, self.k,
+                self.denoise_method, self.normalize_illumination)
+
+    def _cache_key(self, image, denoise, output_format, region=None, digest=None):
+        """结果缓存键；未启用缓存时返回 None（region 为只处理的区域，digest 为已算好的内容哈希）"""
+        if self.cache is None:
+            return None
+        params = self._cache_params(denoise, output_format)
+        if region is not None:
+            params += (tuple(region),)
+        return self.cache.make_key(digest or _content_digest(image), params)
+
+    def scaled_block_size(self, scale):
+        """
+        按缩放比例换算自适应阈值窗口大小（保持奇数且不小于 3）
+
+        Args:
+            scale: 缩放比例（小于 1 表示缩小）
+        """
+        size = int(round(self.block_size * scale))
+        if size % 2 == 0:
+            size += 1
+        return max(3, size)
+
+    def apply_binarization_preview(self, image, max_size=PREVIEW_MAX_SIZE, denoise=True,
+                                   output_format=OUTPUT_GRAY, source_size=None):
+        """
+        快速预览：在缩小的代理图上二值化
+
+        代理图最长边缩小到 max_size，block_size 按相同比例缩小，
+        使阈值窗口覆盖的页面区域与全分辨率处理一致。缩小时使用区域平均，
+        本身已经起到去噪作用，因此只有图像无需缩小时才执行去噪。
+
+        Args:
+            image: PIL Image 或 OpenCV 图像
+            max_size: 代理图最长边
+            denoise: 是否去噪（仅在图像无需缩小时生效）
+            output_format: 输出格式（同 apply_binarization）
+            source_size: image 已是缩小解码的结果时（ImageHandle.reduced），
+                         原图的 (宽, 高)；缩小比例和 block_size 按原图计算
+
+        Returns:
+            代理图尺寸的处理结果
+        """
+        if isinstance(image, np.ndarray):
+            h, w = image.shape[:2]
+        else:
+            w, h = image.size
+        source_w, source_h = source_size if source_size is not None else (w, h)
+
+        scale = min(1.0, max_size / max(source_h, source_w))
+        new_size = (max(1, int(source_w * scale)), max(1, int(source_h * scale)))
+        if scale < 1.0:
+            denoise = False
+        if new_size != (w, h):
+            if isinstance(image, np.ndarray) and USE_OPENCV:
+                image = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
+            elif isinstance(image, np.ndarray):
+                from PIL import Image
+                image = np.asarray(Image.fromarray(np.ascontiguousarray(image)).resize(
+                    new_size, Image.Resampling.BOX))
+            else:
+                from PIL import Image
+                image = image.resize(new_size, Image.Resampling.BOX)
+
+        block_size = self.block_size
+        self.block_size = self.scaled_block_size(scale)
+        try:
+            return self.apply_binarization(image, denoise, output_format=output_format)
+        finally:
+            self.block_size = block_size
+
+    def tile_halo(self, denoise=True):
+        """
+        分块处理时每个块需要的重叠边宽（像素）
+
+        输出像素只依赖于该半径内的输入像素，因此带此边宽处理后裁掉
+        边缘，拼接结果与整幅处理逐位一致。
+
+        Args:
+            denoise: 是否去噪
+
+        Returns:
+            重叠边宽
+        """
+        halo = self.block_size // 2
+        if USE_OPENCV:
+            if denoise and self.denoise_method in (DENOISE_NLM, DENOISE_HYBRID):
+                # 去噪像素依赖搜索窗口 + 模板窗口范围内的像素
+                halo += NLM_SEARCH_WINDOW // 2 + NLM_TEMPLATE_WINDOW // 2
+            elif denoise and self.denoise_method == DENOISE_BILATERAL:
+                halo += BILATERAL_DIAMETER // 2
+            elif denoise:
+                halo += 1
+        else:
+            # 中值滤波 3x3 + 最小/最大值滤波各 3x3
+            halo += 2
+            if denoise:
+                halo += 1
+        return halo
+
+    def apply_binarization_tiled(self, image, denoise=True, tile_size=DEFAULT_TILE_SIZE,
+                                 output_format=OUTPUT_COLOR):
+        """
+        分块二值化（超大扫描件，内存由块大小决定）
+
+        每个块连同 tile_halo() 宽的重叠边一起处理，再裁掉重叠边拼接，
+        结果与 apply_binarization 整幅处理逐位一致。
+
+        Args:
+            image: PIL Image 或 OpenCV 图像（可为 np.memmap）
+            denoise: 是否去噪
+            tile_size: 块大小，整数（正方形块）或 (高, 宽)；
+                       宽度不小于图像宽度时即为按条带处理
+            output_format: 输出格式（同 apply_binarization）
+
+        Returns:
+            处理后的图像（与 apply_binarization 格式相同）
+        """
+        # 分块结果与整幅结果逐位一致，与 apply_binarization 共用缓存键
+        def compute(image, denoise, output_format):
+            return self._binarize_tiled(image, denoise, tile_size, output_format)
+
+        return self._process(image, denoise, output_format, compute)
+
+    def _buffer(self, name, shape, dtype=np.uint8):
+        """
+        临时缓冲区池：按 名称 + 尺寸 + 类型 复用
+
+        每个名称保留最近使用的 BUFFER_POOL_SHAPES 种尺寸。缓冲区属于处理器，
+        下次处理时会被覆盖，不能作为结果返回；处理器同一时间只能在一个线程中使用。
+        """
+        key = (name, tuple(shape), np.dtype(dtype))
+        buffer = self._buffers.get(key)
+        if buffer is not None:
+            self._buffers.move_to_end(key)
+            return buffer
+        same_name = [other for other in self._buffers if other[0] == name]
+        for other in same_name[:max(0, len(same_name) - BUFFER_POOL_SHAPES + 1)]:
+            del self._buffers[other]
+        buffer = np.empty(shape, dtype=dtype)
+        self._buffers[key] = buffer
+        return buffer
+
+    def apply_binarization_batch(self, frames, denoise=True, output_format=OUTPUT_GRAY, out=None):
+        """
+        一次处理一组尺寸相同的帧（多相机采集等）
+
+        去噪 / 参数决定按第一帧估计一次，整组共用；不经过结果缓存和去噪缓存。
+        Pillow 后端的局部窗口和与比较在整组帧上向量化计算（按 BATCH_CHUNK_PIXELS
+        分段），OpenCV 后端逐帧写入预先分配的缓冲区。临时缓冲区在各次调用之间复用。
+        每帧结果与 apply_binarization 逐位一致。
+
+        Args:
+            frames: (N, H, W) 或 (N, H, W, C) 数组，或尺寸相同的图像列表
+                    （OpenCV 后端彩色为 BGR，Pillow 后端为 RGB）
+            denoise: 是否去噪
+            output_format: OUTPUT_GRAY（默认）、OUTPUT_COLOR 或 OUTPUT_PACKED
+            out: 结果写入的数组（OUTPUT_GRAY 为 (N, H, W)，OUTPUT_COLOR 为 (N, H, W, 3)
+                 的 uint8），None 时新分配；连续处理多组时传入同一数组可避免分配
+
+        Returns:
+            OUTPUT_GRAY / OUTPUT_COLOR 为堆叠的 uint8 数组，
+            OUTPUT_PACKED 为 PackedBitmap 列表（共用一块打包数据）
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'Unknown output format: {output_format}')
+        if len(frames) == 0:
+            raise ValueError('Empty batch')
+
+        first = frames[0]
+        h, w = first.shape[:2] if isinstance(first, np.ndarray) else first.size[::-1]
+        for frame in frames:
+            size = frame.shape[:2] if isinstance(frame, np.ndarray) else frame.size[::-1]
+            if tuple(size) != (h, w):
+                raise ValueError(f'Frame size {size[1]}x{size[0]} differs from {w}x{h}')
+        n = len(frames)
+
+        plan = self._plan_parameters(first, self._plan_denoise(first, denoise))
+        saved = (self.denoise_h, self.block_size, self.c_value)
+        self.denoise_h, self.block_size, self.c_value = (plan['denoise_h'], plan['block_size'],
+                                                         plan['c_value'])
+        try:
+            binary = self._buffer('batch_binary', (n, h, w))
+            backend = 'opencv' if USE_OPENCV else 'pillow'
+            with self._stage('batch', backend, (n * h, w)):
+                if USE_OPENCV:
+                    self._binarize_batch_opencv(frames, plan['denoise'], binary)
+                else:
+                    chunk = max(1, BATCH_CHUNK_PIXELS // (h * w))
+                    for start in range(0, n, chunk):
+                        stop = min(n, start + chunk)
+                        self._binarize_batch_pillow(frames[start:stop], plan['denoise'],
+                                                    binary[start:stop])
+        finally:
+            self.denoise_h, self.block_size, self.c_value = saved
+
+        plan.update(from_cache=False, frames=n)
+        self.last_metadata = plan
+
+        if output_format == OUTPUT_PACKED:
+            data = np.packbits(binary, axis=2)
+            return [PackedBitmap(data[i], (h, w)) for i in range(n)]
+        if output_format == OUTPUT_COLOR:
+            if out is None:
+                out = np.empty((n, h, w, 3), dtype=np.uint8)
+            out[...] = binary[..., None]
+            return out
+        if out is None:
+            return binary.copy()
+        out[...] = binary
+        return out
+
+    def _batch_gray(self, frames, name):
+        """一组帧 -> (N, H, W) uint8 灰度（已是灰度数组时直接使用）"""
+        from PIL import Image
+
+        if isinstance(frames, np.ndarray) and frames.ndim == 3 and frames.dtype == np.uint8:
+            return frames
+        first = frames[0]
+        h, w = first.shape[:2] if isinstance(first, np.ndarray) else first.size[::-1]
+        gray = self._buffer(name, (len(frames), h, w))
+        if isinstance(frames, np.ndarray) and frames.ndim == 4 and not USE_OPENCV:
+            # 与 PIL convert('L') 相同的整数公式（ITU-R 601-2），整组一次计算
+            luma = self._buffer(name + '_luma', gray.shape, np.uint32)
+            channel = self._buffer(name + '_channel', gray.shape, np.uint32)
+            np.multiply(frames[..., 0], 19595, out=luma, dtype=np.uint32)
+            for index, weight in ((1, 38470), (2, 7471)):
+                np.multiply(frames[..., index], weight, out=channel, dtype=np.uint32)
+                np.add(luma, channel, out=luma)
+            np.add(luma, 0x8000, out=luma)
+            np.right_shift(luma, 16, out=luma)
+            np.copyto(gray, luma, casting='unsafe')
+            return gray
+        for i, frame in enumerate(frames):
+            if not isinstance(frame, np.ndarray):
+                gray[i] = np.asarray(frame.convert('L'))
+            elif frame.ndim == 2:
+                gray[i] = frame
+            elif USE_OPENCV:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray[i])
+            else:
+                gray[i] = np.asarray(Image.fromarray(frame).convert('L'))
+        return gray
+
+    def _median3_stack(self, gray, prefix):
+        """3x3 中值滤波 (N, H, W)，结果在缓冲区 <prefix>_denoised 中"""
+        n, h, w = gray.shape
+        return _median3_into(gray, self._buffer(prefix + '_denoised', gray.shape),
+                             self._buffer(prefix + '_median_rows', (n, h + 2, w)),
+                             self._buffer(prefix + '_median_lo', gray.shape),
+                             self._buffer(prefix + '_median_mid', gray.shape),
+                             self._buffer(prefix + '_median_hi', gray.shape))
+
+    def _threshold_stack(self, gray, prefix):
+        """
+        Pillow 后端的阈值 (N, H, W) -> bool 掩码（True 为背景，在缓冲区中计算）
+
+        自适应阈值：像素 > 局部均值 - C（两边同乘窗口面积）。积分图对整数像素是精确的，
+        结果与位置无关，分块处理可逐位复现。
+        """
+        n, h, w = gray.shape
+        mask = self._buffer(prefix + '_mask', gray.shape, np.bool_)
+        if self.threshold_method != THRESHOLD_ADAPTIVE:
+            for i in range(n):
+                np.greater(_local_statistics_threshold(gray[i], self.block_size,
+                                                       self.threshold_method, self.k),
+                           0, out=mask[i])
+            return mask
+
+        k = self.block_size
+        area = k * k
+        # 对称反射填充（同 _box_sum），两次 take 写入复用的缓冲区
+        rows = _symmetric_index(h, k // 2, k - 1 - k // 2)
+        cols = _symmetric_index(w, k // 2, k - 1 - k // 2)
+        padded_rows = self._buffer(prefix + '_padded_rows', (n, len(rows), w))
+        padded = self._buffer(prefix + '_padded', (n, len(rows), len(cols)))
+        np.take(gray, rows, axis=1, out=padded_rows, mode='clip')
+        np.take(padded_rows, cols, axis=2, out=padded, mode='clip')
+
+        # 积分图（首行首列为 0）
+        integral = self._buffer(prefix + '_integral', (n, len(rows) + 1, len(cols) + 1),
+                                np.float64)
+        integral[:, 0, :] = 0
+        integral[:, :, 0] = 0
+        # 先转换为 float64 再原地累加（带类型转换的 cumsum 会分配整幅临时数组）
+        np.copyto(integral[:, 1:, 1:], padded)
+        np.cumsum(integral[:, 1:, 1:], axis=1, out=integral[:, 1:, 1:])
+        np.cumsum(integral[:, 1:, 1:], axis=2, out=integral[:, 1:, 1:])
+
+        # 窗口和 - C * 面积，与像素 * 面积比较
+        window = self._buffer(prefix + '_window', (n, h, w), np.float64)
+        np.subtract(integral[:, k:k + h, k:k + w], integral[:, :h, k:k + w], out=window)
+        np.subtract(window, integral[:, k:k + h, :w], out=window)
+        np.add(window, integral[:, :h, :w], out=window)
+        np.subtract(window, self.c_value * area, out=window)
+        scaled = integral[:, :h, :w]  # 积分图已用完，复用其空间
+        np.multiply(gray, area, out=scaled, dtype=np.float64)
+        return np.greater(scaled, window, out=mask)
+
+    def _postprocess_stack(self, mask, binary, prefix):
+        """后处理：3x3 最小值再最大值滤波（二值图上即逻辑与 / 或），写入 0/255 的 binary"""
+        scratch = self._buffer(prefix + '_mask_scratch', mask.shape, np.bool_)
+        _extreme3_into(mask, mask, scratch, np.logical_and)
+        _extreme3_into(mask, mask, scratch, np.logical_or)
+        return np.multiply(mask, np.uint8(255), out=binary)
+
+    def _binarize_batch_opencv(self, frames, denoise, binary):
+        """OpenCV 后端：逐帧处理，结果写入 binary (N, H, W)"""
+        gray = self._batch_gray(frames, 'batch_gray')
+        denoised = self._buffer('batch_denoised', gray.shape[1:]) if denoise else None
+        for i in range(len(gray)):
+            frame = gray[i]
+            # 光照场与 apply_binarization 一样在去噪前的图像上估计
+            field = IlluminationField.estimate(frame) if self.normalize_illumination else None
+            if denoise:
+                frame = self._denoise_filter(frame, dst=denoised)
+            if field is not None:
+                frame = field.normalize(frame)
+            if self.threshold_method == THRESHOLD_ADAPTIVE:
+                cv2.adaptiveThreshold(frame, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                      cv2.THRESH_BINARY, self.block_size, self.c_value,
+                                      dst=binary[i])
+            else:
+                binary[i] = _local_statistics_threshold(frame, self.block_size,
+                                                        self.threshold_method, self.k)
+
+    def _binarize_batch_pillow(self, frames, denoise, binary):
+        """
+        Pillow 后端：中值滤波、窗口和、比较和 3x3 形态学在整组上向量化（光照归一化逐帧）
+
+        与 _apply_binarization_pillow 使用相同的函数，每帧结果逐位一致。
+        """
+        gray = self._batch_gray(frames, 'batch_gray')
+        # 光照场与 apply_binarization 一样在去噪前的图像上估计
+        fields = ([IlluminationField.estimate(frame) for frame in gray]
+                  if self.normalize_illumination else None)
+        if denoise:
+            gray = self._median3_stack(gray, 'batch')
+        if fields is not None:
+            if gray is frames:
+                # 不修改调用方的数组
+                gray = self._buffer('batch_gray', gray.shape)
+                gray[...] = frames
+            for i, field in enumerate(fields):
+                gray[i] = field.normalize(gray[i])
+
+        mask = self._threshold_stack(gray, 'batch')
+        self._postprocess_stack(mask, binary, 'batch')
+
+    def apply_binarization_roi(self, image, rect, denoise=True, output_format=OUTPUT_COLOR,
+                               page=None):
+        """
+        只二值化指定区域（表单字段、界面上可见的区域）
+
+        区域连同 tile_halo() 宽的重叠边一起处理后裁掉重叠边，结果与整幅处理后
+        裁剪同一区域逐位一致。去噪 / 参数决定（auto_denoise、auto_parameters）、
+        光照场和缓存键的内容哈希按整幅图像计算；同一页面处理多个区域时先调用
+        plan_page() 并传入 page，耗时才只与区域大小有关。
+
+        Args:
+            image: PIL Image 或 OpenCV 图像（可为 np.memmap）
+            rect: (x, y, 宽, 高)，超出图像的部分被截掉
+            denoise: 是否去噪
+            output_format: 输出格式（同 apply_binarization）
+            page: 同一图像、同一设置下 plan_page(image, denoise) 的结果，None 时现在计算
+
+        Returns:
+            区域大小的处理结果（与 apply_binarization 格式相同）
+        """
+        width, height = image.size if not isinstance(image, np.ndarray) else image.shape[1::-1]
+        x, y, w, h = (int(v) for v in rect)
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(width, x + w), min(height, y + h)
+        if x1 <= x0 or y1 <= y0:
+            raise ValueError(f'Region {tuple(rect)} is outside the {width}x{height} image')
+        region = (x0, y0, x1 - x0, y1 - y0)
+
+        def compute(image, denoise, output_format):
+            return self._binarize_region(image, region, denoise, output_format)
+
+        return self._process(image, denoise, output_format, compute, region=region, page=page)
+
+    def _binarize_region(self, image, region, denoise, output_format):
+        """处理区域及其重叠边并裁剪（不经过结果缓存）"""
+        x, y, w, h = region
+        if self.threshold_method in (THRESHOLD_WOLF, THRESHOLD_GLOBAL) or (
+                USE_OPENCV and denoise and self.denoise_method == DENOISE_HYBRID):
+            # 同 _binarize_tiled：依赖整幅统计量的方法只能整幅处理后裁剪
+            hy0, hx0 = 0, 0
+            tile = self._binarize(image, denoise, OUTPUT_GRAY)
+        else:
+            width, height = (image.size if not isinstance(image, np.ndarray)
+                             else image.shape[1::-1])
+            halo = self.tile_halo(denoise)
+            hy0, hy1 = max(0, y - halo), min(height, y + h + halo)
+            hx0, hx1 = max(0, x - halo), min(width, x + w + halo)
+            crop = (image[hy0:hy1, hx0:hx1] if isinstance(image, np.ndarray)
+                    else image.crop((hx0, hy0, hx1, hy1)))
+            tile = self._binarize(crop, denoise, OUTPUT_GRAY, origin=(hy0, hx0))
+
+        if isinstance(tile, np.ndarray):
+            gray = np.ascontiguousarray(tile[y - hy0:y - hy0 + h, x - hx0:x - hx0 + w])
+            if output_format == OUTPUT_PACKED:
+                return PackedBitmap.from_binary(gray)
+            if output_format == OUTPUT_COLOR:
+                return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+            return gray
+
+        gray = tile.crop((x - hx0, y - hy0, x - hx0 + w, y - hy0 + h))
+        if output_format == OUTPUT_PACKED:
+            return PackedBitmap.from_binary(np.asarray(gray))
+        if output_format == OUTPUT_COLOR:
+            return gray.convert('RGB')
+        return gray
+
+    def _binarize_tiled(self, image, denoise, tile_size, output_format):
+        """分块处理并拼接为目标输出格式（不经过结果缓存）"""
+        if self.threshold_method in (THRESHOLD_WOLF, THRESHOLD_GLOBAL) or (
+                USE_OPENCV and denoise and self.denoise_method == DENOISE_HYBRID):
+            # Wolf / 全局 Otsu 依赖整幅图像的统计量，hybrid 去噪的缩放依赖块的
+            # 奇偶对齐，分块无法逐位复现，整幅处理
+            return self._binarize(image, denoise, output_format)
+
+        tile_h, tile_w = (tile_size, tile_size) if isinstance(tile_size, int) else tile_size
+        if output_format == OUTPUT_PACKED:
+            # 块宽取 8 的倍数，保证每块在打包数据中按整字节对齐
+            tile_w = max(8, tile_w // 8 * 8)
+
+        if USE_OPENCV and not isinstance(image, np.ndarray):
+            image = cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+
+        # 每块只输出单通道，最后写入目标格式
+        tiles = self._iter_binarized_tiles(image, denoise, (tile_h, tile_w))
+
+        if output_format == OUTPUT_PACKED:
+            w, h = image.size if not isinstance(image, np.ndarray) else image.shape[1::-1]
+            data = np.empty((h, (w + 7) // 8), dtype=np.uint8)
+            for (y0, y1, x0, x1), tile in tiles:
+                packed = np.packbits(np.asarray(tile) > 0, axis=1)
+                data[y0:y1, x0 // 8:x0 // 8 + packed.shape[1]] = packed
+            return PackedBitmap(data, (h, w))
+
+        if USE_OPENCV:
+            h, w = image.shape[:2]
+            shape = (h, w, 3) if output_format == OUTPUT_COLOR else (h, w)
+            result = np.empty(shape, dtype=np.uint8)
+            for (y0, y1, x0, x1), tile in tiles:
+                if output_format == OUTPUT_COLOR:
+                    result[y0:y1, x0:x1] = tile[:, :, None]
+                else:
+                    result[y0:y1, x0:x1] = tile
+            return result
+
+        from PIL import Image
+        size = image.shape[1::-1] if isinstance(image, np.ndarray) else image.size
+        result = Image.new('RGB' if output_format == OUTPUT_COLOR else 'L', size)
+        for (y0, y1, x0, x1), tile in tiles:
+            result.paste(tile, (x0, y0))
+        return result
+
+    def _iter_binarized_tiles(self, image, denoise, tile_size):
+        """
+        逐块处理并产出单通道结果
+
+        Yields:
+            ((y0, y1, x0, x1), 块结果)，坐标为块在原图中的范围（不含重叠边）
+        """
+        if isinstance(tile_size, int):
+            tile_h = tile_w = tile_size
+        else:
+            tile_h, tile_w = tile_size
+
+        if isinstance(image, np.ndarray):
+            h, w = image.shape[:2]
+        else:
+            w, h = image.size
+
+        halo = self.tile_halo(denoise)
+
+        for y0 in range(0, h, tile_h):
+            y1 = min(y0 + tile_h, h)
+            for x0 in range(0, w, tile_w):
+                x1 = min(x0 + tile_w, w)
+
+                # 带重叠边的范围（在图像边界处截断，与整幅处理的边界方式一致）
+                hy0, hy1 = max(0, y0 - halo), min(h, y1 + halo)
+                hx0, hx1 = max(0, x0 - halo), min(w, x1 + halo)
+
+                if isinstance(image, np.ndarray) and USE_OPENCV:
+                    tile = self._binarize(image[hy0:hy1, hx0:hx1], denoise, OUTPUT_GRAY,
+                                          origin=(hy0, hx0))
+                    yield (y0, y1, x0, x1), tile[y0 - hy0:y1 - hy0, x0 - hx0:x1 - hx0]
+                else:
+                    region = (image[hy0:hy1, hx0:hx1] if isinstance(image, np.ndarray)
+                              else image.crop((hx0, hy0, hx1, hy1)))
+                    tile = self._binarize(region, denoise, OUTPUT_GRAY, origin=(hy0, hx0))
+                    core = tile.crop((x0 - hx0, y0 - hy0, x1 - hx0, y1 - hy0))
+                    yield (y0, y1, x0, x1), core
+
+    def _apply_binarization_opencv(self, cv_image, denoise=True, output_format=OUTPUT_COLOR,
+                                   origin=(0, 0)):
+        """
+        使用 OpenCV 进行二值化（one_step_document_processor.py 算法）
+
+        算法：
+        1. 去噪：cv2.fastNlMeansDenoising (h=5, templateWindowSize=7, searchWindowSize=21)
+        2. 二值化：cv2.adaptiveThreshold (GAUSSIAN_C, blockSize=11, C=2)
+
+        灰度、去噪和（非灰度输出时的）二值中间结果通过 dst= 写入处理器的缓冲区池，
+        同一尺寸重复处理时只分配返回的结果。
+        """
+        shape = cv_image.shape if isinstance(cv_image, np.ndarray) else cv_image.size[::-1]
+
+        with self._stage('gray', 'opencv', shape):
+            # 如果是 PIL Image，转换为 OpenCV 格式
+            if not isinstance(cv_image, np.ndarray):
+                cv_image = np.array(cv_image)
+                if len(cv_image.shape) == 3:
+                    cv_image = cv2.cvtColor(cv_image, cv2.COLOR_RGB2BGR)
+
+            # 转换为灰度图（写入缓冲区，不修改输入）
+            gray = self._buffer('gray', cv_image.shape[:2])
+            if len(cv_image.shape) == 3:
+                cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY, dst=gray)
+            else:
+                np.copyto(gray, cv_image)
+
+        h, w = gray.shape
+        self._log(f"📐 图像尺寸: {w}x{h}")
+        self._log(f"⚙️  参数: block_size={self.block_size}, C={self.c_value}, denoise_h={self.denoise_h}")
+
+        # 步骤1: 轻度去噪（one_step_document_processor.py 参数）
+        if denoise:
+            self._log("🔄 步骤1: 轻度去噪...")
+            with self._stage('denoise', 'opencv', shape):
+                gray = self._denoise_opencv(gray)
+
+        # 除去背景光照（阴影）
+        if self._illumination is not None:
+            self._log("🔄 光照归一化...")
+            with self._stage('normalize', 'opencv', shape):
+                gray = self._illumination.normalize(gray, origin)
+
+        # 步骤2: 自适应二值化（one_step_document_processor.py 算法）
+        with self._stage('threshold', 'opencv', shape):
+            if self.threshold_method == THRESHOLD_ADAPTIVE:
+                self._log("🔄 步骤2: 自适应二值化（GAUSSIAN_C）...")
+                # 灰度输出直接返回 binary（新分配），其他格式只是中间结果，写入缓冲区
+                binary = (None if output_format == OUTPUT_GRAY
+                          else self._buffer('binary', gray.shape))
+                binary = cv2.adaptiveThreshold(
+                    gray, 255,
+                    cv2.ADAPTIVE_THRESH_GAUSSIAN_C,  # 使用高斯加权
+                    cv2.THRESH_BINARY,
+                    blockSize=self.block_size,       # 窗口大小：11
+                    C=self.c_value,                  # 阈值常数：2
+                    dst=binary
+                )
+            else:
+                self._log(f"🔄 步骤2: 局部阈值（{self.threshold_method}, k={self.k}）...")
+                binary = _local_statistics_threshold(gray, self.block_size,
+                                                     self.threshold_method, self.k)
+
+        with self._stage('output', 'opencv', shape):
+            if output_format == OUTPUT_COLOR:
+                # 转换回 BGR（兼容旧的 3 通道输出）
+                result = cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
+            elif output_format == OUTPUT_PACKED:
+                result = PackedBitmap.from_binary(binary)
+            else:
+                result = binary
+
+        self._log("✅ 二值化完成！")
+
+        return result
+
+    def _denoise_opencv(self, gray):
+        """
+        按 denoise_method 去噪（结果按 灰度内容 + denoise_h + 方法缓存）
+
+        去噪只依赖方法和 denoise_h，只调整 block_size / C 时直接复用上次的
+        去噪结果，只需重新计算自适应阈值。缓存已满时被淘汰的同尺寸结果的内存
+        直接用于新的去噪结果；不缓存时写入缓冲区池。
+        """
+        if self.denoise_cache_size <= 0:
+            return self._denoise_filter(gray, dst=self._buffer('denoised', gray.shape))
+
+        key = (_content_digest(gray), self.denoise_h, self.denoise_method)
+        cached = self._denoise_cache.get(key)
+        if cached is not None:
+            self._denoise_cache.move_to_end(key)
+            self._log("💾 复用缓存的去噪结果")
+            return cached
+
+        dst = None
+        while len(self._denoise_cache) >= self.denoise_cache_size:
+            _, evicted = self._denoise_cache.popitem(last=False)
+            if dst is None and evicted.shape == gray.shape:
+                evicted.flags.writeable = True
+                dst = evicted
+        denoised = self._denoise_filter(gray, dst=dst)
+
+        denoised.flags.writeable = False
+        self._denoise_cache[key] = denoised
+        return denoised
+
+    def _denoise_filter(self, gray, dst=None):
+        """
+        按 denoise_method 去噪（不经过去噪缓存）
+
+        Args:
+            dst: 结果写入的 uint8 数组（与 gray 同尺寸，None 时新分配）
+        """
+        if self.denoise_method == DENOISE_MEDIAN:
+            return cv2.medianBlur(gray, 3, dst=dst)
+        if self.denoise_method == DENOISE_BILATERAL:
+            # 颜色 sigma 随 denoise_h 增大（h=5 时为 20）
+            return cv2.bilateralFilter(gray, BILATERAL_DIAMETER,
+                                       sigmaColor=4 * self.denoise_h, sigmaSpace=3, dst=dst)
+        if self.denoise_method == DENOISE_HYBRID:
+            # 在 1/2 分辨率上做 NLM（约 1/4 的计算量），再放大回原尺寸
+            h, w = gray.shape
+            small = cv2.resize(gray, ((w + 1) // 2, (h + 1) // 2), interpolation=cv2.INTER_AREA)
+            small = cv2.fastNlMeansDenoising(small, h=self.denoise_h,
+                                             templateWindowSize=NLM_TEMPLATE_WINDOW,
+                                             searchWindowSize=NLM_SEARCH_WINDOW)
+            return cv2.resize(small, (w, h), dst=dst, interpolation=cv2.INTER_LINEAR)
+        return cv2.fastNlMeansDenoising(
+            gray,
+            dst,
+            h=self.denoise_h,           # 去噪强度：5
+            templateWindowSize=NLM_TEMPLATE_WINDOW,  # 模板窗口大小：7
+            searchWindowSize=NLM_SEARCH_WINDOW       # 搜索窗口大小：21
+        )
+
+    def _apply_binarization_pillow(self, pil_image, denoise=True, output_format=OUTPUT_COLOR,
+                                   origin=(0, 0)):
+        """
+        使用 Pillow 进行二值化（备用方案）
+
+        中值滤波、窗口和比较和形态学后处理为 NumPy 实现（与 PIL 的 MedianFilter /
+        MinFilter / MaxFilter 逐位一致），中间结果写入处理器的缓冲区池，
+        同一尺寸重复处理数组输入时只分配返回的结果。
+        """
+        from PIL import Image
+
+        shape = pil_image.shape[:2] if isinstance(pil_image, np.ndarray) else pil_image.size[::-1]
+
+        # 转换为灰度图（2 维数组输入，如 load_grayscale_file 的结果，直接使用）
+        # 以下各步骤按 (1, H, W) 图像栈计算，与批量处理共用
+        with self._stage('gray', 'pillow', shape):
+            frames = pil_image[None] if isinstance(pil_image, np.ndarray) else [pil_image]
+            gray = self._batch_gray(frames, 'gray')
+
+        # 轻度去噪（保留细节）
+        if denoise:
+            with self._stage('denoise', 'pillow', shape):
+                gray = self._median3_stack(gray, 'pillow')
+
+        # 除去背景光照（阴影）
+        if self._illumination is not None:
+            with self._stage('normalize', 'pillow', shape):
+                gray = self._illumination.normalize(gray[0], origin)[None]
+
+        h, w = shape
+        self._log(f"📐 图像尺寸: {w}x{h}")
+        self._log(f"⚙️  参数: block_size={self.block_size}, C={self.c_value}")
+
+        # 步骤1: 计算局部窗口和（用于消除阴影）
+        # 步骤2: 自适应二值化（像素 > 局部均值 - C）
+        self._log("🔄 步骤1: 计算局部均值（消除阴影）...")
+        self._log("🔄 步骤2: 自适应二值化...")
+        with self._stage('threshold', 'pillow', shape):
+            mask = self._threshold_stack(gray, 'pillow')
+
+        # 步骤3: 后处理（轻度形态学操作，去除小噪点，保留文字）
+        # 灰度输出直接返回 binary（新分配），其他格式只是中间结果，写入缓冲区
+        self._log("🔄 步骤3: 后处理...")
+        with self._stage('postprocess', 'pillow', shape):
+            binary = (np.empty(gray.shape, dtype=np.uint8) if output_format == OUTPUT_GRAY
+                      else self._buffer('binary', gray.shape))
+            binary = self._postprocess_stack(mask, binary, 'pillow')[0]
+
+        with self._stage('output', 'pillow', shape):
+            if output_format == OUTPUT_COLOR:
+                # 转换回 RGB 模式（兼容旧的 3 通道输出）
+                result = Image.fromarray(binary).convert('RGB')
+            elif output_format == OUTPUT_PACKED:
+                result = PackedBitmap.from_binary(binary)
+            else:
+                result = Image.fromarray(binary)
+
+        self._log("✅ 二值化完成！")
+
+        return result
+
+
+def load_image_file(filepath):
+    """
+    读取图片文件（与当前处理后端格式一致）
+
+    Args:
+        filepath: 图片路径
+
+    Returns:
+        OpenCV 可用时返回 BGR ndarray，否则返回 RGB 模式的 PIL Image；
+        无法读取时返回 None
+    """
+    if USE_OPENCV:
+        return cv2.imread(str(filepath))
 
-class SimpleBinarizationProcessor:
+    from PIL import Image
+    image = Image.open(filepath)
+    if image is None:
+        return None
+    return image.convert('RGB')
+
+
+def _raw_gray_strips(image):
     """
-    高级动态二值化处理器
+    未压缩 8 位灰度数据在文件中的位置（PGM P5 或未压缩 TIFF，只解析文件头）
 
-    使用 one_step_document_processor.py 的二值化算法：
-    - 去噪：cv2.fastNlMeansDenoising (h=5)
-    - 二值化：cv2.adaptiveThreshold (GAUSSIAN_C, blockSize=11, C=2)
+    Returns:
+        [(偏移, 起始行, 行数), ...]，每段为整行；不是未压缩 8 位灰度时返回 None
+    """
+    if image.mode != 'L' or not image.tile:
+        return None
+    w = image.size[0]
+    strips = []
+    for tile in image.tile:
+        codec, (x0, y0, x1, y1), offset, args = tile[:4]
+        # 压缩格式（JPEG 等）的 args 结构各不相同，先按编码器排除
+        if codec != 'raw':
+            return None
+        # PPM 的 args 为 rawmode；TIFF 为 (rawmode, stride, orientation)，stride 0 表示紧密排列
+        if isinstance(args, str):
+            args = (args,)
+        rawmode, stride, orientation = (tuple(args) + (None, 0, 1)[len(args):])[:3]
+        if rawmode != 'L' or stride not in (0, w) or orientation != 1 or (x0, x1) != (0, w):
+            return None
+        strips.append((offset, y0, y1 - y0))
+    return sorted(strips, key=lambda strip: strip[1])
+
+
+def open_memmap_image(filepath):
     """
+    以只读内存映射打开未压缩的 8 位灰度图（PGM P5、未压缩单页 TIFF）
 
-    def __init__(self, block_size=11, c_value=2, denoise_h=5):
-        """
-        初始化处理器
+    像素数据只在访问时按页从文件读取，不占用进程的私有内存；
+    配合 apply_binarization_tiled 处理超大扫描件时内存占用与页面大小无关。
 
-        Args:
-            block_size: 自适应阈值的窗口大小（奇数，默认11）
-            c_value: 阈值常数（默认2）
-            denoise_h: 去噪强度（默认5）
-        """
-        self.block_size = block_size if block_size % 2 == 1 else block_size + 1
-        self.c_value = c_value
-        self.denoise_h = denoise_h
+    Returns:
+        (H, W) uint8 的 np.memmap；文件是压缩格式、彩色、多字节深度或
+        条带不连续时返回 None
+    """
+    from PIL import Image
 
-    def set_parameters(self, block_size, c_value, denoise_h):
-        """
-        设置处理参数
+    try:
+        with Image.open(filepath) as image:
+            return _memmap_frame(filepath, image)
+    except OSError:
+        return None
+
+
+def _memmap_frame(filepath, image):
+    """
+    把已打开图像的当前帧映射为数组（多页 TIFF 先 seek 到目标页）
+
+    Returns:
+        条带首尾相接的未压缩 8 位灰度帧返回 np.memmap，否则返回 None
+    """
+    strips = _raw_gray_strips(image)
+    if not strips:
+        return None
+    w, h = image.size
+    offset = strips[0][0]
+    for strip_offset, y0, rows in strips:
+        if strip_offset != offset + y0 * w:
+            return None
+    return np.memmap(filepath, dtype=np.uint8, mode='r', offset=offset, shape=(h, w))
+
+
+def open_raw_image(filepath, width, height, offset=0):
+    """
+    以只读内存映射打开无文件头的 8 位灰度原始数据（扫描仪导出的 raw 文件）
+
+    Args:
+        width, height: 图像尺寸
+        offset: 像素数据在文件中的起始字节
+    """
+    return np.memmap(filepath, dtype=np.uint8, mode='r', offset=offset, shape=(height, width))
+
+
+def load_grayscale_file(filepath):
+    """
+    读取图片文件为 8 位灰度数组（不生成整幅 3 通道图像）
+
+    依次尝试：
+    1. 未压缩 8 位灰度（PGM / TIFF）：内存映射（open_memmap_image）
+    2. 条带不连续的未压缩灰度 TIFF：逐条带读入灰度数组
+    3. 其他格式：直接解码为灰度（JPEG 只解码亮度通道，不经过 3 通道图像）
+
+    Returns:
+        (H, W) uint8 数组（可能是 np.memmap）；无法读取时返回 None
+    """
+    image = open_memmap_image(filepath)
+    if image is not None:
+        return image
+
+    from PIL import Image
+
+    try:
+        with Image.open(filepath) as pil_image:
+            strips = _raw_gray_strips(pil_image)
+            w, h = pil_image.size
+            if strips:
+                gray = np.empty((h, w), dtype=np.uint8)
+                with open(filepath, 'rb') as f:
+                    for offset, y0, rows in strips:
+                        f.seek(offset)
+                        f.readinto(memoryview(gray[y0:y0 + rows]).cast('B'))
+                return gray
+            if not USE_OPENCV:
+                if pil_image.mode.startswith('I;16'):
+                    return (np.asarray(pil_image) >> 8).astype(np.uint8)
+                # JPEG 直接解码亮度通道
+                pil_image.draft('L', pil_image.size)
+                return np.asarray(pil_image.convert('L'))
+    except OSError:
+        return None
+
+    # JPEG 直接解码亮度通道，其他格式解码后由 OpenCV 转换（16 位缩放到 8 位）
+    return cv2.imread(str(filepath), cv2.IMREAD_GRAYSCALE)
+
+
+def _open_pdf(filepath):
+    """
+    打开 PDF（可选依赖：pypdfium2 优先，其次 PyMuPDF）
+
+    Returns:
+        (渲染后端名称, 文档对象)
+    """
+    try:
+        import pypdfium2
+        return 'pdfium', pypdfium2.PdfDocument(str(filepath))
+    except ImportError:
+        pass
+    try:
+        import fitz
+        return 'fitz', fitz.open(str(filepath))
+    except ImportError:
+        raise ImportError('PDF input needs pypdfium2 or PyMuPDF (pip install pypdfium2)')
+
+
+def _pdf_page_size(backend, document, index, dpi):
+    """按 dpi 渲染时页面的像素尺寸 (宽, 高)，不渲染"""
+    if backend == 'pdfium':
+        width, height = document[index].get_size()
+    else:
+        rect = document[index].rect
+        width, height = rect.width, rect.height
+    return max(1, int(round(width * dpi / 72.0))), max(1, int(round(height * dpi / 72.0)))
+
+
+def _render_pdf_page(backend, document, index, dpi):
+    """把一页渲染为 8 位灰度数组"""
+    if backend == 'pdfium':
+        bitmap = document[index].render(scale=dpi / 72.0, grayscale=True)
+        page = bitmap.to_numpy()
+        return np.ascontiguousarray(page if page.ndim == 2 else page[:, :, 0])
+
+    import fitz
+    pixmap = document[index].get_pixmap(dpi=int(round(dpi)), colorspace=fitz.csGRAY)
+    rows = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)
+    return rows[:, :pixmap.width].copy()
+
+
+def _frame_gray(filepath, image):
+    """已打开图像的当前帧 -> 8 位灰度数组（未压缩灰度帧内存映射）"""
+    mapped = _memmap_frame(filepath, image)
+    if mapped is not None:
+        return mapped
+    if image.mode.startswith('I;16'):
+        return (np.asarray(image) >> 8).astype(np.uint8)
+    return np.asarray(image.convert('L'))
+
+
+def is_document_file(filepath):
+    """是否按多页文档处理（PDF，或多于一页的 TIFF）"""
+    suffix = Path(filepath).suffix.lower()
+    if suffix == '.pdf':
+        return True
+    return suffix in ('.tif', '.tiff') and document_page_count(filepath) > 1
+
+
+def document_page_count(filepath):
+    """
+    文档页数（只读取文件头 / 页表）
+
+    Returns:
+        PDF 和多页 TIFF 的页数，其他图片为 1，无法识别时为 0
+    """
+    if Path(filepath).suffix.lower() == '.pdf':
+        backend, document = _open_pdf(filepath)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    from PIL import Image
+    try:
+        with Image.open(filepath) as image:
+            return getattr(image, 'n_frames', 1)
+    except OSError:
+        return 0
+
+
+def load_document_page(filepath, index, dpi=PDF_RENDER_DPI):
+    """
+    读取文档的一页为 8 位灰度数组
+
+    Args:
+        index: 页码（从 0 开始）
+        dpi: PDF 渲染分辨率
+    """
+    if Path(filepath).suffix.lower() == '.pdf':
+        backend, document = _open_pdf(filepath)
+        try:
+            return _render_pdf_page(backend, document, index, dpi)
+        finally:
+            document.close()
+
+    if index == 0:
+        return load_grayscale_file(filepath)
+    from PIL import Image
+    with Image.open(filepath) as image:
+        image.seek(index)
+        return _frame_gray(filepath, image)
+
+
+def iter_document_pages(filepath, dpi=PDF_RENDER_DPI):
+    """
+    逐页延迟解码文档（PDF / 多页 TIFF / 普通图片），每次只解码一页
+
+    Yields:
+        各页的 8 位灰度数组（未压缩 TIFF 页为 np.memmap）
+    """
+    if Path(filepath).suffix.lower() == '.pdf':
+        backend, document = _open_pdf(filepath)
+        try:
+            for index in range(len(document)):
+                yield _render_pdf_page(backend, document, index, dpi)
+        finally:
+            document.close()
+        return
+
+    from PIL import Image
+    with Image.open(filepath) as image:
+        frames = getattr(image, 'n_frames', 1)
+    if frames == 1:
+        yield load_grayscale_file(filepath)
+        return
+
+    with Image.open(filepath) as image:
+        for index in range(frames):
+            image.seek(index)
+            yield _frame_gray(filepath, image)
+
+
+def binarize_pages(pages, processors, denoise=True, output_format=OUTPUT_PACKED, tile_size=None):
+    """
+    多页并行二值化，按页序产出结果
+
+    页面从 pages 按需取出（配合 iter_document_pages 延迟解码），同时在处理中
+    或等待输出的页面不超过 2 * len(processors)，内存由处理器数量决定，与总页数无关。
+    处理器不是线程安全的，每个处理器同一时间只处理一页。
+
+    Args:
+        pages: 可迭代的页面（灰度数组或其他处理器输入）
+        processors: SimpleBinarizationProcessor 列表，数量即并行线程数
+        denoise, output_format: 同 apply_binarization
+        tile_size: 不为 None 时每页分块处理（apply_binarization_tiled）
+
+    Yields:
+        各页的处理结果
+    """
+    idle = queue.Queue()
+    for processor in processors:
+        idle.put(processor)
+
+    def run(page):
+        processor = idle.get()
+        try:
+            if tile_size:
+                return processor.apply_binarization_tiled(page, denoise, tile_size, output_format)
+            return processor.apply_binarization(page, denoise, output_format)
+        finally:
+            idle.put(processor)
+
+    if len(processors) <= 1:
+        for page in pages:
+            yield run(page)
+        return
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=len(processors),
+                            thread_name_prefix='page') as executor:
+        for page in pages:
+            if len(pending) >= 2 * len(processors):
+                yield pending.popleft().result()
+            pending.append(executor.submit(run, page))
+            del page
+        while pending:
+            yield pending.popleft().result()
+
+
+def binarize_document(src, dst, processors, denoise=True, dpi=PDF_RENDER_DPI, tile_size=None,
+                      on_page=None):
+    """
+    多页文档 -> 多页 CCITT G4 TIFF（逐页解码、并行处理、按页序逐页写入）
+
+    Args:
+        src: 输入文档（PDF / 多页 TIFF / 图片）
+        dst: 输出 TIFF 路径
+        processors: SimpleBinarizationProcessor 列表（见 binarize_pages）
+        dpi: PDF 渲染分辨率
+        on_page: 每写完一页调用 on_page(已写页数)
+
+    Returns:
+        写入的页数
+    """
+    def written(results):
+        for count, result in enumerate(results, 1):
+            yield result
+            if on_page is not None:
+                on_page(count)
+
+    results = binarize_pages(iter_document_pages(src, dpi), processors, denoise,
+                             OUTPUT_PACKED, tile_size)
+    return save_multipage_file(dst, written(results))
+
+
+class ImageHandle:
+    """
+    图片文件句柄：打开时只读取文件头，像素按需解码
 
+    - reduced(): 缩小解码（预览和原图缩略图），JPEG 在 DCT 域直接缩小
+    - gray(): 全分辨率灰度图（首次调用时解码并保留，供最终全分辨率处理）
+
+    多页文档（PDF / 多页 TIFF）的句柄指向其中一页（page）。
+    """
+
+    # JPEG DCT 域缩小解码支持的倍数
+    REDUCED_FACTORS = (1, 2, 4, 8)
+
+    def __init__(self, filepath, page=0, dpi=PDF_RENDER_DPI):
+        """
         Args:
-            block_size: 自适应阈值的窗口大小（奇数）
-            c_value: 阈值常数
-            denoise_h: 去噪强度
+            filepath: 图片路径（无法识别的文件抛出 OSError，
+                      PDF 缺少渲染库时抛出 ImportError）
+            page: 多页文档的页码（从 0 开始）
+            dpi: PDF 渲染分辨率
         """
-        self.block_size = block_size if block_size % 2 == 1 else block_size + 1
-        self.c_value = c_value
-        self.denoise_h = denoise_h
-
-    def apply_binarization(self, image, denoise=True):
+        from PIL import Image
+
+        self.filepath = str(filepath)
+        self.page = page
+        self.dpi = dpi
+        if Path(self.filepath).suffix.lower() == '.pdf':
+            backend, document = _open_pdf(self.filepath)
+            try:
+                self.size = _pdf_page_size(backend, document, page, dpi)
+            finally:
+                document.close()
+            self.format = 'PDF'
+        else:
+            with Image.open(self.filepath) as image:
+                if page:
+                    image.seek(page)
+                self.size = image.size
+                self.format = image.format
+        self._gray = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, filepath, page=0):
+        """打开图片文件，无法识别时返回 None"""
+        try:
+            return cls(filepath, page)
+        except OSError:
+            return None
+
+    def reduced_factor(self, max_size):
+        """最长边不小于 max_size 的最大缩小倍数（1、2、4 或 8）"""
+        longest = max(self.size)
+        factor = 1
+        for candidate in self.REDUCED_FACTORS[1:]:
+            if longest // candidate >= max_size:
+                factor = candidate
+        return factor
+
+    def reduced(self, max_size, color=False):
         """
-        应用高级动态二值化处理
+        缩小解码
 
-        特点：
-        1. 消除阴影：使用局部自适应阈值
-        2. 保护文字：自适应算法保留文字细节
-        3. 保护图片：检测并保留图片区域
+        JPEG 在 DCT 域按 1/2、1/4、1/8 直接解码（OpenCV IMREAD_REDUCED_*，
+        PIL draft），不生成全分辨率图像；其他格式解码后缩小。
 
         Args:
-            image: PIL Image 或 OpenCV 图像
-            denoise: 是否去噪
+            max_size: 结果最长边的下限（之后再缩放到准确尺寸）
+            color: True 返回彩色图像（原图缩略图），否则返回灰度图
 
         Returns:
-            处理后的图像（与输入格式相同）
+            OpenCV 可用时为 ndarray（BGR 或单通道），否则为 PIL Image（'RGB' 或 'L'）；
+            无法解码时返回 None
         """
+        factor = self.reduced_factor(max_size)
+        if self.format == 'PDF' or self.page:
+            return self._reduced_page(factor, color)
         if USE_OPENCV:
-            return self._apply_binarization_opencv(image, denoise)
+            flags = {
+                1: (cv2.IMREAD_GRAYSCALE, cv2.IMREAD_COLOR),
+                2: (cv2.IMREAD_REDUCED_GRAYSCALE_2, cv2.IMREAD_REDUCED_COLOR_2),
+                4: (cv2.IMREAD_REDUCED_GRAYSCALE_4, cv2.IMREAD_REDUCED_COLOR_4),
+                8: (cv2.IMREAD_REDUCED_GRAYSCALE_8, cv2.IMREAD_REDUCED_COLOR_8),
+            }
+            return cv2.imread(self.filepath, flags[factor][color])
+
+        from PIL import Image
+
+        mode = 'RGB' if color else 'L'
+        w, h = self.size
+        try:
+            with Image.open(self.filepath) as image:
+                image.draft(mode, (w // factor, h // factor))
+                image = image.convert(mode)
+        except OSError:
+            return None
+        if factor > 1 and image.size == self.size:
+            # 非 JPEG：解码后块平均缩小
+            image = image.reduce(factor)
+        return image
+
+    def _reduced_page(self, factor, color):
+        """多页文档的缩小解码：PDF 按 dpi / factor 渲染，TIFF 页解码后块平均缩小"""
+        if self.format == 'PDF':
+            backend, document = _open_pdf(self.filepath)
+            try:
+                gray = _render_pdf_page(backend, document, self.page, self.dpi / factor)
+            finally:
+                document.close()
         else:
-            return self._apply_binarization_pillow(image, denoise)
+            from PIL import Image
+            try:
+                with Image.open(self.filepath) as image:
+                    image.seek(self.page)
+                    gray = _frame_gray(self.filepath, image)
+            except (OSError, EOFError):
+                return None
+            if factor > 1:
+                h, w = gray.shape[0] // factor * factor, gray.shape[1] // factor * factor
+                gray = gray[:h, :w].reshape(h // factor, factor, w // factor, factor) \
+                    .mean(axis=(1, 3)).astype(np.uint8)
 
-    def _apply_binarization_opencv(self, cv_image, denoise=True):
-        """
-        使用 OpenCV 进行二值化（one_step_document_processor.py 算法）
+        if USE_OPENCV:
+            return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR) if color else np.ascontiguousarray(gray)
+        from PIL import Image
+        image = Image.fromarray(np.ascontiguousarray(gray))
+        return image.convert('RGB') if color else image
+
+    def gray(self):
+        """全分辨率灰度图（load_grayscale_file / load_document_page，解码一次后保留）"""
+        with self._lock:
+            if self._gray is None:
+                if self.format == 'PDF' or self.page:
+                    self._gray = load_document_page(self.filepath, self.page, self.dpi)
+                else:
+                    self._gray = load_grayscale_file(self.filepath)
+            return self._gray
+
+    def release(self):
+        """释放已解码的全分辨率图像"""
+        with self._lock:
+            self._gray = None
+
+
+def _to_gray_array(image):
+    """把各种结果格式转换为单通道 uint8 数组"""
+    if isinstance(image, PackedBitmap):
+        return image.unpack()
+    if isinstance(image, np.ndarray):
+        # 二值化结果三个通道相同，直接取第一个通道
+        return image if image.ndim == 2 else image[:, :, 0]
+    return np.asarray(image.convert('L'))
+
+
+def _to_bilevel_pil(image):
+    """转换为 1 位 PIL 图像（PackedBitmap 直接复用打包数据）"""
+    if not isinstance(image, PackedBitmap):
+        image = PackedBitmap.from_binary(_to_gray_array(image) >= 128)
+    return image.to_pil()
+
+
+def _encode_jpeg(filepath, image, quality=95):
+    """JPEG（旧的默认格式，3 通道）"""
+    if isinstance(image, PackedBitmap):
+        image.to_pil().convert('L').save(filepath, 'JPEG', quality=quality)
+    elif USE_OPENCV:
+        if not cv2.imwrite(filepath, image, [cv2.IMWRITE_JPEG_QUALITY, quality]):
+            raise IOError(f'Cannot write image: {filepath}')
+    else:
+        image.save(filepath, 'JPEG', quality=quality)
+
+
+def _encode_png(filepath, image, quality=95):
+    """8 位 PNG（无损，保持输入通道数）"""
+    if isinstance(image, PackedBitmap):
+        image.to_pil().convert('L').save(filepath, 'PNG')
+    elif USE_OPENCV:
+        if not cv2.imwrite(filepath, image):
+            raise IOError(f'Cannot write image: {filepath}')
+    else:
+        image.save(filepath, 'PNG')
+
+
+def _encode_png1(filepath, image, quality=95):
+    """1 位 PNG（二值图，体积约为 8 位 PNG 的 1/4 ~ 1/8）"""
+    _to_bilevel_pil(image).save(filepath, 'PNG')
+
+
+def _encode_tiff_g4(filepath, image, quality=95):
+    """CCITT Group 4 压缩的 1 位 TIFF（文档归档标准格式）"""
+    _to_bilevel_pil(image).save(filepath, 'TIFF', compression='group4')
+
+
+# 输出编码器：名称 -> (编码函数, 扩展名)
+OUTPUT_ENCODERS = {
+    'jpeg': (_encode_jpeg, '.jpg'),
+    'png': (_encode_png, '.png'),
+    'png1': (_encode_png1, '.png'),
+    'tiff-g4': (_encode_tiff_g4, '.tif'),
+}
+
+# 只保存 1 位数据的编码器（可直接使用 OUTPUT_PACKED 结果）
+BILEVEL_ENCODERS = ('png1', 'tiff-g4')
+
+
+def encoder_for_path(filepath, bilevel=False):
+    """
+    根据扩展名选择编码器（保持旧的按扩展名保存行为）
 
-        算法：
-        1. 去噪：cv2.fastNlMeansDenoising (h=5, templateWindowSize=7, searchWindowSize=21)
-        2. 二值化：cv2.adaptiveThreshold (GAUSSIAN_C, blockSize=11, C=2)
-        """
-        # 如果是 PIL Image，转换为 OpenCV 格式
-        if not isinstance(cv_image, np.ndarray):
-            cv_image = np.array(cv_image)
-            if len(cv_image.shape) == 3:
-                cv_image = cv2.cvtColor(cv_image, cv2.COLOR_RGB2BGR)
+    Args:
+        filepath: 保存路径
+        bilevel: 数据已是 1 位（PackedBitmap）时 PNG 使用 1 位编码
+    """
+    ext = os.path.splitext(str(filepath))[1].lower()
+    if ext in ('.jpg', '.jpeg'):
+        return 'jpeg'
+    if ext in ('.tif', '.tiff'):
+        return 'tiff-g4'
+    return 'png1' if bilevel else 'png'
 
-        # 转换为灰度图
-        if len(cv_image.shape) == 3:
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = cv_image.copy()
 
-        h, w = gray.shape
-        print(f"📐 图像尺寸: {w}x{h}")
-        print(f"⚙️  参数: block_size={self.block_size}, C={self.c_value}, denoise_h={self.denoise_h}")
+def save_image_file(filepath, image, quality=95, encoder=None):
+    """
+    保存处理结果
 
-        # 步骤1: 轻度去噪（one_step_document_processor.py 参数）
-        if denoise:
-            print("🔄 步骤1: 轻度去噪...")
-            gray = cv2.fastNlMeansDenoising(
-                gray,
-                h=self.denoise_h,           # 去噪强度：5
-                templateWindowSize=7,        # 模板窗口大小
-                searchWindowSize=21          # 搜索窗口大小
-            )
+    Args:
+        filepath: 保存路径
+        image: OpenCV ndarray、PIL Image 或 PackedBitmap
+        quality: JPEG 质量
+        encoder: OUTPUT_ENCODERS 中的编码器名称；None 时由扩展名决定
+    """
+    filepath = str(filepath)
+    if encoder is None:
+        encoder = encoder_for_path(filepath, bilevel=isinstance(image, PackedBitmap))
+    if encoder not in OUTPUT_ENCODERS:
+        raise ValueError(f'Unknown encoder: {encoder}')
 
-        # 步骤2: 自适应二值化（one_step_document_processor.py 算法）
-        print("🔄 步骤2: 自适应二值化（GAUSSIAN_C）...")
-        binary = cv2.adaptiveThreshold(
-            gray, 255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,  # 使用高斯加权
-            cv2.THRESH_BINARY,
-            blockSize=self.block_size,       # 窗口大小：11
-            C=self.c_value                   # 阈值常数：2
-        )
+    encode, _ = OUTPUT_ENCODERS[encoder]
+    encode(filepath, image, quality=quality)
 
-        # 转换回 BGR（用于显示）
-        result = cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
 
-        print("✅ 二值化完成！")
+def save_multipage_file(filepath, pages):
+    """
+    逐页写入多页 CCITT G4 TIFF（每页写完即可释放，内存与页数无关）
 
-        return result
+    Args:
+        filepath: 保存路径
+        pages: 可迭代的页面（任意结果格式）
 
-    def _apply_binarization_pillow(self, pil_image, denoise=True):
-        """使用 Pillow 进行二值化（备用方案）"""
-        from PIL import Image, ImageFilter, ImageOps
+    Returns:
+        写入的页数
+    """
+    from PIL import TiffImagePlugin
 
-        # 转换为灰度图
-        gray = pil_image.convert('L')
+    count = 0
+    with TiffImagePlugin.AppendingTiffWriter(str(filepath), new=True) as tiff:
+        for page in pages:
+            _to_bilevel_pil(page).save(tiff, format='TIFF', compression='group4')
+            tiff.newFrame()
+            count += 1
+    return count
 
-        # 轻度去噪（保留细节）
-        if denoise:
-            gray = gray.filter(ImageFilter.MedianFilter(size=3))
 
-        # 转换为 numpy 数组
-        img_array = np.array(gray).astype(float)
-        h, w = img_array.shape
+class BackgroundJob:
+    """后台任务句柄（传给任务函数，用于检查取消和汇报进度）"""
 
-        print(f"📐 图像尺寸: {w}x{h}")
-        print(f"⚙️  参数: block_size={self.block_size}, offset={self.offset}")
+    def __init__(self, runner, job_id, on_progress=None):
+        self.runner = runner
+        self.job_id = job_id
+        self._on_progress = on_progress
 
-        # 步骤1: 计算局部均值（用于消除阴影）
-        print("🔄 步骤1: 计算局部均值（消除阴影）...")
-        local_mean = self._calculate_local_mean(img_array, self.block_size)
+    @property
+    def cancelled(self):
+        """已有更新的任务提交时返回 True"""
+        return not self.runner.is_current(self.job_id)
 
-        # 步骤2: 自适应二值化
-        print("🔄 步骤2: 自适应二值化...")
-        binary_array = ((img_array > local_mean - self.offset).astype(np.uint8) * 255)
+    def progress(self, value):
+        """汇报进度（通过 Clock 回到主线程，过期任务的进度被丢弃）"""
+        if self._on_progress is not None and not self.cancelled:
+            self.runner._deliver(self.job_id, self._on_progress, value)
 
-        # 步骤3: 后处理（去除噪点，保留文字）
-        print("🔄 步骤3: 后处理...")
-        result_img = Image.fromarray(binary_array, mode='L')
 
-        # 轻度形态学操作（去除小噪点）
-        result_img = result_img.filter(ImageFilter.MinFilter(size=3))
-        result_img = result_img.filter(ImageFilter.MaxFilter(size=3))
+class BackgroundJobRunner:
+    """
+    后台处理执行器
 
-        # 转换回 RGB 模式
-        result = result_img.convert('RGB')
+    单个工作线程执行耗时处理（OpenCV 处理期间释放 GIL，界面保持响应）。
+    结果和进度都通过 Clock 回到主线程；提交新任务会取消尚未开始的任务，
+    正在运行的任务结果被丢弃，因此界面上只会显示最新任务的结果。
+    """
 
-        print("✅ 二值化完成！")
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='binarize')
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._future = None
 
-        return result
+    def is_current(self, job_id):
+        """job_id 是否为最新提交的任务"""
+        return job_id == self._generation
 
-    def _calculate_local_mean(self, img_array, window_size):
+    def submit(self, func, on_done, on_error=None, on_progress=None):
         """
-        计算局部均值（高效实现 - 纯 NumPy）
+        提交任务
+
+        Args:
+            func: 在工作线程执行的函数，参数为 BackgroundJob，返回处理结果
+            on_done: 主线程回调 on_done(result)，只对最新任务调用
+            on_error: 主线程回调 on_error(exception)
+            on_progress: 主线程回调 on_progress(value)
 
-        使用滑动窗口 + 积分图优化
+        Returns:
+            任务编号
         """
-        h, w = img_array.shape
-        half_window = window_size // 2
+        with self._lock:
+            self._generation += 1
+            job = BackgroundJob(self, self._generation, on_progress)
+            if self._future is not None:
+                self._future.cancel()
+
+            def run():
+                # 排队期间已被新任务取代则直接跳过
+                if job.cancelled:
+                    return None
+                return func(job)
+
+            def finished(future):
+                if future.cancelled():
+                    return
+                error = future.exception()
+                if error is not None:
+                    if on_error is not None:
+                        self._deliver(job.job_id, on_error, error)
+                else:
+                    self._deliver(job.job_id, on_done, future.result())
+
+            self._future = self._executor.submit(run)
+            self._future.add_done_callback(finished)
+            return job.job_id
+
+    def cancel(self):
+        """取消全部任务（正在运行的任务结果会被丢弃）"""
+        with self._lock:
+            self._generation += 1
+            if self._future is not None:
+                self._future.cancel()
+
+    def shutdown(self):
+        """关闭工作线程"""
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _deliver(self, job_id, callback, value):
+        """在主线程调用回调（调用时再次检查任务是否仍为最新）"""
+        def deliver(dt):
+            if self.is_current(job_id):
+                callback(value)
+        Clock.schedule_once(deliver)
+
+
+def display_buffer(image, max_size=PREVIEW_MAX_SIZE):
+    """
+    把图像缩小为界面纹理缓冲区（可在工作线程调用，主线程只需 blit）
 
-        # 方法1: 尝试使用 scipy（如果可用）
-        try:
-            from scipy.ndimage import uniform_filter
-            return uniform_filter(img_array, size=window_size, mode='reflect')
-        except ImportError:
-            pass
+    单通道结果和 1 位结果保持单通道（'luminance'，数据量为 RGB 的 1/3），
+    宽度取 4 的倍数以满足纹理上传的行对齐。
+
+    Args:
+        image: OpenCV ndarray（BGR 或单通道）、PIL Image 或 PackedBitmap
+        max_size: 最长边
 
-        # 方法2: 使用积分图（纯 NumPy 实现）
-        # 计算积分图
-        integral = np.pad(img_array, ((1, 0), (1, 0)), mode='constant', constant_values=0)
-        integral = np.cumsum(np.cumsum(integral, axis=0), axis=1)
+    Returns:
+        (C 连续的 uint8 数组, colorfmt)，colorfmt 为 'luminance' 或 'rgb'
+    """
+    if isinstance(image, PackedBitmap):
+        h, w = image.shape
+    elif isinstance(image, np.ndarray):
+        h, w = image.shape[:2]
+    else:
+        w, h = image.size
+    # OpenCV 彩色图为 BGR：缩小后再转换为 RGB
+    bgr = USE_OPENCV and isinstance(image, np.ndarray)
+    scale = min(1.0, max_size / max(h, w))
+    new_size = (max(1, int(w * scale)), max(1, int(h * scale)))
+
+    if isinstance(image, PackedBitmap):
+        # 1 位结果：只解包缩略图需要的行
+        image = image.unpack(row_step=max(1, h // max_size))
+    elif not isinstance(image, np.ndarray):
+        from PIL import Image
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('RGB')
+        if image.size != new_size:
+            image = image.resize(new_size, Image.Resampling.BOX)
+        image = np.asarray(image)
+
+    if image.shape[1::-1] != new_size:
+        if USE_OPENCV:
+            image = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
+        else:
+            from PIL import Image
+            image = np.asarray(Image.fromarray(np.ascontiguousarray(image)).resize(
+                new_size, Image.Resampling.BOX))
+
+    if image.shape[1] >= 4:
+        image = image[:, :image.shape[1] // 4 * 4]
+    if image.ndim == 3 and bgr:
+        image = image[:, :, ::-1]
+    colorfmt = 'luminance' if image.ndim == 2 else 'rgb'
+    return np.ascontiguousarray(image, dtype=np.uint8), colorfmt
+
+
+class TextureSlot:
+    """
+    一个 Image Widget 的纹理
+
+    尺寸和格式不变时直接 blit_buffer 到已有纹理（不重新创建纹理、不经过 tobytes 复制），
+    同一图像对象重复显示时不做任何处理。
+    """
+
+    def __init__(self, widget, create=None):
+        """
+        Args:
+            widget: Kivy Image Widget
+            create: 纹理工厂（默认 Texture.create）
+        """
+        self.widget = widget
+        self.texture = None
+        self.source = None
+        self._create = create or Texture.create
+
+    def show(self, image):
+        """
+        显示图像（display_buffer 缩小后上传）
+
+        Returns:
+            是否更新了纹理（同一图像对象返回 False）
+        """
+        if image is self.source:
+            return False
+        self.blit(*display_buffer(image))
+        self.source = image
+        return True
+
+    def blit(self, buffer, colorfmt):
+        """上传 display_buffer 的结果（尺寸或格式变化时才创建新纹理）"""
+        h, w = buffer.shape[:2]
+        # blit_buffer 的 ubyte 缓冲区为一维字节序列（C 连续时只是视图，不复制）
+        pbuffer = np.ascontiguousarray(buffer).reshape(-1)
+        texture = self.texture
+        if texture is None or tuple(texture.size) != (w, h) or texture.colorfmt != colorfmt:
+            texture = self._create(size=(w, h), colorfmt=colorfmt)
+            texture.flip_vertical()
+            texture.blit_buffer(pbuffer, colorfmt=colorfmt, bufferfmt='ubyte')
+            self.texture = texture
+            self.widget.texture = texture
+        else:
+            texture.blit_buffer(pbuffer, colorfmt=colorfmt, bufferfmt='ubyte')
+            self.widget.canvas.ask_update()
+        self.source = None
+
+
+class LiveTuner:
+    """
+    滑块调参的去抖调度
+
+    参数每次变化后在下一帧调用 on_preview（同一帧内的多次变化只触发一次，
+    用于在代理图上实时重新阈值）；停止调整 refine_delay 秒后调用一次
+    on_refine（全分辨率处理）。两个回调的参数都是 (block_size, c_value, denoise_h)。
+    """
 
-        # 计算局部和
-        local_sum = np.zeros_like(img_array)
-        local_count = np.zeros_like(img_array)
+    def __init__(self, on_preview, on_refine, block_size=11, c_value=2, denoise_h=5,
+                 refine_delay=TUNE_REFINE_DELAY):
+        self.block_size = block_size
+        self.c_value = c_value
+        self.denoise_h = denoise_h
+        self._on_preview = on_preview
+        self._on_refine = on_refine
+        self._preview_trigger = Clock.create_trigger(self._preview, 0)
+        self._refine_trigger = Clock.create_trigger(self._refine, refine_delay)
+
+    @property
+    def parameters(self):
+        """(block_size, c_value, denoise_h)"""
+        return self.block_size, self.c_value, self.denoise_h
+
+    def set(self, block_size=None, c_value=None, denoise_h=None):
+        """更新参数（不触发处理，用于同步自动选择的参数）"""
+        if block_size is not None:
+            self.block_size = int(block_size) | 1
+        if c_value is not None:
+            self.c_value = c_value
+        if denoise_h is not None:
+            self.denoise_h = denoise_h
+
+    def update(self, **parameters):
+        """更新参数并调度预览；重新开始全分辨率处理的等待"""
+        self.set(**parameters)
+        self._preview_trigger()
+        self._refine_trigger.cancel()
+        self._refine_trigger()
+
+    def cancel(self):
+        """取消尚未执行的预览和全分辨率处理"""
+        self._preview_trigger.cancel()
+        self._refine_trigger.cancel()
+
+    def _preview(self, dt):
+        self._on_preview(self.parameters)
+
+    def _refine(self, dt):
+        self._on_refine(self.parameters)
+
+
+class TileViewport:
+    """
+    缩放 / 平移查看器的可见区域
 
-        for i in range(h):
-            for j in range(w):
-                # 窗口边界
-                i1 = max(0, i - half_window)
-                i2 = min(h - 1, i + half_window)
-                j1 = max(0, j - half_window)
-                j2 = min(w - 1, j + half_window)
+    zoom=1 显示整页；zoom 每次翻倍，可见区域为原图的 1/zoom。render() 只二值化
+    与可见区域相交的块（apply_binarization_roi），块结果按处理参数缓存，
+    平移时已处理的块直接复用，耗时与页面大小无关。
+    """
 
-                # 使用积分图计算区域和
-                sum_val = (integral[i2 + 1, j2 + 1] -
-                          integral[i1, j2 + 1] -
-                          integral[i2 + 1, j1] +
-                          integral[i1, j1])
+    def __init__(self, size, view_size=PREVIEW_MAX_SIZE, tile_size=VIEW_TILE_SIZE,
+                 max_tiles=VIEW_CACHE_TILES):
+        """
+        Args:
+            size: 原图 (宽, 高)
+            view_size: 显示区域最长边（像素）
+            tile_size: 块大小（原图像素）
+            max_tiles: 缓存的块数
+        """
+        self.size = tuple(size)
+        self.view_size = view_size
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.zoom = 1
+        self.center = (self.size[0] / 2, self.size[1] / 2)
+        self._tiles = OrderedDict()
+        self._params = None
+        self._page = None
+
+    @property
+    def max_zoom(self):
+        """最大倍数：放大到原图像素显示为约 2 倍为止"""
+        zoom = 1
+        while max(self.size) / (zoom * 2) >= self.view_size / 2:
+            zoom *= 2
+        return zoom
+
+    def set_zoom(self, zoom):
+        """设置倍数（限制在 1 ~ max_zoom），保持中心"""
+        self.zoom = int(min(self.max_zoom, max(1, zoom)))
+        self._clamp()
+
+    def pan(self, dx, dy):
+        """
+        平移
 
-                count = (i2 - i1 + 1) * (j2 - j1 + 1)
+        Args:
+            dx, dy: 显示像素（按当前倍数换算为原图像素）
+        """
+        _, _, w, h = self.visible_rect()
+        scale = max(w, h) / self.view_size
+        self.center = (self.center[0] + dx * scale, self.center[1] + dy * scale)
+        self._clamp()
+
+    def _clamp(self):
+        w, h = self.size
+        half_w, half_h = w / self.zoom / 2, h / self.zoom / 2
+        self.center = (min(max(self.center[0], half_w), w - half_w),
+                       min(max(self.center[1], half_h), h - half_h))
+
+    def visible_rect(self):
+        """可见区域 (x, y, 宽, 高)，原图像素"""
+        w, h = self.size
+        view_w, view_h = max(1, -(-w // self.zoom)), max(1, -(-h // self.zoom))
+        x = int(min(max(0, round(self.center[0] - view_w / 2)), w - view_w))
+        y = int(min(max(0, round(self.center[1] - view_h / 2)), h - view_h))
+        return x, y, view_w, view_h
+
+    def visible_tiles(self):
+        """与可见区域相交的块 (列, 行)"""
+        x, y, w, h = self.visible_rect()
+        size = self.tile_size
+        return [(tx, ty)
+                for ty in range(y // size, (y + h - 1) // size + 1)
+                for tx in range(x // size, (x + w - 1) // size + 1)]
+
+    def render(self, processor, image, denoise=True):
+        """
+        二值化可见区域（只处理尚未缓存的块）
 
-                local_sum[i, j] = sum_val
-                local_count[i, j] = count
+        Args:
+            processor: SimpleBinarizationProcessor（处理参数变化时缓存的块失效）
+            image: 原图（ndarray 或 PIL Image，尺寸为 size）
+            denoise: 是否去噪
 
-        # 计算均值
-        local_mean = local_sum / local_count
+        Returns:
+            可见区域的单通道结果（uint8 ndarray）
+        """
+        params = processor._cache_params(denoise, OUTPUT_GRAY)
+        if params != self._params:
+            self._tiles.clear()
+            self._params = params
+            self._page = None
+
+        x, y, w, h = self.visible_rect()
+        size = self.tile_size
+        view = np.empty((h, w), dtype=np.uint8)
+        for tx, ty in self.visible_tiles():
+            tile = self._tiles.get((tx, ty))
+            if tile is None:
+                if self._page is None or self._page.settings != processor._page_settings(denoise):
+                    # 整页决定和光照场每组参数只算一次，各块共用
+                    self._page = processor.plan_page(image, denoise)
+                tile = np.asarray(processor.apply_binarization_roi(
+                    image, (tx * size, ty * size, size, size), denoise, OUTPUT_GRAY,
+                    page=self._page))
+                self._tiles[(tx, ty)] = tile
+                while len(self._tiles) > self.max_tiles:
+                    self._tiles.popitem(last=False)
+            else:
+                self._tiles.move_to_end((tx, ty))
 
-        return local_mean
+            # 块与可见区域的交集
+            x0, y0 = max(x, tx * size), max(y, ty * size)
+            x1, y1 = min(x + w, tx * size + tile.shape[1]), min(y + h, ty * size + tile.shape[0])
+            view[y0 - y:y1 - y, x0 - x:x1 - x] = tile[y0 - ty * size:y1 - ty * size,
+                                                      x0 - tx * size:x1 - tx * size]
+        return view
 
 
 class BinarizationApp(App):
@@ -259,8 +3037,27 @@ class BinarizationApp(App):
         """构建 UI"""
         self.title = "Auto Binarization Demo"
         
-        # 初始化处理器
-        self.processor = SimpleBinarizationProcessor()
+        # 初始化处理器（只在后台线程中使用）
+        # 结果缓存：重新处理、重复选择同一图片时直接返回
+        # 自动去噪：按每张图片的估计噪声决定是否去噪以及去噪强度
+        # 自动参数：按每张图片的估计字高和噪声选择 block_size / c_value
+        self.processor = SimpleBinarizationProcessor(cache=ResultCache(max_bytes=128 * 1024 * 1024),
+                                                     auto_denoise=True, auto_parameters=True)
+        self.worker = BackgroundJobRunner()
+        self.page_count = 0
+        self._proxy = None
+
+        # 多页文档导出：独立线程，导出期间调参预览不受影响，调参也不会取消导出
+        self.export_worker = BackgroundJobRunner()
+
+        # 缩放查看：独立线程和处理器，放大查看不打断全分辨率处理
+        self.view_worker = BackgroundJobRunner()
+        self.view_processor = SimpleBinarizationProcessor(denoise_cache_size=0)
+        self.viewport = None
+        self._view_trigger = Clock.create_trigger(self._render_view, 0)
+        self._view_params = None
+        self._result_params = None
+        self._result_thumbnail = None
         
         # 自动处理模式（默认开启）
         self.auto_process = True
@@ -269,7 +3066,7 @@ class BinarizationApp(App):
         layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
         
         # 图片显示区域（左右对比）
-        image_layout = BoxLayout(orientation='horizontal', size_hint=(1, 0.7), spacing=10)
+        image_layout = BoxLayout(orientation='horizontal', size_hint=(1, 0.55), spacing=10)
         
         # 原图显示
         original_box = BoxLayout(orientation='vertical', spacing=5)
@@ -292,16 +3089,21 @@ class BinarizationApp(App):
         )
         processed_box.add_widget(processed_label)
         self.processed_widget = KivyImage(size_hint=(1, 0.95))
+        self.processed_widget.bind(on_touch_move=self._on_view_drag)
         processed_box.add_widget(self.processed_widget)
+
+        # 纹理缓存：尺寸不变时原地更新
+        self.original_slot = TextureSlot(self.original_widget)
+        self.processed_slot = TextureSlot(self.processed_widget)
         image_layout.add_widget(processed_box)
         
         layout.add_widget(image_layout)
         
         # 参数调整区域（可选，用于手动调整）
-        param_layout = BoxLayout(orientation='vertical', size_hint=(1, 0.1), spacing=5)
+        param_layout = BoxLayout(orientation='vertical', size_hint=(1, 0.25), spacing=5)
         
         # 自动处理开关
-        auto_layout = BoxLayout(orientation='horizontal', size_hint=(1, 0.5), spacing=10)
+        auto_layout = BoxLayout(orientation='horizontal', size_hint=(1, 1), spacing=10)
         auto_label = Label(
             text='Auto Process:',
             size_hint=(0.5, 1),
@@ -313,11 +3115,32 @@ class BinarizationApp(App):
         self.auto_checkbox.bind(active=self._on_auto_toggle)
         auto_layout.add_widget(self.auto_checkbox)
         param_layout.add_widget(auto_layout)
-        
-        # 参数显示（自动模式下只显示，不可调整）
+
+        # 自动参数开关（拖动滑块时自动关闭，改为手动参数）
+        auto_params_layout = BoxLayout(orientation='horizontal', size_hint=(1, 1), spacing=10)
+        auto_params_layout.add_widget(Label(
+            text='Auto Params:',
+            size_hint=(0.5, 1),
+            font_name='Microsoft YaHei' if platform == 'win' else 'DroidSansFallback'
+        ))
+        self.auto_params_checkbox = CheckBox(active=True, size_hint=(0.5, 1))
+        self.auto_params_checkbox.bind(active=self._on_auto_params_toggle)
+        auto_params_layout.add_widget(self.auto_params_checkbox)
+        param_layout.add_widget(auto_params_layout)
+
+        # 调参滑块：只改 Block / C 时在代理图上实时预览，停止调整后再计算全分辨率
+        self.tuner = LiveTuner(self._tune_preview, self._tune_refine)
+        self._syncing_sliders = False
+        self.sliders = {}
+        for name, text, low, high, step in (('block_size', 'Block', 3, AUTO_BLOCK_RANGE[1], 2),
+                                            ('c_value', 'C', 0, 30, 0.5),
+                                            ('denoise_h', 'Denoise h', 0, AUTO_DENOISE_MAX_H, 0.5)):
+            param_layout.add_widget(self._create_slider(name, text, low, high, step))
+
+        # 参数显示（自动模式下为本次处理选择的参数）
         param_info = Label(
-            text='Block Size: 31, Offset: 15 (Shadow Removal)',
-            size_hint=(1, 0.5),
+            text='Block: auto, C: auto, Denoise: auto',
+            size_hint=(1, 1),
             font_name='Microsoft YaHei' if platform == 'win' else 'DroidSansFallback'
         )
         param_layout.add_widget(param_info)
@@ -362,6 +3185,25 @@ class BinarizationApp(App):
             font_name='Microsoft YaHei' if platform == 'win' else 'DroidSansFallback'
         )
         button_layout.add_widget(self.save_btn)
+
+        # 保存格式选择（1 位 PNG 体积小且相册可直接查看）
+        self.encoder_spinner = Spinner(
+            text='png1',
+            values=list(OUTPUT_ENCODERS),
+            size_hint=(0.6, 1),
+            font_name='Microsoft YaHei' if platform == 'win' else 'DroidSansFallback'
+        )
+        button_layout.add_widget(self.encoder_spinner)
+
+        # 缩放（放大时只二值化可见区域，拖动结果平移）
+        for text, factor in (('+', 2), ('-', 0.5)):
+            zoom_btn = Button(
+                text=text,
+                size_hint=(0.3, 1),
+                font_name='Microsoft YaHei' if platform == 'win' else 'DroidSansFallback'
+            )
+            zoom_btn.bind(on_press=lambda instance, factor=factor: self._on_zoom(factor))
+            button_layout.add_widget(zoom_btn)
         
         layout.add_widget(button_layout)
         
@@ -371,6 +3213,107 @@ class BinarizationApp(App):
         
         return layout
     
+    def _create_slider(self, name, text, low, high, step):
+        """一行参数滑块（名称、滑块、当前值）"""
+        row = BoxLayout(orientation='horizontal', size_hint=(1, 1), spacing=10)
+        row.add_widget(Label(
+            text=text,
+            size_hint=(0.2, 1),
+            font_name='Microsoft YaHei' if platform == 'win' else 'DroidSansFallback'
+        ))
+        value = getattr(self.tuner, name)
+        slider = Slider(min=low, max=high, step=step, value=value, size_hint=(0.65, 1))
+        value_label = Label(text=f'{value:g}', size_hint=(0.15, 1))
+        slider.bind(value=lambda instance, v: self._on_slider(name, v, value_label))
+        row.add_widget(slider)
+        row.add_widget(value_label)
+        self.sliders[name] = (slider, value_label)
+        return row
+
+    def _on_slider(self, name, value, value_label):
+        """滑块变化：切换为手动参数，去抖调度预览和全分辨率处理"""
+        value_label.text = f'{value:g}'
+        if self._syncing_sliders:
+            return
+        if self.auto_params_checkbox.active:
+            self._syncing_sliders = True
+            try:
+                self.auto_params_checkbox.active = False
+            finally:
+                self._syncing_sliders = False
+        self.tuner.update(**{name: value})
+
+    def _sync_sliders(self, block_size, c_value, denoise_h):
+        """把自动选择的参数显示到滑块上（不触发处理）"""
+        self.tuner.set(block_size, c_value, denoise_h)
+        self._syncing_sliders = True
+        try:
+            for name, value in zip(('block_size', 'c_value', 'denoise_h'),
+                                   (block_size, c_value, denoise_h)):
+                self.sliders[name][0].value = value
+        finally:
+            self._syncing_sliders = False
+
+    def _on_auto_params_toggle(self, checkbox, value):
+        """自动参数开关：重新打开时按自动参数重新处理"""
+        if self._syncing_sliders:
+            return
+        self.tuner.cancel()
+        if self.current_image is not None and self.auto_process:
+            self.status_label.text = 'Re-processing...'
+            self._auto_process()
+
+    def _tune_preview(self, parameters):
+        """在缓存的代理图上按新参数重新阈值（毫秒级）"""
+        image = self.current_image
+        if image is None:
+            return
+        block_size, c_value, denoise_h = parameters
+
+        def work(job):
+            self.processor.auto_parameters = False
+            self.processor.auto_denoise = False
+            self.processor.set_parameters(block_size, c_value, denoise_h)
+            preview = self.processor.apply_binarization_preview(self._preview_proxy(image),
+                                                                source_size=image.size)
+            return display_buffer(preview)[0]
+
+        denoise_method = select_denoise_method(*image.size, AUTO_DENOISE_BUDGET_MS)
+        view_params = (block_size, c_value, denoise_h,
+                       denoise_method is not None and denoise_h > 0, denoise_method)
+
+        def done(thumbnail):
+            self._show_processed(thumbnail, view_params)
+            self.param_info_label.text = (f"Block: {block_size}, C: {c_value:g}, "
+                                          f"Denoise h: {denoise_h:g}")
+            if self.auto_process:
+                self.status_label.text = 'Preview - refining when you stop adjusting...'
+            else:
+                self.status_label.text = 'Preview - click Re-Process for full resolution'
+                self.reprocess_btn.disabled = False
+
+        self.worker.submit(work, on_done=done, on_error=self._show_error)
+
+    def _tune_refine(self, parameters):
+        """停止调整后计算全分辨率结果（去噪结果按 denoise_h 缓存，只改 Block / C 时复用）"""
+        if self.current_image is not None and self.auto_process:
+            self.status_label.text = 'Refining full resolution...'
+            self._auto_process(preview=False)
+
+    def _preview_proxy(self, image):
+        """当前图片缩小解码的灰度代理图（每张图片只解码一次）"""
+        cached = self._proxy
+        if cached is None or cached[0] is not image:
+            cached = (image, image.reduced(PREVIEW_MAX_SIZE))
+            self._proxy = cached
+        return cached[1]
+
+    def _show_error(self, error):
+        """后台任务失败"""
+        self.status_label.text = f'Auto process failed: {error}'
+        import traceback
+        traceback.print_exception(type(error), error, error.__traceback__)
+
     def _on_auto_toggle(self, checkbox, value):
         """自动处理开关切换"""
         self.auto_process = value
@@ -393,7 +3336,7 @@ class BinarizationApp(App):
         else:
             filechooser = FileChooserIconView()
         
-        filechooser.filters = ['*.png', '*.jpg', '*.jpeg']
+        filechooser.filters = ['*.png', '*.jpg', '*.jpeg', '*.tif', '*.tiff', '*.pdf']
         content.add_widget(filechooser)
         
         # 按钮布局
@@ -434,37 +3377,39 @@ class BinarizationApp(App):
     def load_image(self, filepath):
         """加载图片"""
         try:
-            if USE_OPENCV:
-                # 使用 OpenCV 读取
-                self.current_image = cv2.imread(filepath)
-                if self.current_image is None:
-                    self.status_label.text = 'Cannot load image'
-                    return
-            else:
-                # 使用 Pillow 读取
-                from PIL import Image
-                self.current_image = Image.open(filepath)
-                if self.current_image is None:
-                    self.status_label.text = 'Cannot load image'
-                    return
-                # 转换为 RGB 模式
-                self.current_image = self.current_image.convert('RGB')
-
-            # 显示原图
-            self.display_image(self.current_image, is_original=True)
+            # 只读取文件头，全分辨率灰度图在后台处理时才解码
+            image = ImageHandle.open(filepath)
+            thumbnail = image.reduced(PREVIEW_MAX_SIZE, color=True) if image is not None else None
+            if thumbnail is None:
+                self.status_label.text = 'Cannot load image'
+                return
+
+            # 新图片：丢弃旧图片仍在处理中的任务和结果
+            self.worker.cancel()
+            self.view_worker.cancel()
+            self.tuner.cancel()
+            self.current_image = image
+            self.viewport = TileViewport(image.size)
+            self._view_params = self._result_params = self._result_thumbnail = None
+            self.page_count = document_page_count(filepath)
+            self.processed_image = None
+            self.save_btn.disabled = True
+
+            # 显示原图（缩小解码的缩略图，多页文档显示第一页）
+            self.display_image(thumbnail, is_original=True)
 
             filename = Path(filepath).name
+            if self.page_count > 1:
+                filename += f' ({self.page_count} pages)'
             self.status_label.text = f'Loaded: {filename}'
 
             # 自动处理模式：立即处理
             if self.auto_process:
                 self.status_label.text = f'Loaded: {filename} - Auto processing...'
-                # 延迟一点时间让 UI 更新
-                Clock.schedule_once(lambda dt: self._auto_process(), 0.1)
+                self._auto_process()
             else:
                 # 手动模式：启用重新处理按钮
                 self.reprocess_btn.disabled = False
-                self.save_btn.disabled = True
 
         except Exception as e:
             self.status_label.text = f'Load failed: {e}'
@@ -472,116 +3417,225 @@ class BinarizationApp(App):
             traceback.print_exc()
 
     def display_image(self, image, is_original=False):
-        """显示图像到 Kivy Image Widget"""
+        """显示图像到 Kivy Image Widget（复用纹理，同一图像不重复上传）"""
         try:
-            if USE_OPENCV:
-                # OpenCV 图像 (BGR)
-                img_array = image.copy()
-
-                # 调整大小
-                h, w = img_array.shape[:2]
-                max_size = 400
-                if max(h, w) > max_size:
-                    scale = max_size / max(h, w)
-                    new_w = int(w * scale)
-                    new_h = int(h * scale)
-                    img_array = cv2.resize(img_array, (new_w, new_h))
-
-                # BGR 转 RGB
-                rgb_image = cv2.cvtColor(img_array, cv2.COLOR_BGR2RGB)
-
-                # 转换为 Kivy Texture
-                h, w = rgb_image.shape[:2]
-                texture = Texture.create(size=(w, h), colorfmt='rgb')
-                texture.blit_buffer(rgb_image.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
-                texture.flip_vertical()
-            else:
-                # PIL Image
-                from PIL import Image
-                pil_image = image
-
-                # 调整大小
-                w, h = pil_image.size
-                max_size = 400
-                if max(h, w) > max_size:
-                    scale = max_size / max(h, w)
-                    new_w = int(w * scale)
-                    new_h = int(h * scale)
-                    pil_image = pil_image.resize((new_w, new_h), Image.Resampling.LANCZOS)
-
-                # 转换为 numpy 数组
-                img_array = np.array(pil_image)
-
-                # 转换为 Kivy Texture
-                h, w = img_array.shape[:2]
-                texture = Texture.create(size=(w, h), colorfmt='rgb')
-                texture.blit_buffer(img_array.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
-                texture.flip_vertical()
-
-            # 更新对应的 Image Widget
-            if is_original:
-                self.original_widget.texture = texture
-            else:
-                self.processed_widget.texture = texture
+            slot = self.original_slot if is_original else self.processed_slot
+            slot.show(image)
         except Exception as e:
             self.status_label.text = f'Display failed: {e}'
             import traceback
             traceback.print_exc()
-    
-    def _auto_process(self):
-        """自动处理（后台执行）"""
-        try:
-            # 使用 one_step_document_processor.py 的参数
-            block_size = 11  # 窗口大小
-            c_value = 2      # 阈值常数
-            denoise_h = 5    # 去噪强度
 
+    def _processing_settings(self):
+        """
+        当前界面的处理设置（主线程中读取）
+
+        Returns:
+            (auto, block_size, c_value, denoise_h, denoise_method, denoise)
+        """
+        auto = self.auto_params_checkbox.active
+        if auto:
+            # 使用 one_step_document_processor.py 的参数（估计失败时使用）
+            block_size = 11  # 窗口大小（自动参数时按估计字高调整）
+            c_value = 2      # 阈值常数（自动参数时按估计噪声调整）
+            denoise_h = 5    # 去噪强度（自动去噪时按估计噪声调整）
+        else:
+            # 手动参数（滑块）
+            block_size, c_value, denoise_h = self.tuner.parameters
+
+        # 按延迟预算选择去噪方法（预算内都不够时不去噪）
+        width, height = self.current_image.size
+        denoise_method = select_denoise_method(width, height, AUTO_DENOISE_BUDGET_MS)
+        denoise = denoise_method is not None and (auto or denoise_h > 0)
+        return auto, block_size, c_value, denoise_h, denoise_method, denoise
+
+    def _auto_process(self, preview=True):
+        """
+        自动处理（提交到后台线程，结果通过 Clock 回到主线程）
+
+        Args:
+            preview: 是否先显示代理图预览（调参后已显示预览时为 False）
+        """
+        auto, block_size, c_value, denoise_h, denoise_method, denoise = \
+            self._processing_settings()
+        image = self.current_image
+
+        def work(job):
+            # 处理器只在工作线程中使用，参数在任务开始时设置
+            self.processor.auto_parameters = auto
+            self.processor.auto_denoise = auto
             self.processor.set_parameters(block_size, c_value, denoise_h)
+            if denoise_method is not None:
+                self.processor.set_denoise_method(denoise_method)
 
-            # 执行二值化
             print("\n" + "="*60)
             print("🚀 开始二值化处理（one_step_document_processor 算法）...")
             print("="*60)
 
-            self.processed_image = self.processor.apply_binarization(
-                self.current_image,
-                denoise=True
+            # 第一阶段：缩小解码的灰度代理图快速预览（JPEG 不解码全分辨率）
+            # 显示缓冲区也在工作线程准备好，主线程只上传纹理
+            if preview:
+                proxy = self._preview_proxy(image)
+                thumbnail = self.processor.apply_binarization_preview(proxy,
+                                                                      source_size=image.size)
+                job.progress(('preview', display_buffer(thumbnail)[0]))
+                if job.cancelled:
+                    return None
+
+            # 第二阶段：全分辨率灰度图（直接解码为灰度），保存始终使用全分辨率
+            job.progress(('status', 'Preview ready - refining full resolution...'))
+            result = self.processor.apply_binarization(
+                image.gray(),
+                denoise=denoise,
+                output_format=OUTPUT_GRAY
             )
+            metadata = dict(self.processor.last_metadata)
 
             print("="*60)
             print("✅ 处理完成！")
             print("="*60 + "\n")
+            return result, metadata, display_buffer(result)[0]
+
+        def done(outcome):
+            result, metadata, thumbnail = outcome
+            self.processed_image = result
+            self._result_params = (metadata['block_size'], metadata['c_value'],
+                                   metadata['denoise_h'], metadata['denoise'],
+                                   metadata['denoise_method'])
 
-            # 显示处理结果
-            self.display_image(self.processed_image, is_original=False)
+            # 显示处理结果（工作线程已缩小为单通道缓冲区）
+            self._show_processed(thumbnail, self._result_params)
 
             # 启用保存按钮
             self.save_btn.disabled = False
 
             # 更新参数显示
-            self.param_info_label.text = f'Block: {block_size}, C: {c_value}, Denoise: {denoise_h}'
+            if metadata['denoise']:
+                denoise_text = f"{metadata['denoise_method']} h={metadata['denoise_h']:g}"
+            else:
+                denoise_text = 'off'
+            if metadata['noise_sigma'] is not None:
+                denoise_text += f" (noise {metadata['noise_sigma']:.1f})"
+            self.param_info_label.text = (f"Block: {metadata['block_size']}, "
+                                          f"C: {metadata['c_value']:g}, Denoise: {denoise_text}")
+            if auto:
+                # 自动选择的参数作为调参起点
+                self._sync_sliders(metadata['block_size'], metadata['c_value'],
+                                   metadata['denoise_h'] if metadata['denoise'] else 0)
+
+            if metadata['from_cache']:
+                self.status_label.text = 'Processing completed! (cached)'
+            else:
+                self.status_label.text = 'Processing completed!'
+
+        def progress(update):
+            kind, value = update
+            if kind == 'preview':
+                self._show_processed(value)
+            else:
+                self.status_label.text = value
+
+        self.worker.submit(work, on_done=done, on_error=self._show_error, on_progress=progress)
 
-            self.status_label.text = 'Processing completed!'
-        except Exception as e:
-            self.status_label.text = f'Auto process failed: {e}'
-            import traceback
-            traceback.print_exc()
-    
     def process_image(self, instance):
         """手动重新处理图片"""
         if self.current_image is None:
             return
-        
+
         self.status_label.text = 'Re-processing...'
-        
-        # 使用 Clock 异步处理，避免 UI 卡顿
-        Clock.schedule_once(lambda dt: self._auto_process(), 0.1)
-    
+
+        # 后台处理，新的请求会取代仍在进行的处理
+        self._auto_process()
+
+    def on_stop(self):
+        """退出时关闭后台线程"""
+        self.worker.shutdown()
+        self.export_worker.shutdown()
+        self.view_worker.shutdown()
+
+    def _show_processed(self, thumbnail, view_params=None):
+        """
+        显示处理结果的缩略图；放大查看时改为按相同参数重新渲染可见区域
+
+        Args:
+            thumbnail: 整页结果的显示缓冲区
+            view_params: 结果使用的 (block_size, c_value, denoise_h, denoise, denoise_method)
+        """
+        self._result_thumbnail = thumbnail
+        if view_params is not None:
+            self._view_params = view_params
+        if self.viewport is None or self.viewport.zoom == 1:
+            self.display_image(thumbnail, is_original=False)
+        elif view_params is not None:
+            self._view_trigger()
+
+    def _on_zoom(self, factor):
+        """放大 / 缩小处理结果"""
+        if self.viewport is None:
+            return
+        self.viewport.set_zoom(self.viewport.zoom * factor)
+        self._view_trigger()
+
+    def _on_view_drag(self, widget, touch):
+        """放大时拖动处理结果平移"""
+        viewport = self.viewport
+        if viewport is None or viewport.zoom == 1 or not widget.collide_point(*touch.pos):
+            return False
+        # 控件上的显示像素 -> 视图像素（Kivy 的 y 轴向上）
+        scale = viewport.view_size / max(1.0, max(widget.norm_image_size))
+        viewport.pan(-touch.dx * scale, touch.dy * scale)
+        self._view_trigger()
+        return True
+
+    def _render_view(self, dt):
+        """
+        在查看线程渲染可见区域
+
+        全分辨率结果的参数与当前参数相同时直接裁剪，否则只二值化可见的块
+        （调参预览期间、全分辨率处理完成之前）。
+        """
+        image, viewport, params = self.current_image, self.viewport, self._view_params
+        if image is None or viewport is None:
+            return
+        if viewport.zoom == 1:
+            if self._result_thumbnail is not None:
+                self.display_image(self._result_thumbnail, is_original=False)
+            self.status_label.text = 'Zoom 1x'
+            return
+        if params is None:
+            return
+
+        result = self.processed_image if params == self._result_params else None
+        block_size, c_value, denoise_h, denoise, denoise_method = params
+
+        def work(job):
+            if result is not None:
+                x, y, w, h = viewport.visible_rect()
+                region = np.asarray(result)[y:y + h, x:x + w]
+            else:
+                self.view_processor.set_parameters(block_size, c_value, denoise_h)
+                if denoise_method is not None:
+                    self.view_processor.set_denoise_method(denoise_method)
+                region = viewport.render(self.view_processor, image.gray(), denoise)
+            return display_buffer(region)[0]
+
+        def done(thumbnail):
+            if viewport is self.viewport and viewport.zoom > 1:
+                self.display_image(thumbnail, is_original=False)
+                x, y, w, h = viewport.visible_rect()
+                self.status_label.text = f'Zoom {viewport.zoom}x - {w}x{h} at ({x}, {y})'
+
+        self.view_worker.submit(work, on_done=done, on_error=self._show_error)
+
     def save_image(self, instance):
-        """保存图片"""
+        """保存图片（多页文档保存为多页 TIFF）"""
         if self.processed_image is None:
             return
 
+        if self.page_count > 1:
+            self._save_document()
+            return
+
         try:
             # 确定保存路径
             if platform == 'android':
@@ -597,16 +3651,12 @@ class BinarizationApp(App):
             # 生成文件名
             from datetime import datetime
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'binarized_{timestamp}.jpg'
+            encoder = self.encoder_spinner.text
+            filename = f'binarized_{timestamp}{OUTPUT_ENCODERS[encoder][1]}'
             filepath = os.path.join(save_dir, filename)
 
             # 保存图片
-            if USE_OPENCV:
-                # 使用 OpenCV 保存
-                cv2.imwrite(filepath, self.processed_image, [cv2.IMWRITE_JPEG_QUALITY, 95])
-            else:
-                # 使用 Pillow 保存
-                self.processed_image.save(filepath, 'JPEG', quality=95)
+            save_image_file(filepath, self.processed_image, quality=95, encoder=encoder)
 
             # 显示完整路径
             abs_path = os.path.abspath(filepath)
@@ -632,6 +3682,49 @@ class BinarizationApp(App):
             import traceback
             traceback.print_exc()
 
+    def _save_document(self):
+        """后台逐页处理整个文档，按页序写入多页 CCITT G4 TIFF"""
+        save_dir = os.path.join(os.getcwd(), 'output', 'binarized')
+        if platform == 'android':
+            save_dir = '/storage/emulated/0/Pictures/BinarizationDemo'
+        from datetime import datetime
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filepath = os.path.abspath(os.path.join(save_dir, f'binarized_{timestamp}.tif'))
+        source = self.current_image.filepath
+        total = self.page_count
+
+        # 每页使用与界面相同的设置；导出有自己的处理器（界面处理器属于调参线程）
+        auto, block_size, c_value, denoise_h, denoise_method, denoise = \
+            self._processing_settings()
+        settings = dict(threshold_method=self.processor.threshold_method, k=self.processor.k,
+                        denoise_method=denoise_method or self.processor.denoise_method,
+                        normalize_illumination=self.processor.normalize_illumination,
+                        auto_denoise=auto, auto_parameters=auto)
+
+        def work(job):
+            os.makedirs(save_dir, exist_ok=True)
+            # 每个处理器同一时间只处理一页
+            processors = [SimpleBinarizationProcessor(block_size, c_value, denoise_h, **settings)
+                          for _ in range(DOCUMENT_PAGE_WORKERS)]
+            return binarize_document(
+                source, filepath, processors, denoise=denoise,
+                on_page=lambda count: job.progress(f'Saving page {count}/{total}...'))
+
+        def done(pages):
+            self.status_label.text = f'Saved {pages} pages: {filepath}'
+            print(f"✅ {pages} 页已保存到: {filepath}")
+
+        def failed(error):
+            self.status_label.text = f'Save failed: {error}'
+            import traceback
+            traceback.print_exception(type(error), error, error.__traceback__)
+
+        def progress(text):
+            self.status_label.text = text
+
+        self.status_label.text = f'Saving {total} pages...'
+        self.export_worker.submit(work, on_done=done, on_error=failed, on_progress=progress)
+
 
 if __name__ == '__main__':
     BinarizationApp().run()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成文档测试图像生成器（纯 NumPy 向量化）
+
+用于测试和基准测试：任意分辨率的带阴影文档页面，可配置阴影类型
+（linear / radial / vignette）、噪声强度、文字密度、线条图形密度和随机种子。
+同一组参数和种子总是生成相同的图像。
+
+示例：
+    from synthetic_docs import make_document
+    page = make_document(2480, 3508, shadow='radial', noise=6, seed=1)
+"""
+
+import numpy as np
+
+SHADOW_KINDS = (None, 'linear', 'radial', 'vignette')
+
+# 纸张和墨迹亮度
+PAPER_LEVEL = 235
+INK_LEVEL = 30
+
+
+def shadow_field(width, height, kind='linear', strength=0.6, seed=0):
+    """
+    生成亮度系数场（1.0 为不变暗）
+
+    Args:
+        width, height: 图像尺寸
+        kind: 'linear'（左暗右亮）、'radial'（随机位置的圆形阴影）、
+              'vignette'（四角变暗）或 None
+        strength: 最暗处变暗的比例（0 ~ 1）
+        seed: 随机种子（radial 阴影中心）
+
+    Returns:
+        (height, width) 的 float32 数组
+    """
+    if kind is None:
+        return np.ones((height, width), dtype=np.float32)
+
+    if kind == 'linear':
+        # 与旧测试脚本逐像素循环相同：亮度 int(low + (255 - low) * x / width)
+        low = 255 * (1.0 - strength)
+        brightness = np.floor(low + (255 - low) * np.arange(width) / width)
+        return np.broadcast_to((brightness / 255).astype(np.float32), (height, width))
+
+    y = np.linspace(-1.0, 1.0, height, dtype=np.float32)[:, None]
+    x = np.linspace(-1.0, 1.0, width, dtype=np.float32)[None, :]
+
+    if kind == 'radial':
+        rng = np.random.default_rng(seed)
+        cy, cx = rng.uniform(-0.6, 0.6, size=2).astype(np.float32)
+        sigma = np.float32(rng.uniform(0.3, 0.6))
+        dist2 = (y - cy) ** 2 + (x - cx) ** 2
+        return 1.0 - np.float32(strength) * np.exp(-dist2 / (2 * sigma * sigma))
+
+    if kind == 'vignette':
+        dist2 = (y * y + x * x) / 2.0
+        return 1.0 - np.float32(strength) * dist2
+
+    raise ValueError(f'Unknown shadow kind: {kind}')
+
+
+def apply_shadow(gray, kind='linear', strength=0.6, seed=0):
+    """
+    给灰度图叠加阴影（向量化替代逐像素 getpixel / putpixel 循环）
+
+    Args:
+        gray: (H, W) uint8 灰度图
+        kind, strength, seed: 同 shadow_field
+
+    Returns:
+        叠加阴影后的 uint8 灰度图
+    """
+    h, w = gray.shape
+    field = shadow_field(w, h, kind, strength, seed)
+    return (gray.astype(np.float32) * field).astype(np.uint8)
+
+
+def _glyph_bank(glyph_h, glyph_w, rng, count=48):
+    """
+    生成类文字字形库：每个字形由粗笔画在 5x4 网格上组合而成
+
+    Returns:
+        (count + 1, glyph_h, glyph_w) bool 数组，最后一个为空格
+    """
+    pattern = rng.random((count, 5, 4)) < 0.4
+    pattern[:, :, 0] |= rng.random((count, 1)) < 0.7   # 大多数字形有竖笔画
+    pattern[:, 4, :] |= rng.random((count, 1)) < 0.3   # 部分字形有底部横笔画
+
+    rows = np.minimum(np.arange(glyph_h) * 5 // glyph_h, 4)
+    cols = np.minimum(np.arange(glyph_w) * 4 // glyph_w, 3)
+    glyphs = pattern[:, rows[:, None], cols[None, :]]
+
+    # 字间距：每个字形右侧留出空白列
+    gap = max(1, glyph_w // 5)
+    glyphs[:, :, glyph_w - gap:] = False
+
+    blank = np.zeros((1, glyph_h, glyph_w), dtype=bool)
+    return np.concatenate([glyphs, blank])
+
+
+def _text_mask(width, height, text_density, rng):
+    """
+    生成文字区域掩码（True 为墨迹）
+
+    字高约为页面高度的 1/60，行距为 2 倍字高，行尾长度随机。
+    """
+    mask = np.zeros((height, width), dtype=bool)
+    if text_density <= 0:
+        return mask
+
+    glyph_h = max(5, height // 60)
+    glyph_w = max(4, glyph_h * 3 // 4)
+    pitch = glyph_h * 2
+    margin_y, margin_x = height // 12, width // 12
+
+    lines = (height - 2 * margin_y) // pitch
+    cols = (width - 2 * margin_x) // glyph_w
+    if lines <= 0 or cols <= 0:
+        return mask
+
+    bank = _glyph_bank(glyph_h, glyph_w, rng)
+    blank = len(bank) - 1
+
+    index = rng.integers(0, blank, size=(lines, cols))
+    index[rng.random((lines, cols)) < 0.16] = blank               # 单词间空格
+    line_len = (cols * rng.uniform(0.55, 1.0, size=lines)).astype(int)
+    index[np.arange(cols)[None, :] >= line_len[:, None]] = blank   # 参差的行尾
+    index[rng.random(lines) >= text_density] = blank              # 空行（文字密度）
+
+    # (lines, cols, gh, gw) -> 行间补空白 -> (lines * pitch, cols * gw)
+    glyphs = bank[index]
+    block = np.zeros((lines, pitch, cols, glyph_w), dtype=bool)
+    block[:, :glyph_h] = glyphs.transpose(0, 2, 1, 3)
+    block = block.reshape(lines * pitch, cols * glyph_w)
+
+    mask[margin_y:margin_y + block.shape[0], margin_x:margin_x + block.shape[1]] = block
+    return mask
+
+
+def _line_art_mask(width, height, line_art, rng):
+    """生成线条图形掩码（矩形框、圆、斜线），数量与 line_art 成正比"""
+    from PIL import Image, ImageDraw
+
+    canvas = Image.new('1', (width, height), 0)
+    count = int(round(line_art * 10))
+    if count <= 0:
+        return np.zeros((height, width), dtype=bool)
+
+    draw = ImageDraw.Draw(canvas)
+    stroke = max(1, min(width, height) // 300)
+    for _ in range(count):
+        x0, x1 = np.sort(rng.integers(0, width, size=2))
+        y0, y1 = np.sort(rng.integers(0, height, size=2))
+        shape = rng.integers(0, 3)
+        if shape == 0:
+            draw.rectangle([int(x0), int(y0), int(x1), int(y1)], outline=1, width=stroke)
+        elif shape == 1:
+            draw.ellipse([int(x0), int(y0), int(x1), int(y1)], outline=1, width=stroke)
+        else:
+            draw.line([int(x0), int(y0), int(x1), int(y1)], fill=1, width=stroke)
+    return np.array(canvas, dtype=bool)
+
+
+def make_document(width, height, shadow='linear', shadow_strength=0.6, noise=4.0,
+                  text_density=0.8, line_art=0.2, seed=0, channels=3):
+    """
+    生成合成文档页面
+
+    Args:
+        width, height: 页面尺寸（像素）
+        shadow: 阴影类型（SHADOW_KINDS）
+        shadow_strength: 阴影强度（0 ~ 1）
+        noise: 高斯噪声标准差（灰度级）
+        text_density: 有文字的行所占比例（0 ~ 1）
+        line_art: 线条图形密度（0 ~ 1，约 10 个图形对应 1.0）
+        seed: 随机种子
+        channels: 3 返回 BGR (H, W, 3)，1 返回灰度 (H, W)
+
+    Returns:
+        uint8 图像
+    """
+    rng = np.random.default_rng(seed)
+
+    ink = _text_mask(width, height, text_density, rng)
+    ink |= _line_art_mask(width, height, line_art, rng)
+
+    page = np.where(ink, np.float32(INK_LEVEL), np.float32(PAPER_LEVEL))
+    page *= shadow_field(width, height, shadow, shadow_strength, seed)
+    if noise > 0:
+        page += rng.standard_normal((height, width), dtype=np.float32) * np.float32(noise)
+
+    gray = np.clip(page, 0, 255, out=page).astype(np.uint8)
+    if channels == 1:
+        return gray
+    return np.repeat(gray[:, :, None], 3, axis=2)
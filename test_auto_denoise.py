@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试自动噪声估计和自动去噪决定
+"""
+
+import sys
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, ResultCache, OUTPUT_GRAY, AUTO_DENOISE_MIN_H,
+                  estimate_noise_sigma, denoise_h_for_sigma)
+from synthetic_docs import make_document
+
+
+def _as_input(gray):
+    if main_module.USE_OPENCV:
+        return np.repeat(gray[:, :, None], 3, axis=2)
+    return Image.fromarray(gray).convert('RGB')
+
+
+def test_sampled_estimate_matches_full():
+    """条带采样估计与整幅估计接近，且明显更快"""
+    page = _as_input(make_document(2000, 2800, noise=6, seed=4, channels=1))
+
+    start = time.perf_counter()
+    full = estimate_noise_sigma(page, max_pixels=None)
+    full_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    sampled = estimate_noise_sigma(page)
+    sampled_ms = (time.perf_counter() - start) * 1000
+
+    print(f"  📏 full σ={full:.2f} ({full_ms:.0f} ms), sampled σ={sampled:.2f} ({sampled_ms:.0f} ms)")
+    assert abs(sampled - full) < 0.5
+    assert sampled_ms < full_ms
+
+
+def test_denoise_h_for_sigma():
+    """去噪强度随噪声单调增加并有上下限"""
+    values = [denoise_h_for_sigma(s) for s in (0, 3, 8, 15, 100)]
+    assert values == sorted(values)
+    assert values[0] == AUTO_DENOISE_MIN_H
+    assert values[-1] < 100
+
+
+def test_auto_decision_and_metadata():
+    """干净页面跳过去噪，噪声页面按 σ 调整强度；决定记录在 last_metadata"""
+    processor = SimpleBinarizationProcessor(auto_denoise=True, cache=ResultCache())
+
+    clean = _as_input(make_document(400, 300, noise=0, seed=5, channels=1))
+    processor.apply_binarization(clean, output_format=OUTPUT_GRAY)
+    meta = processor.last_metadata
+    assert meta['denoise'] is False and meta['denoise_method'] is None
+    assert meta['noise_sigma'] < 1.0
+    assert meta['from_cache'] is False
+
+    noisy = _as_input(make_document(400, 300, noise=12, seed=5, channels=1))
+    result = processor.apply_binarization(noisy, output_format=OUTPUT_GRAY)
+    meta = processor.last_metadata
+    assert meta['denoise'] is True
+    assert meta['denoise_h'] == denoise_h_for_sigma(meta['noise_sigma'])
+    assert processor.denoise_h == 5  # 设置的参数不被修改
+
+    # 与显式使用相同 denoise_h 的结果一致，且共用缓存
+    explicit = SimpleBinarizationProcessor(denoise_h=meta['denoise_h'])
+    assert np.array_equal(np.asarray(result),
+                          np.asarray(explicit.apply_binarization(noisy, output_format=OUTPUT_GRAY)))
+    processor.apply_binarization(noisy, output_format=OUTPUT_GRAY)
+    assert processor.last_metadata['from_cache'] is True
+
+    # denoise=False 时不估计
+    processor.apply_binarization(noisy, denoise=False, output_format=OUTPUT_GRAY)
+    assert processor.last_metadata['noise_sigma'] is None
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 自动去噪测试")
+    print("=" * 80)
+
+    test_sampled_estimate_matches_full()
+    test_denoise_h_for_sigma()
+    test_auto_decision_and_metadata()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按文字尺度自动选择 block_size / c_value
+"""
+
+import sys
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, ResultCache, OUTPUT_GRAY, DENOISE_BILATERAL,
+                  estimate_text_scale, parameters_for_text_scale)
+from synthetic_docs import make_document
+
+
+def _accuracy(result, ink):
+    return float(np.mean((np.asarray(result) == 0) == ink))
+
+
+def test_scale_follows_resolution():
+    """字高跟随分辨率线性增长，PIL 输入与数组输入估计一致"""
+    heights = {}
+    for width, height in ((620, 877), (1240, 1754), (2480, 3508)):
+        page = make_document(width, height, shadow='vignette', noise=6, seed=1)
+        scale = estimate_text_scale(page)
+        glyph_h = max(5, height // 60)
+        print(f"  📏 {width}x{height}: 笔画 {scale['stroke_width']:.0f}px, "
+              f"字高 {scale['char_height']:.0f}px（生成字高 {glyph_h}px）")
+        assert abs(scale['char_height'] - glyph_h) <= 0.1 * glyph_h
+        heights[width] = scale['char_height']
+
+        block_size, c_value = parameters_for_text_scale(scale, 6.0)
+        assert block_size % 2 == 1 and block_size >= scale['char_height']
+        assert c_value > 2
+
+    assert 3.5 < heights[2480] / heights[620] < 4.5
+
+    page = make_document(800, 1100, seed=2)
+    assert estimate_text_scale(Image.fromarray(page)) == estimate_text_scale(page)
+
+
+def test_blank_page_keeps_defaults():
+    """没有文字时不调整参数"""
+    blank = make_document(600, 800, text_density=0, line_art=0, seed=0)
+    assert estimate_text_scale(blank) is None
+
+    processor = SimpleBinarizationProcessor(block_size=21, c_value=4, auto_parameters=True)
+    processor.apply_binarization(blank, denoise=False, output_format=OUTPUT_GRAY)
+    meta = processor.last_metadata
+    assert (meta['block_size'], meta['c_value']) == (21, 4)
+    assert meta['char_height'] is None
+    assert (processor.block_size, processor.c_value) == (21, 4)
+
+
+def test_accuracy_not_worse_than_default():
+    """噪声 + 阴影页面上自动参数明显优于默认 block_size=11, C=2"""
+    for backend in ['pillow'] + (['opencv'] if main_module.USE_OPENCV else []):
+        page = make_document(900, 1270, shadow='radial', noise=6, seed=3)
+        ink = make_document(900, 1270, shadow=None, noise=0, seed=3, channels=1) < 128
+        use_opencv = main_module.USE_OPENCV
+        try:
+            if backend == 'pillow':
+                main_module.USE_OPENCV = False
+                page = Image.fromarray(page)
+            accuracy = {}
+            for auto in (False, True):
+                processor = SimpleBinarizationProcessor(auto_denoise=True, auto_parameters=auto)
+                result = processor.apply_binarization(page, output_format=OUTPUT_GRAY)
+                accuracy[auto] = _accuracy(result, ink)
+        finally:
+            main_module.USE_OPENCV = use_opencv
+        print(f"  📊 {backend}: 默认 {accuracy[False]:.4f}, 自动 {accuracy[True]:.4f}")
+        assert accuracy[True] > 0.99
+        assert accuracy[True] >= accuracy[False]
+
+
+def test_estimate_is_cheap():
+    """估计耗时只是一次完整处理的一小部分"""
+    if not main_module.USE_OPENCV:
+        print("  ⏭️  OpenCV 不可用，跳过")
+        return
+    page = make_document(2480, 3508, noise=6, seed=4)
+
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        estimate_text_scale(page)
+        timings.append(time.perf_counter() - start)
+    estimate = min(timings)
+
+    processor = SimpleBinarizationProcessor(denoise_method=DENOISE_BILATERAL,
+                                            denoise_cache_size=0)
+    start = time.perf_counter()
+    processor.apply_binarization(page, output_format=OUTPUT_GRAY)
+    full = time.perf_counter() - start
+    print(f"  ⏱️  估计 {estimate * 1000:.0f} ms, 完整处理 {full * 1000:.0f} ms")
+    assert estimate < 0.25 * full
+
+
+def test_tiled_and_cache_key():
+    """分块处理使用同一组自动参数，结果与整幅一致；自动参数进入缓存键"""
+    page = make_document(600, 900, shadow='radial', noise=5, seed=5)
+    processor = SimpleBinarizationProcessor(auto_parameters=True, cache=ResultCache())
+    whole = processor.apply_binarization(page, denoise=False, output_format=OUTPUT_GRAY)
+    block_size = processor.last_metadata['block_size']
+    assert block_size != 11
+
+    tiled = processor.apply_binarization_tiled(page, denoise=False, tile_size=160,
+                                               output_format=OUTPUT_GRAY)
+    assert processor.last_metadata['block_size'] == block_size
+    assert np.array_equal(np.asarray(whole), np.asarray(tiled))
+
+    processor.auto_parameters = False
+    processor.apply_binarization(page, denoise=False, output_format=OUTPUT_GRAY)
+    assert processor.last_metadata['from_cache'] is False
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 自动参数测试")
+    print("=" * 80)
+
+    test_scale_follows_resolution()
+    test_blank_page_keeps_defaults()
+    test_accuracy_not_worse_than_default()
+    test_estimate_is_cheap()
+    test_tiled_and_cache_key()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
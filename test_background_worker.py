@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试后台处理执行器（只显示最新任务的结果）
+"""
+
+import sys
+import os
+import time
+import threading
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+from kivy.clock import Clock
+
+from main import BackgroundJobRunner
+
+
+def _pump(condition, timeout=5.0):
+    """驱动 Kivy Clock 直到条件满足"""
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('timeout waiting for Clock callbacks')
+        Clock.tick()
+        time.sleep(0.005)
+
+
+def test_only_latest_result_delivered():
+    """新任务取代旧任务：旧任务结果和未开始的任务都不会回调"""
+    runner = BackgroundJobRunner()
+    release = threading.Event()
+    started = []
+    delivered = []
+    seen_cancelled = []
+
+    def slow(job):
+        started.append('slow')
+        release.wait(5)
+        seen_cancelled.append(job.cancelled)
+        return 'slow'
+
+    def queued(job):
+        started.append('queued')
+        return 'queued'
+
+    def latest(job):
+        started.append('latest')
+        return 'latest'
+
+    try:
+        runner.submit(slow, on_done=delivered.append)
+        _pump(lambda: started == ['slow'])
+        runner.submit(queued, on_done=delivered.append)
+        runner.submit(latest, on_done=delivered.append)
+        release.set()
+
+        _pump(lambda: delivered)
+        for _ in range(5):
+            Clock.tick()
+
+        assert delivered == ['latest']
+        assert started == ['slow', 'latest']
+        assert seen_cancelled == [True]
+    finally:
+        release.set()
+        runner.shutdown()
+
+
+def test_progress_and_error_marshalled():
+    """进度和异常都在主线程回调"""
+    runner = BackgroundJobRunner()
+    main_thread = threading.current_thread()
+    progress = []
+    errors = []
+
+    def work(job):
+        job.progress('halfway')
+        raise ValueError('boom')
+
+    def on_progress(value):
+        assert threading.current_thread() is main_thread
+        progress.append(value)
+
+    def on_error(error):
+        assert threading.current_thread() is main_thread
+        errors.append(error)
+
+    try:
+        runner.submit(work, on_done=lambda r: None, on_error=on_error,
+                      on_progress=on_progress)
+        _pump(lambda: errors)
+        assert progress == ['halfway']
+        assert isinstance(errors[0], ValueError)
+    finally:
+        runner.shutdown()
+
+
+def test_cancel_discards_running_job():
+    """cancel() 后正在运行的任务结果被丢弃"""
+    runner = BackgroundJobRunner()
+    release = threading.Event()
+    delivered = []
+    finished = threading.Event()
+
+    def work(job):
+        release.wait(5)
+        finished.set()
+        return 'done'
+
+    try:
+        runner.submit(work, on_done=delivered.append)
+        runner.cancel()
+        release.set()
+        finished.wait(5)
+        for _ in range(10):
+            Clock.tick()
+            time.sleep(0.005)
+        assert delivered == []
+    finally:
+        runner.shutdown()
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 后台处理执行器测试")
+    print("=" * 80)
+
+    test_only_latest_result_delivered()
+    test_progress_and_error_marshalled()
+    test_cancel_discards_running_job()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量二值化命令行
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import batch_binarize
+
+
+def _make_inputs(root, count=4):
+    """生成若干测试图片"""
+    rng = np.random.default_rng(0)
+    os.makedirs(os.path.join(root, 'sub'), exist_ok=True)
+    paths = []
+    for i in range(count):
+        arr = rng.integers(150, 256, size=(60, 80), dtype=np.uint8)
+        arr[20:30, 10:70] = 0
+        folder = root if i % 2 == 0 else os.path.join(root, 'sub')
+        path = os.path.join(folder, f'page_{i}.png')
+        Image.fromarray(arr).convert('RGB').save(path)
+        paths.append(path)
+    return paths
+
+
+def test_collect_inputs_order():
+    """目录、glob 和文件列表按输入顺序展开"""
+    with tempfile.TemporaryDirectory() as tmp:
+        in_dir = os.path.join(tmp, 'in')
+        paths = _make_inputs(in_dir)
+
+        list_file = os.path.join(tmp, 'list.txt')
+        with open(list_file, 'w', encoding='utf-8') as f:
+            f.write(paths[3] + '\n' + paths[0] + '\n')
+
+        items = batch_binarize.collect_inputs([
+            '@' + list_file,
+            os.path.join(in_dir, 'sub', '*.png'),
+            in_dir,
+        ])
+        names = [str(rel) for _, rel in items]
+
+        assert names[:2] == ['page_3.png', 'page_0.png']
+        assert names[2:4] == ['page_1.png', 'page_3.png']
+        assert names[4:] == ['page_0.png', 'page_2.png',
+                             os.path.join('sub', 'page_1.png'),
+                             os.path.join('sub', 'page_3.png')]
+
+
+def test_batch_run_and_skip():
+    """多进程处理后，再次运行跳过已完成文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        in_dir = os.path.join(tmp, 'in')
+        out_dir = os.path.join(tmp, 'out')
+        _make_inputs(in_dir)
+
+        tasks = batch_binarize.plan_outputs(
+            batch_binarize.collect_inputs([in_dir]), out_dir, 'png1')
+
+        results = list(batch_binarize.run_batch(tasks, workers=2))
+        assert [r[0] for r in results] == ['ok'] * 4
+        assert [r[1] for r in results] == [str(src) for src, _ in tasks]
+        assert [r[3] for r in results] == [1] * 4
+        for _, dst in tasks:
+            assert os.path.exists(dst)
+            values = np.unique(np.array(Image.open(dst).convert('L')))
+            assert set(values.tolist()) <= {0, 255}
+
+        results = list(batch_binarize.run_batch(tasks, workers=2))
+        assert [r[0] for r in results] == ['skipped'] * 4
+        assert [r[3] for r in results] == [0] * 4
+
+        results = list(batch_binarize.run_batch(tasks, workers=1, force=True))
+        assert [r[0] for r in results] == ['ok'] * 4
+
+
+def test_name_collision():
+    """不同目录下的同名文件展开到同一输出时报错"""
+    items = [(batch_binarize.Path('a/x.png'), batch_binarize.Path('x.png')),
+             (batch_binarize.Path('b/x.jpg'), batch_binarize.Path('x.jpg'))]
+    try:
+        batch_binarize.plan_outputs(items, 'out', 'png')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('collision not detected')
+
+    # TIFF 可能是多页文档（输出 .tif），与 PDF 的输出重名
+    items = [(batch_binarize.Path('a/x.tiff'), batch_binarize.Path('x.tiff')),
+             (batch_binarize.Path('b/x.pdf'), batch_binarize.Path('x.pdf'))]
+    try:
+        batch_binarize.plan_outputs(items, 'out', 'png')
+    except ValueError:
+        return
+    raise AssertionError('collision not detected')
+
+
+def test_plan_does_not_open_inputs():
+    """规划输出只看扩展名（多页 TIFF 的判断留给工作进程），输入文件不存在也不报错"""
+    probe = batch_binarize.is_document_file
+
+    def failing_probe(path):
+        raise AssertionError(f'plan_outputs opened {path}')
+
+    batch_binarize.is_document_file = failing_probe
+    try:
+        items = [(batch_binarize.Path(f'missing/p{i}.tif'), batch_binarize.Path(f'p{i}.tif'))
+                 for i in range(3)] + [(batch_binarize.Path('missing/d.pdf'),
+                                        batch_binarize.Path('d.pdf'))]
+        tasks = batch_binarize.plan_outputs(items, 'out', 'png1')
+    finally:
+        batch_binarize.is_document_file = probe
+    assert [dst.name for _, dst in tasks] == ['p0.png', 'p1.png', 'p2.png', 'd.tif']
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 批量二值化测试")
+    print("=" * 80)
+
+    test_collect_inputs_order()
+    test_batch_run_and_skip()
+    test_name_collision()
+    test_plan_does_not_open_inputs()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
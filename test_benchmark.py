@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分阶段基准测试工具
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import time
+import benchmark
+from main import USE_OPENCV, SimpleBinarizationProcessor
+
+
+def test_run_benchmark_structure():
+    """每个后端、尺寸、阶段都有中位数和 p95"""
+    backends = ['opencv', 'pillow'] if USE_OPENCV else ['pillow']
+    results = benchmark.run_benchmark(backends, [(64, 48)], repeat=3, warmup=1)
+
+    for backend in backends:
+        for stage in benchmark.STAGES + ('total',):
+            stats = results[f'{backend}/64x48/{stage}']
+            assert stats['samples'] == 3
+            assert 0 <= stats['median_ms'] <= stats['p95_ms']
+
+
+def test_output_formats():
+    """彩色输出时 output 阶段计时 3 通道扩展；基线与本次的输出格式不同时拒绝对比"""
+    from main import OUTPUT_COLOR, OUTPUT_PACKED
+    backends = ['opencv', 'pillow'] if USE_OPENCV else ['pillow']
+    for output_format in (OUTPUT_COLOR, OUTPUT_PACKED):
+        results = benchmark.run_benchmark(backends, [(64, 48)], repeat=1, warmup=0,
+                                          output_format=output_format)
+        for backend in backends:
+            assert results[f'{backend}/64x48/output']['samples'] == 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'baseline.json')
+        argv = ['--backends', 'pillow', '--sizes', '32x24', '--repeat', '1', '--warmup', '0']
+        assert benchmark.main(argv + ['--output-format', 'color', '--save-baseline', path]) == 0
+        assert benchmark.main(argv + ['--baseline', path]) == 2
+
+
+class SlowThresholdProcessor(SimpleBinarizationProcessor):
+    """阈值阶段人为变慢的处理器"""
+
+    def _threshold_stack(self, gray, prefix):
+        time.sleep(0.03)
+        return super()._threshold_stack(gray, prefix)
+
+
+def test_measures_shipped_processor():
+    """计时的是处理器本身：处理器内部变慢时对应阶段随之变慢"""
+    normal = benchmark.run_benchmark(['pillow'], [(64, 48)], repeat=2, warmup=0)
+    slow = benchmark.run_benchmark(['pillow'], [(64, 48)], repeat=2, warmup=0,
+                                   processor=SlowThresholdProcessor(denoise_cache_size=0))
+    assert slow['pillow/64x48/threshold']['median_ms'] >= 30
+    assert normal['pillow/64x48/threshold']['median_ms'] < 30
+    assert benchmark.compare(slow, normal, max_regression=20, min_ms=0)
+
+
+def test_compare_detects_regression():
+    """超过阈值的阶段被报告，低于噪声下限的阶段被忽略"""
+    baseline = {
+        'opencv/64x48/denoise': {'median_ms': 10.0},
+        'opencv/64x48/gray': {'median_ms': 0.1},
+        'opencv/64x48/threshold': {'median_ms': 5.0},
+    }
+    results = {
+        'opencv/64x48/denoise': {'median_ms': 13.0},
+        'opencv/64x48/gray': {'median_ms': 0.5},
+        'opencv/64x48/threshold': {'median_ms': 5.5},
+        'opencv/64x48/new_stage': {'median_ms': 1.0},
+    }
+
+    regressions = benchmark.compare(results, baseline, max_regression=20)
+    assert [r[0] for r in regressions] == ['opencv/64x48/denoise']
+    assert abs(regressions[0][3] - 30.0) < 1e-9
+
+
+def test_main_baseline_roundtrip():
+    """保存基线后与自身对比（放宽阈值）返回 0"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'baseline.json')
+        argv = ['--backends', 'pillow', '--sizes', '32x24', '--repeat', '2', '--warmup', '0']
+        assert benchmark.main(argv + ['--save-baseline', path]) == 0
+
+        with open(path, encoding='utf-8') as f:
+            assert 'pillow/32x24/total' in json.load(f)['results']
+
+        assert benchmark.main(argv + ['--baseline', path, '--max-regression', '100000']) == 0
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 基准测试工具测试")
+    print("=" * 80)
+
+    test_run_benchmark_structure()
+    test_output_formats()
+    test_measures_shipped_processor()
+    test_compare_detects_regression()
+    test_main_baseline_roundtrip()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
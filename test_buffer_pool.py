@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试处理器的临时缓冲区池：同一尺寸重复处理时只分配返回的结果（tracemalloc 统计）
+"""
+
+import sys
+import os
+import tracemalloc
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, PackedBitmap, OUTPUT_GRAY, OUTPUT_COLOR,
+                  OUTPUT_PACKED, DENOISE_BILATERAL, DENOISE_MEDIAN)
+from synthetic_docs import make_document
+
+# 除结果外允许的分配（索引数组、NumPy 迭代缓冲、Python 对象等小块内存）
+SLACK_BYTES = 256 * 1024
+
+
+def _backends():
+    return ['pillow'] + (['opencv'] if main_module.USE_OPENCV else [])
+
+
+def _peak_allocation(function):
+    """function() 执行期间新分配内存的峰值（字节）及其返回值"""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = function()
+        return tracemalloc.get_traced_memory()[1] - base, result
+    finally:
+        tracemalloc.stop()
+
+
+def test_repeated_calls_allocate_only_result():
+    """预热后，同尺寸的新页面（缓存未命中）只分配结果本身"""
+    width, height = 1200, 900
+    pages = [make_document(width, height, shadow='radial', noise=5, seed=i, channels=1)
+             for i in range(4)]
+    color_pages = [make_document(width, height, noise=5, seed=i) for i in range(4)]
+    expected = {OUTPUT_GRAY: width * height, OUTPUT_PACKED: height * -(-width // 8),
+                OUTPUT_COLOR: 0 if not main_module.USE_OPENCV else 3 * width * height}
+
+    for backend in _backends():
+        use_opencv = main_module.USE_OPENCV
+        try:
+            main_module.USE_OPENCV = backend == 'opencv'
+            methods = [DENOISE_BILATERAL, DENOISE_MEDIAN] if backend == 'opencv' else [DENOISE_MEDIAN]
+            for method in methods:
+                for denoise_cache_size in (0, 2):
+                    processor = SimpleBinarizationProcessor(denoise_method=method,
+                                                            denoise_cache_size=denoise_cache_size)
+                    inputs = pages if backend == 'pillow' else pages + color_pages
+                    for output_format, result_bytes in expected.items():
+                        if backend == 'pillow' and output_format == OUTPUT_COLOR:
+                            # Pillow 彩色结果由 PIL 分配（不经过 tracemalloc）
+                            result_bytes = 0
+                        # 预热：缓冲区池和去噪缓存填满
+                        for page in inputs[:3]:
+                            processor.apply_binarization(page, output_format=output_format)
+                        for page in inputs[3:4] + inputs[-1:]:
+                            peak, result = _peak_allocation(
+                                lambda: processor.apply_binarization(
+                                    page, output_format=output_format))
+                            assert peak <= result_bytes + SLACK_BYTES, \
+                                (backend, method, denoise_cache_size, output_format, peak)
+        finally:
+            main_module.USE_OPENCV = use_opencv
+    print(f"  📊 {width}x{height} 页面：每次调用只分配结果（另有不超过 {SLACK_BYTES // 1024} KB 的小块）")
+
+
+def test_results_are_fresh():
+    """返回的结果不与缓冲区池共享内存，下次处理不会覆盖上次的结果"""
+    first_page = make_document(400, 300, seed=0, channels=1)
+    second_page = make_document(400, 300, seed=1, channels=1)
+    for backend in _backends():
+        use_opencv = main_module.USE_OPENCV
+        try:
+            main_module.USE_OPENCV = backend == 'opencv'
+            for output_format in (OUTPUT_GRAY, OUTPUT_COLOR, OUTPUT_PACKED):
+                processor = SimpleBinarizationProcessor(denoise_method=DENOISE_MEDIAN)
+                first = processor.apply_binarization(first_page, output_format=output_format)
+                snapshot = (first.unpack() if isinstance(first, PackedBitmap)
+                            else np.array(first))
+                second = processor.apply_binarization(second_page, output_format=output_format)
+                again = first.unpack() if isinstance(first, PackedBitmap) else np.asarray(first)
+                assert np.array_equal(again, snapshot), (backend, output_format)
+                for buffer in processor._buffers.values():
+                    data = first.data if isinstance(first, PackedBitmap) else np.asarray(first)
+                    assert not np.shares_memory(buffer, data)
+                assert not np.array_equal(snapshot, second.unpack() if isinstance(
+                    second, PackedBitmap) else np.asarray(second))
+        finally:
+            main_module.USE_OPENCV = use_opencv
+
+
+def test_pool_keeps_proxy_and_full_size():
+    """预览代理图与全分辨率图交替处理时，两种尺寸的缓冲区都保留"""
+    page = make_document(1600, 1200, seed=2, channels=1)
+    for backend in _backends():
+        use_opencv = main_module.USE_OPENCV
+        try:
+            main_module.USE_OPENCV = backend == 'opencv'
+            processor = SimpleBinarizationProcessor(denoise_method=DENOISE_MEDIAN)
+            processor.apply_binarization_preview(page)
+            processor.apply_binarization(page, output_format=OUTPUT_GRAY)
+            buffers = {key: id(buffer) for key, buffer in processor._buffers.items()}
+            shapes = {key[1] for key in buffers}
+            assert len(shapes) >= 2
+
+            processor.apply_binarization_preview(page)
+            processor.apply_binarization(page, output_format=OUTPUT_GRAY)
+            assert {key: id(buffer) for key, buffer in processor._buffers.items()} == buffers
+
+            # 第三种尺寸：每个名称最多保留 BUFFER_POOL_SHAPES 种
+            processor.apply_binarization(page[:500, :700], output_format=OUTPUT_GRAY)
+            names = [key[0] for key in processor._buffers]
+            assert max(names.count(name) for name in names) <= main_module.BUFFER_POOL_SHAPES
+        finally:
+            main_module.USE_OPENCV = use_opencv
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 临时缓冲区池测试")
+    print("=" * 80)
+
+    test_repeated_calls_allocate_only_result()
+    test_results_are_fresh()
+    test_pool_keeps_proxy_and_full_size()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
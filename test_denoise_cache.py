@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试去噪中间结果缓存（只调整阈值参数时跳过去噪）
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import SimpleBinarizationProcessor, OUTPUT_GRAY
+
+
+def _make_image(h=900, w=1200):
+    rng = np.random.default_rng(0)
+    gray = rng.normal(190, 20, size=(h, w))
+    gray[100:130, 50:1100] = 40
+    gray = gray.clip(0, 255).astype(np.uint8)
+    return np.repeat(gray[:, :, None], 3, axis=2)
+
+
+def test_threshold_change_reuses_denoise():
+    """只改 block_size / C 时复用去噪结果，结果与不缓存时一致"""
+    if not main_module.USE_OPENCV:
+        print("⚠️  OpenCV 不可用，跳过")
+        return
+
+    image = _make_image()
+    processor = SimpleBinarizationProcessor()
+
+    start = time.perf_counter()
+    processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    first_ms = (time.perf_counter() - start) * 1000
+
+    processor.set_parameters(21, 6, 5)
+    start = time.perf_counter()
+    tuned = processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    tuned_ms = (time.perf_counter() - start) * 1000
+
+    print(f"  ⏱️  first {first_ms:.1f} ms, threshold-only change {tuned_ms:.1f} ms")
+    assert tuned_ms < first_ms / 5
+
+    fresh = SimpleBinarizationProcessor(21, 6, 5, denoise_cache_size=0)
+    assert np.array_equal(tuned, fresh.apply_binarization(image, output_format=OUTPUT_GRAY))
+
+
+def test_denoise_h_change_recomputes():
+    """denoise_h 变化时重新去噪，缓存条数受限"""
+    if not main_module.USE_OPENCV:
+        print("⚠️  OpenCV 不可用，跳过")
+        return
+
+    image = _make_image(200, 300)
+    processor = SimpleBinarizationProcessor(denoise_cache_size=2)
+    for h in (3, 5, 7):
+        processor.set_parameters(11, 2, h)
+        processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+
+    assert len(processor._denoise_cache) == 2
+    assert sorted(key[1] for key in processor._denoise_cache) == [5, 7]
+
+    strong = processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    fresh = SimpleBinarizationProcessor(11, 2, 7, denoise_cache_size=0)
+    assert np.array_equal(strong, fresh.apply_binarization(image, output_format=OUTPUT_GRAY))
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 去噪缓存测试")
+    print("=" * 80)
+
+    test_threshold_change_reuses_denoise()
+    test_denoise_h_change_recomputes()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
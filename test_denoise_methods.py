@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试去噪方法选择、噪声估计和噪声门限
+"""
+
+import sys
+import os
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, ResultCache, OUTPUT_GRAY, DENOISE_METHODS,
+                  DENOISE_BILATERAL, DENOISE_MEDIAN, DENOISE_HYBRID,
+                  estimate_noise_sigma, select_denoise_method)
+from synthetic_docs import make_document
+
+
+def _as_input(gray):
+    if main_module.USE_OPENCV:
+        return np.repeat(gray[:, :, None], 3, axis=2)
+    return Image.fromarray(gray).convert('RGB')
+
+
+def test_estimate_noise_sigma():
+    """噪声估计接近真实 σ，文字和阴影不影响估计"""
+    for sigma in (0, 3, 8, 15):
+        page = make_document(600, 450, noise=sigma, shadow='radial', seed=2, channels=1)
+        estimate = estimate_noise_sigma(page)
+        print(f"  📏 σ={sigma}: 估计 {estimate:.2f}")
+        assert abs(estimate - sigma) < max(1.0, 0.2 * sigma)
+
+
+def test_select_by_budget():
+    """按预算选择质量最好的方法，预算不足时返回 None"""
+    costs = {DENOISE_BILATERAL: 10.0, DENOISE_MEDIAN: 1.0}
+    assert select_denoise_method(1000, 1000, 50, costs) == DENOISE_BILATERAL
+    assert select_denoise_method(4000, 3000, 50, costs) == DENOISE_MEDIAN
+    assert select_denoise_method(4000, 3000, 5, costs) is None
+    assert select_denoise_method(1000, 1000, 1e9) in DENOISE_METHODS
+
+
+def test_methods_denoise_and_tile():
+    """每种方法都降低噪声，分块结果与整幅一致"""
+    if not main_module.USE_OPENCV:
+        print("  ⏭️  OpenCV 不可用，跳过")
+        return
+    # 无文字的平坦页面（hybrid 会模糊小字号文字，这里只比较去噪效果）
+    flat = dict(shadow=None, text_density=0, line_art=0, channels=1)
+    clean = make_document(320, 240, noise=0, **flat)
+    noisy = make_document(320, 240, noise=10, **flat)
+    image = _as_input(make_document(320, 240, noise=10, seed=1, channels=1))
+    for method in DENOISE_METHODS:
+        processor = SimpleBinarizationProcessor(block_size=15, denoise_method=method)
+        denoised = processor._denoise_opencv(noisy)
+        error = np.abs(denoised.astype(float) - clean).mean()
+        assert error < np.abs(noisy.astype(float) - clean).mean(), method
+
+        whole = processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+        tiled = processor.apply_binarization_tiled(image, tile_size=96, output_format=OUTPUT_GRAY)
+        assert np.array_equal(np.asarray(whole), np.asarray(tiled)), method
+
+
+def test_noise_gate():
+    """干净页面跳过去噪（与 denoise=False 结果相同），噪声页面仍去噪"""
+    clean = _as_input(make_document(320, 240, noise=0, seed=3, channels=1))
+    noisy = _as_input(make_document(320, 240, noise=10, seed=3, channels=1))
+    gated = SimpleBinarizationProcessor(noise_gate=2.0)
+    plain = SimpleBinarizationProcessor()
+
+    assert np.array_equal(np.asarray(gated.apply_binarization(clean, output_format=OUTPUT_GRAY)),
+                          np.asarray(plain.apply_binarization(clean, denoise=False,
+                                                              output_format=OUTPUT_GRAY)))
+    assert np.array_equal(np.asarray(gated.apply_binarization(noisy, output_format=OUTPUT_GRAY)),
+                          np.asarray(plain.apply_binarization(noisy, output_format=OUTPUT_GRAY)))
+
+    # 门限和方法进入缓存键
+    processor = SimpleBinarizationProcessor(cache=ResultCache())
+    processor.apply_binarization(clean, output_format=OUTPUT_GRAY)
+    processor.set_denoise_method(DENOISE_HYBRID, noise_gate=2.0)
+    processor.apply_binarization(clean, output_format=OUTPUT_GRAY)
+    assert processor.cache.misses == 2
+
+    try:
+        processor.set_denoise_method('wavelet')
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 去噪方法测试")
+    print("=" * 80)
+
+    test_estimate_noise_sigma()
+    test_select_by_budget()
+    test_methods_denoise_and_tile()
+    test_noise_gate()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
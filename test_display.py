@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试界面显示缓冲区与纹理复用（不需要 OpenGL：用记录调用的假纹理代替）
+"""
+
+import sys
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, TextureSlot, PackedBitmap, OUTPUT_GRAY,
+                  PREVIEW_MAX_SIZE, display_buffer)
+from synthetic_docs import make_document
+
+
+class FakeTexture:
+    """记录 blit_buffer 调用的纹理"""
+
+    def __init__(self, size, colorfmt):
+        self.size = size
+        self.colorfmt = colorfmt
+        self.blits = []
+
+    def flip_vertical(self):
+        pass
+
+    def blit_buffer(self, pbuffer, colorfmt, bufferfmt):
+        assert colorfmt == self.colorfmt and bufferfmt == 'ubyte'
+        # 与 Kivy 相同：ubyte 缓冲区必须是一维、C 连续、大小与纹理一致
+        view = memoryview(pbuffer)
+        assert view.ndim == 1 and view.c_contiguous and view.itemsize == 1, view.shape
+        channels = 1 if colorfmt == 'luminance' else 3
+        assert view.nbytes == self.size[0] * self.size[1] * channels
+        self.blits.append(pbuffer)
+
+
+class FakeCanvas:
+    def __init__(self):
+        self.updates = 0
+
+    def ask_update(self):
+        self.updates += 1
+
+
+class FakeWidget:
+    def __init__(self):
+        self.texture = None
+        self.canvas = FakeCanvas()
+
+
+def _slot():
+    created = []
+
+    def create(size, colorfmt):
+        created.append(FakeTexture(size, colorfmt))
+        return created[-1]
+
+    return TextureSlot(FakeWidget(), create=create), created
+
+
+def test_buffer_formats():
+    """二值结果为单通道 luminance，彩色原图为 RGB；缓冲区 C 连续且宽度为 4 的倍数"""
+    page = make_document(1203, 1701, seed=0)
+    gray = make_document(1203, 1701, seed=0, channels=1)
+    binary = SimpleBinarizationProcessor().apply_binarization(gray, denoise=False,
+                                                              output_format=OUTPUT_GRAY)
+    packed = PackedBitmap.from_binary(np.asarray(binary) >= 128)
+
+    for image, colorfmt in ((binary, 'luminance'), (packed, 'luminance'), (page, 'rgb'),
+                            (Image.fromarray(gray), 'luminance'),
+                            (Image.fromarray(page[:, :, ::-1]), 'rgb')):
+        buffer, fmt = display_buffer(image)
+        assert fmt == colorfmt, type(image)
+        assert buffer.flags['C_CONTIGUOUS'] and buffer.dtype == np.uint8
+        assert max(buffer.shape[:2]) <= PREVIEW_MAX_SIZE and buffer.shape[1] % 4 == 0
+        assert abs(buffer.shape[0] - 400) <= 1 and abs(buffer.shape[1] - 283) <= 4
+
+    if main_module.USE_OPENCV:
+        # OpenCV 图像为 BGR：显示缓冲区为 RGB
+        red = np.zeros((8, 8, 3), np.uint8)
+        red[:, :, 2] = 255
+        buffer, _ = display_buffer(red)
+        assert (buffer[0, 0] == (255, 0, 0)).all()
+
+    # 已经缩小的单通道缓冲区原样返回（工作线程准备，主线程不再复制）
+    small, _ = display_buffer(binary)
+    again, _ = display_buffer(small)
+    assert again is small or np.shares_memory(again, small)
+
+
+def test_texture_reused():
+    """同尺寸更新原地 blit，同一图像不重复上传，格式或尺寸变化才创建纹理"""
+    slot, created = _slot()
+    first = np.zeros((300, 400), np.uint8)
+    second = np.full((300, 400), 255, np.uint8)
+
+    assert slot.show(first) and slot.show(second)
+    assert len(created) == 1 and len(created[0].blits) == 2
+    assert slot.widget.texture is created[0] and slot.widget.canvas.updates == 1
+
+    assert not slot.show(second)
+    assert len(created[0].blits) == 2
+
+    slot.show(np.zeros((300, 400, 3), np.uint8))
+    assert len(created) == 2 and created[1].colorfmt == 'rgb'
+    slot.show(np.zeros((200, 400), np.uint8))
+    assert len(created) == 3 and created[2].size == (400, 200)
+
+
+def test_refresh_cost():
+    """工作线程准备好的缓冲区，主线程每次刷新远小于 1 毫秒"""
+    slot, created = _slot()
+    buffers = [display_buffer(make_document(1240, 1754, seed=i, channels=1))[0]
+               for i in range(2)]
+    slot.show(buffers[0])
+
+    timings = []
+    for i in range(200):
+        start = time.perf_counter()
+        slot.show(buffers[(i + 1) % 2])
+        timings.append(time.perf_counter() - start)
+    median = sorted(timings)[len(timings) // 2]
+    print(f"  ⏱️  每次刷新 {median * 1e6:.0f} µs")
+    assert len(created) == 1
+    assert median < 0.5e-3
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 显示缓冲区 / 纹理复用测试")
+    print("=" * 80)
+
+    test_buffer_formats()
+    test_texture_reused()
+    test_refresh_cost()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
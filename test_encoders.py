@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试二值图输出编码器（1 位 PNG、CCITT G4 TIFF、多页 TIFF）
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+from main import (PackedBitmap, OUTPUT_ENCODERS, encoder_for_path,
+                  save_image_file, save_multipage_file)
+
+
+def _make_binary(h=120, w=170, seed=0):
+    """随机 0/255 二值图"""
+    rng = np.random.default_rng(seed)
+    return (rng.random((h, w)) > 0.7).astype(np.uint8) * 255
+
+
+def test_bilevel_roundtrip():
+    """1 位编码器无损保存，输入可以是灰度、3 通道或打包格式"""
+    binary = _make_binary()
+    inputs = [binary, np.repeat(binary[:, :, None], 3, axis=2),
+              PackedBitmap.from_binary(binary)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for encoder in ('png1', 'tiff-g4'):
+            ext = OUTPUT_ENCODERS[encoder][1]
+            for i, image in enumerate(inputs):
+                path = os.path.join(tmp, f'{encoder}_{i}{ext}')
+                save_image_file(path, image, encoder=encoder)
+
+                saved = Image.open(path)
+                assert saved.mode == '1'
+                if encoder == 'tiff-g4':
+                    assert saved.info.get('compression') == 'group4'
+                assert np.array_equal(np.array(saved.convert('L')), binary)
+
+
+def test_encoder_from_extension():
+    """未指定编码器时按扩展名选择"""
+    assert encoder_for_path('a/b.JPG') == 'jpeg'
+    assert encoder_for_path('a/b.tif') == 'tiff-g4'
+    assert encoder_for_path('a/b.png') == 'png'
+    assert encoder_for_path('a/b.png', bilevel=True) == 'png1'
+
+
+def test_multipage_tiff():
+    """多页 G4 TIFF 逐页写入，页序保持"""
+    pages = [_make_binary(seed=i) for i in range(3)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'doc.tif')
+        count = save_multipage_file(path, (PackedBitmap.from_binary(p) for p in pages))
+        assert count == 3
+
+        with Image.open(path) as doc:
+            assert doc.n_frames == 3
+            for i, page in enumerate(pages):
+                doc.seek(i)
+                assert np.array_equal(np.array(doc.convert('L')), page)
+
+
+def test_bilevel_smaller_than_jpeg():
+    """1 位格式明显小于旧的 JPEG 输出"""
+    binary = np.full((400, 600), 255, dtype=np.uint8)
+    binary[50:350:12, 40:560] = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = {}
+        for encoder in ('jpeg', 'png1', 'tiff-g4'):
+            path = os.path.join(tmp, 'out' + OUTPUT_ENCODERS[encoder][1])
+            save_image_file(path, binary, encoder=encoder)
+            sizes[encoder] = os.path.getsize(path)
+
+        print(f"  📦 {sizes}")
+        assert sizes['png1'] < sizes['jpeg']
+        assert sizes['tiff-g4'] < sizes['jpeg']
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 输出编码器测试")
+    print("=" * 80)
+
+    test_bilevel_roundtrip()
+    test_encoder_from_extension()
+    test_multipage_tiff()
+    test_bilevel_smaller_than_jpeg()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
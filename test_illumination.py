@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试低分辨率光照场估计和归一化
+"""
+
+import sys
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, IlluminationField, OUTPUT_GRAY, OUTPUT_PACKED,
+                  THRESHOLD_GLOBAL, THRESHOLD_SAUVOLA)
+from synthetic_docs import make_document, shadow_field
+
+
+def _shadowed_page(width, height, kind, low_contrast=False, seed=0):
+    """带阴影页面和真实文字掩码"""
+    ink = make_document(width, height, shadow=None, noise=0, line_art=0, seed=seed, channels=1) < 128
+    paper, text = (190.0, 150.0) if low_contrast else (235.0, 30.0)
+    rng = np.random.default_rng(seed)
+    page = np.where(ink, text, paper) * shadow_field(width, height, kind, 0.7, seed=1)
+    page += rng.normal(0, 3, size=page.shape)
+    return page.clip(0, 255).astype(np.uint8), ink
+
+
+def _as_input(gray):
+    if main_module.USE_OPENCV:
+        return np.repeat(gray[:, :, None], 3, axis=2)
+    return Image.fromarray(gray).convert('RGB')
+
+
+def test_field_tracks_shadow():
+    """估计的背景与真实纸张亮度接近"""
+    page, _ = _shadowed_page(1240, 1754, 'linear')
+    field = IlluminationField.estimate(page)
+    assert max(field.background.shape) <= 256
+    background = field.upsample(0, 1754, 0, 1240)
+    truth = 235.0 * shadow_field(1240, 1754, 'linear', 0.7)
+    assert np.median(np.abs(background - truth) / truth) < 0.05
+
+
+def test_region_upsample_matches_whole():
+    """任意区域的插值与整幅插值的对应部分逐位一致"""
+    page, _ = _shadowed_page(700, 500, 'radial')
+    field = IlluminationField.estimate(page, max_size=64)
+    whole = field.upsample(0, 500, 0, 700)
+    assert np.array_equal(field.upsample(123, 321, 45, 678), whole[123:321, 45:678])
+    assert np.array_equal(field.normalize(page[100:200, 50:150], origin=(100, 50)),
+                          field.normalize(page)[100:200, 50:150])
+
+
+def test_normalized_global_threshold():
+    """归一化 + 全局阈值：各种阴影下都准确，且与 block_size 无关"""
+    for kind in ('linear', 'radial', 'vignette'):
+        for low_contrast in (False, True):
+            page, ink = _shadowed_page(620, 877, kind, low_contrast)
+            results = []
+            for block_size in (11, 101):
+                processor = SimpleBinarizationProcessor(block_size=block_size,
+                                                        threshold_method=THRESHOLD_GLOBAL,
+                                                        normalize_illumination=True)
+                results.append(np.asarray(processor.apply_binarization(
+                    _as_input(page), denoise=False, output_format=OUTPUT_GRAY)))
+            accuracy = np.mean((results[0] == 0) == ink)
+            print(f"  📊 {kind}{' (low contrast)' if low_contrast else ''}: {accuracy:.4f}")
+            assert accuracy > 0.99
+            assert np.array_equal(results[0], results[1])
+
+
+def test_tiled_matches_whole():
+    """归一化后分块结果与整幅结果逐位一致"""
+    page, _ = _shadowed_page(400, 300, 'vignette')
+    image = _as_input(page)
+    processor = SimpleBinarizationProcessor(block_size=21, threshold_method=THRESHOLD_SAUVOLA,
+                                            normalize_illumination=True)
+    whole = processor.apply_binarization(image, output_format=OUTPUT_PACKED)
+    tiled = processor.apply_binarization_tiled(image, tile_size=128, output_format=OUTPUT_PACKED)
+    assert np.array_equal(whole.data, tiled.data)
+
+
+def test_estimate_is_cheap():
+    """光照场估计只占整幅处理的一小部分"""
+    page = _as_input(make_document(2480, 3508, channels=1))
+    start = time.perf_counter()
+    IlluminationField.estimate(page)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"  ⏱️  2480x3508 光照场估计: {elapsed:.0f} ms")
+    assert elapsed < 2000
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 光照归一化测试")
+    print("=" * 80)
+
+    test_field_tracks_shadow()
+    test_region_upsample_matches_whole()
+    test_normalized_global_threshold()
+    test_tiled_matches_whole()
+    test_estimate_is_cheap()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试灰度直读 / 缩小解码 / 延迟解码句柄
+"""
+
+import sys
+import os
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, ImageHandle, PREVIEW_MAX_SIZE,
+                  load_image_file, load_grayscale_file)
+from synthetic_docs import make_document
+
+
+def _save_jpeg(tmp, width=2480, height=3508):
+    path = os.path.join(tmp, 'page.jpg')
+    page = make_document(width, height, shadow='radial', seed=0)
+    Image.fromarray(page[:, :, ::-1]).save(path, quality=90)
+    return path
+
+
+def _backends():
+    return ['pillow'] + (['opencv'] if main_module.USE_OPENCV else [])
+
+
+def _shape(image):
+    return np.asarray(image).shape
+
+
+def test_reduced_decode():
+    """JPEG 按最长边选择 1/2 ~ 1/8 缩小解码，灰度 / 彩色两种结果"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _save_jpeg(tmp)
+        handle = ImageHandle(path)
+        assert handle.size == (2480, 3508) and handle.format == 'JPEG'
+        assert handle.reduced_factor(400) == 8
+        assert handle.reduced_factor(1000) == 2
+        assert handle.reduced_factor(5000) == 1
+
+        for backend in _backends():
+            use_opencv = main_module.USE_OPENCV
+            try:
+                main_module.USE_OPENCV = backend == 'opencv'
+                gray = handle.reduced(400)
+                color = handle.reduced(400, color=True)
+            finally:
+                main_module.USE_OPENCV = use_opencv
+            assert abs(_shape(gray)[0] - 3508 / 8) <= 1 and len(_shape(gray)) == 2, backend
+            assert _shape(color)[2] == 3 and _shape(color)[:2] == _shape(gray), backend
+
+        assert ImageHandle.open(os.path.join(tmp, 'missing.jpg')) is None
+
+
+def test_lazy_full_resolution():
+    """打开句柄不解码像素；gray() 解码一次后复用，release() 释放"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _save_jpeg(tmp, 640, 480)
+        handle = ImageHandle(path)
+        assert handle._gray is None
+
+        gray = handle.gray()
+        assert gray.shape == (480, 640) and gray.dtype == np.uint8
+        assert handle.gray() is gray
+
+        # 直接解码的亮度通道与 3 通道解码后转换几乎一致
+        color = np.asarray(load_image_file(path))
+        if main_module.USE_OPENCV:
+            reference = main_module.cv2.cvtColor(color, main_module.cv2.COLOR_BGR2GRAY)
+        else:
+            reference = np.asarray(Image.fromarray(color).convert('L'))
+        assert np.abs(gray.astype(int) - reference).max() <= 3
+
+        handle.release()
+        assert handle._gray is None
+
+
+def test_grayscale_decode_uses_less_memory():
+    """直接灰度解码的峰值分配约为 3 通道解码 + 转换的 1/3"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _save_jpeg(tmp)
+        peaks, timings = {}, {}
+        for name, load in (('color', lambda: main_module._gray_of(load_image_file(path))),
+                           ('gray', lambda: load_grayscale_file(path))):
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                load()
+                timings[name] = time.perf_counter() - start
+                peaks[name] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    print(f"  📊 3 通道解码 {peaks['color'] / 1e6:.1f} MB / {timings['color'] * 1000:.0f} ms, "
+          f"灰度解码 {peaks['gray'] / 1e6:.1f} MB / {timings['gray'] * 1000:.0f} ms")
+    assert peaks['gray'] < 0.5 * peaks['color']
+
+
+def test_preview_from_reduced_decode():
+    """缩小解码的代理图按原图尺寸缩放 block_size，预览与从全分辨率缩小的结果一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _save_jpeg(tmp, 1600, 1200)
+        handle = ImageHandle(path)
+        processor = SimpleBinarizationProcessor(block_size=31, c_value=10)
+        for backend in _backends():
+            use_opencv = main_module.USE_OPENCV
+            try:
+                main_module.USE_OPENCV = backend == 'opencv'
+                proxy = handle.reduced(PREVIEW_MAX_SIZE)
+                preview = processor.apply_binarization_preview(proxy, source_size=handle.size)
+                full = processor.apply_binarization_preview(load_image_file(path))
+            finally:
+                main_module.USE_OPENCV = use_opencv
+            assert _shape(preview) == _shape(full) == (300, 400), backend
+            agreement = np.mean(np.asarray(preview) == np.asarray(full))
+            print(f"  📊 {backend}: 缩小解码预览与全分辨率缩小预览一致率 {agreement:.4f}")
+            assert agreement > 0.97
+        assert processor.block_size == 31
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 缩小解码 / 延迟解码测试")
+    print("=" * 80)
+
+    test_reduced_decode()
+    test_lazy_full_resolution()
+    test_grayscale_decode_uses_less_memory()
+    test_preview_from_reduced_decode()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试滑块调参：去抖调度、代理图实时预览、全分辨率复用去噪结果
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from kivy.clock import Clock
+
+import main as main_module
+from main import SimpleBinarizationProcessor, LiveTuner, OUTPUT_GRAY, DENOISE_BILATERAL
+from synthetic_docs import make_document
+
+
+def _pump(seconds):
+    """驱动 Clock（无窗口）"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        Clock.tick()
+        time.sleep(0.005)
+
+
+def test_debounce():
+    """连续拖动：预览按帧合并，全分辨率处理只在停止调整后执行一次"""
+    previews, refines = [], []
+    tuner = LiveTuner(previews.append, refines.append, refine_delay=0.2)
+    _pump(0.05)  # 先推进时钟（界面运行时时钟每帧推进）
+
+    for block_size in range(11, 41, 2):
+        tuner.update(block_size=block_size)
+        _pump(0.02)
+    assert 1 <= len(previews) <= 15
+    assert previews[-1] == (39, 2, 5)
+    assert refines == []
+
+    _pump(0.4)
+    assert refines == [(39, 2, 5)]
+
+    tuner.update(c_value=6)
+    tuner.update(block_size=20)
+    _pump(0.4)
+    assert previews[-1] == refines[-1] == (21, 6, 5)
+    assert len(refines) == 2
+
+    # set() 只同步参数，不调度处理；cancel() 取消尚未执行的处理
+    tuner.set(block_size=31)
+    tuner.update(denoise_h=7)
+    tuner.cancel()
+    _pump(0.4)
+    assert len(refines) == 2 and tuner.parameters == (31, 6, 7)
+
+
+def test_proxy_preview_is_real_time():
+    """代理图上按新参数重新阈值只需几毫秒"""
+    image = make_document(2480, 3508, shadow='radial', noise=6, seed=0, channels=1)
+    processor = SimpleBinarizationProcessor()
+    h, w = image.shape
+    proxy = image[::8, ::8].copy()
+
+    timings = []
+    for block_size, c_value in ((11, 2), (21, 4), (31, 8), (41, 10)):
+        processor.set_parameters(block_size, c_value, 5)
+        start = time.perf_counter()
+        processor.apply_binarization_preview(proxy, source_size=(w, h))
+        timings.append(time.perf_counter() - start)
+    median = sorted(timings)[len(timings) // 2]
+    print(f"  ⏱️  代理图预览 {median * 1000:.1f} ms")
+    assert median < 0.05
+
+
+def test_threshold_tuning_skips_denoise():
+    """只改 Block / C 时全分辨率处理复用去噪结果"""
+    if not main_module.USE_OPENCV:
+        print("  ⏭️  OpenCV 不可用，跳过")
+        return
+    image = make_document(1240, 1754, noise=6, seed=1, channels=1)
+    processor = SimpleBinarizationProcessor(denoise_method=DENOISE_BILATERAL)
+
+    processor.set_parameters(11, 2, 5)
+    first = processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    processor.set_parameters(25, 6, 5)
+    tuned = processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    assert len(processor._denoise_cache) == 1
+    assert not np.array_equal(first, tuned)
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 滑块调参测试")
+    print("=" * 80)
+
+    test_debounce()
+    test_proxy_preview_is_real_time()
+    test_threshold_tuning_skips_denoise()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试积分图局部均值（Pillow 路径的纯 NumPy 实现：_box_sum 与自适应阈值 _threshold_stack）
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+from main import SimpleBinarizationProcessor, _box_sum
+
+try:
+    from scipy.ndimage import uniform_filter
+except ImportError:
+    uniform_filter = None
+
+
+def _reference_window_sum(img, window):
+    """逐窗口求和的参考实现（对称反射填充，整数精确）"""
+    before = window // 2
+    padded = np.pad(img.astype(np.int64), (before, window - 1 - before), mode='symmetric')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (window, window))
+    return windows.sum(axis=(-2, -1))
+
+
+def test_box_sum_matches_uniform_filter():
+    """积分图窗口和与 scipy.ndimage.uniform_filter(mode='reflect') 一致"""
+    if uniform_filter is None:
+        print("⚠️  scipy 不可用，跳过对比测试")
+        return
+
+    rng = np.random.default_rng(0)
+    cases = [
+        ((600, 800), 11),
+        ((600, 800), 31),
+        ((37, 53), 51),    # 窗口大于图像
+        ((5, 3), 7),
+        ((64, 64), 4),     # 偶数窗口
+    ]
+
+    for shape, window in cases:
+        img = rng.integers(0, 256, size=shape).astype(float)
+        expected = uniform_filter(img, size=window, mode='reflect')
+        actual = _box_sum(img, window) / float(window * window)
+
+        assert actual.shape == expected.shape
+        max_err = np.abs(actual - expected).max()
+        print(f"  {shape} window={window}: max_err={max_err:.2e}")
+        assert max_err < 1e-6
+
+
+def test_threshold_matches_local_mean():
+    """自适应阈值：像素 > 局部均值 - C，与逐窗口求和的参考结果逐位一致"""
+    rng = np.random.default_rng(1)
+    # 奇数窗口、C 为半整数：像素 * 面积与窗口和 - C * 面积不会相等，比较没有歧义
+    for shape, window, c_value in [((120, 160), 11, 2.5), ((37, 53), 51, 7.5), ((9, 5), 3, 0.5)]:
+        img = rng.integers(0, 256, size=shape, dtype=np.uint8)
+        processor = SimpleBinarizationProcessor(block_size=window, c_value=c_value)
+        mask = processor._threshold_stack(img[None], 'test')[0]
+        area = window * window
+        expected = img.astype(np.int64) * area > _reference_window_sum(img, window) - c_value * area
+        assert np.array_equal(mask, expected), (shape, window)
+
+
+def test_stack_input():
+    """(N, H, W) 输入逐帧结果与单帧一致"""
+    rng = np.random.default_rng(1)
+    stack = rng.integers(0, 256, size=(3, 40, 50), dtype=np.uint8)
+
+    batched = _box_sum(stack.astype(float), 9)
+    processor = SimpleBinarizationProcessor(block_size=9, c_value=2.5)
+    masks = processor._threshold_stack(stack, 'stack').copy()
+    for i in range(len(stack)):
+        assert np.allclose(batched[i], _box_sum(stack[i].astype(float), 9))
+        assert np.array_equal(masks[i], processor._threshold_stack(stack[i:i + 1], 'single')[0])
+
+
+def test_fallback_speed():
+    """12 MP 图像的纯 NumPy 自适应阈值应在秒级以内完成"""
+    img = np.full((1, 3000, 4000), 200, dtype=np.uint8)
+    processor = SimpleBinarizationProcessor(block_size=31, c_value=2)
+
+    start = time.perf_counter()
+    mask = processor._threshold_stack(img, 'speed')
+    elapsed = time.perf_counter() - start
+
+    print(f"  ⏱️  3000x4000 window=31: {elapsed * 1000:.1f} ms")
+    assert mask.all()
+    assert elapsed < 10.0
+
+
+def test_pillow_path_uses_c_value():
+    """Pillow 路径可以正常运行（使用 c_value 作为阈值偏移）"""
+    from PIL import Image
+
+    img = Image.new('RGB', (120, 80), color='white')
+    processor = SimpleBinarizationProcessor(block_size=15, c_value=5)
+    result = processor._apply_binarization_pillow(img, denoise=True)
+
+    assert result.size == (120, 80)
+    assert np.array(result).min() == 255
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 积分图局部均值测试")
+    print("=" * 80)
+
+    test_box_sum_matches_uniform_filter()
+    test_threshold_matches_local_mean()
+    test_stack_input()
+    test_fallback_speed()
+    test_pillow_path_uses_c_value()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多页文档（多页 TIFF / PDF）逐页解码与页面并行处理
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+from main import (SimpleBinarizationProcessor, ImageHandle, OUTPUT_GRAY, PackedBitmap,
+                  document_page_count, is_document_file, iter_document_pages,
+                  load_document_page, binarize_pages, binarize_document)
+from synthetic_docs import make_document
+import batch_binarize
+
+
+def _write_document(path, count=4, width=320, height=240):
+    """多页未压缩灰度 TIFF，返回各页数组"""
+    pages = [make_document(width, height, shadow='radial', noise=4, seed=i, channels=1)
+             for i in range(count)]
+    images = [Image.fromarray(page) for page in pages]
+    images[0].save(path, save_all=True, append_images=images[1:])
+    return pages
+
+
+def _has_pdf_renderer():
+    for name in ('pypdfium2', 'fitz'):
+        try:
+            __import__(name)
+            return True
+        except ImportError:
+            pass
+    return False
+
+
+def test_tiff_round_trip():
+    """多页 TIFF -> 多页 G4 TIFF，每页与单独处理的结果相同"""
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'doc.tif')
+        dst = os.path.join(tmp, 'out.tif')
+        pages = _write_document(src)
+        assert document_page_count(src) == 4 and is_document_file(src)
+        assert np.array_equal(load_document_page(src, 2), pages[2])
+
+        decoded = list(iter_document_pages(src))
+        assert isinstance(decoded[1], np.memmap)
+        assert all(np.array_equal(a, b) for a, b in zip(decoded, pages))
+        del decoded
+
+        processors = [SimpleBinarizationProcessor() for _ in range(3)]
+        written = []
+        count = binarize_document(src, dst, processors, on_page=written.append)
+        assert count == 4 and written == [1, 2, 3, 4]
+
+        reference = SimpleBinarizationProcessor()
+        with Image.open(dst) as result:
+            assert result.n_frames == 4
+            for index, page in enumerate(pages):
+                result.seek(index)
+                assert result.mode == '1'
+                expected = reference.apply_binarization(page, output_format=OUTPUT_GRAY)
+                assert np.array_equal(np.asarray(result.convert('L')), expected), index
+
+
+def test_order_and_bounded_pages():
+    """结果按页序产出；同时在处理中的页面不超过 2 倍处理器数"""
+    processors = [SimpleBinarizationProcessor() for _ in range(3)]
+    lock = threading.Lock()
+    state = {'taken': 0, 'yielded': 0, 'max_ahead': 0}
+
+    def pages():
+        for seed in range(12):
+            with lock:
+                state['taken'] += 1
+                state['max_ahead'] = max(state['max_ahead'], state['taken'] - state['yielded'])
+            yield make_document(160, 120, seed=seed, channels=1)
+
+    results = []
+    for result in binarize_pages(pages(), processors, denoise=False):
+        with lock:
+            state['yielded'] += 1
+        results.append(result)
+
+    assert len(results) == 12
+    assert state['max_ahead'] <= 2 * len(processors) + 1
+    reference = SimpleBinarizationProcessor()
+    for seed, result in enumerate(results):
+        assert isinstance(result, PackedBitmap)
+        expected = reference.apply_binarization(make_document(160, 120, seed=seed, channels=1),
+                                                denoise=False, output_format=OUTPUT_GRAY)
+        assert np.array_equal(result.unpack(), expected), seed
+
+
+def test_page_parallel_speedup():
+    """多个处理器并行处理页面（OpenCV 释放 GIL），多核时快于单个处理器"""
+    if (os.cpu_count() or 1) < 2:
+        print("  ⏭️  单核环境，跳过")
+        return
+    pages = [make_document(1200, 1600, noise=6, seed=i, channels=1) for i in range(6)]
+    timings = {}
+    for workers in (1, 2):
+        processors = [SimpleBinarizationProcessor(denoise_cache_size=0) for _ in range(workers)]
+        start = time.perf_counter()
+        list(binarize_pages(iter(pages), processors))
+        timings[workers] = time.perf_counter() - start
+    print(f"  ⏱️  1 线程 {timings[1]:.2f} s, 2 线程 {timings[2]:.2f} s")
+    assert timings[2] < timings[1]
+
+
+def test_handle_pages_and_batch():
+    """句柄打开指定页；批量处理把多页 TIFF 写成多页输出"""
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'doc.tif')
+        pages = _write_document(src, count=3)
+
+        handle = ImageHandle(src, page=2)
+        assert handle.size == (320, 240)
+        assert np.array_equal(handle.gray(), pages[2])
+        preview = np.asarray(handle.reduced(100))
+        assert preview.shape[:2] == (120, 160)
+
+        out = os.path.join(tmp, 'out')
+        tasks = batch_binarize.plan_outputs([(batch_binarize.Path(src),
+                                              batch_binarize.Path('doc.tif'))], out, 'png1')
+        results = list(batch_binarize.run_batch(tasks, page_workers=2))
+        assert results[0][0] == 'ok' and results[0][3] == 3, results
+        with Image.open(os.path.join(out, 'doc.tif')) as result:
+            assert result.n_frames == 3
+        # 工作进程判断出多页后按 .tif 输出检查是否已完成
+        results = list(batch_binarize.run_batch(tasks, page_workers=2))
+        assert results[0][0] == 'skipped', results
+
+
+def test_pdf_pages():
+    """PDF 逐页渲染为灰度；未安装渲染库时给出安装提示"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'doc.pdf')
+        images = [Image.fromarray(make_document(400, 300, seed=i)) for i in range(2)]
+        images[0].save(path, save_all=True, append_images=images[1:], resolution=100)
+
+        if not _has_pdf_renderer():
+            try:
+                document_page_count(path)
+            except ImportError as e:
+                assert 'pypdfium2' in str(e)
+                print("  ⏭️  未安装 pypdfium2 / PyMuPDF，跳过渲染")
+                return
+            raise AssertionError('ImportError expected without a PDF renderer')
+
+        assert document_page_count(path) == 2 and is_document_file(path)
+        pages = list(iter_document_pages(path, dpi=100))
+        assert len(pages) == 2 and pages[0].ndim == 2
+        assert abs(pages[0].shape[1] - 400) <= 2 and abs(pages[0].shape[0] - 300) <= 2
+        assert binarize_document(path, os.path.join(tmp, 'out.tif'),
+                                 [SimpleBinarizationProcessor()], dpi=100) == 2
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 多页文档测试")
+    print("=" * 80)
+
+    test_tiff_round_trip()
+    test_order_and_bounded_pages()
+    test_page_parallel_speedup()
+    test_handle_pages_and_batch()
+    test_pdf_pages()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ import numpy as np
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(__file__))
 
+from synthetic_docs import apply_shadow
 from main import SimpleBinarizationProcessor, USE_OPENCV
 
 def create_test_image_with_shadow():
@@ -23,15 +24,10 @@ def create_test_image_with_shadow():
         
         # 创建 PIL 图像（方便绘制文字）
         img_pil = Image.new('L', (800, 600), color=255)
-        draw = ImageDraw.Draw(img_pil)
         
         # 添加渐变阴影
-        for x in range(800):
-            brightness = int(100 + (155 * x / 800))
-            for y in range(600):
-                current = img_pil.getpixel((x, y))
-                new_brightness = int(current * brightness / 255)
-                img_pil.putpixel((x, y), new_brightness)
+        img_pil = Image.fromarray(apply_shadow(np.array(img_pil), 'linear', strength=155 / 255))
+        draw = ImageDraw.Draw(img_pil)
         
         # 添加文字
         try:
@@ -66,15 +62,10 @@ def create_test_image_with_shadow():
         
         # 使用 Pillow
         img = Image.new('L', (800, 600), color=255)
-        draw = ImageDraw.Draw(img)
         
         # 添加渐变阴影
-        for x in range(800):
-            brightness = int(100 + (155 * x / 800))
-            for y in range(600):
-                current = img.getpixel((x, y))
-                new_brightness = int(current * brightness / 255)
-                img.putpixel((x, y), new_brightness)
+        img = Image.fromarray(apply_shadow(np.array(img), 'linear', strength=155 / 255))
+        draw = ImageDraw.Draw(img)
         
         # 添加文字
         try:
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试单通道 / 1 位打包输出格式
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, PackedBitmap, OUTPUT_COLOR,
+                  OUTPUT_GRAY, OUTPUT_PACKED, save_image_file)
+
+
+def _make_test_image(h=203, w=301):
+    """宽度不是 8 的倍数的测试图像 (BGR)"""
+    rng = np.random.default_rng(0)
+    gray = rng.normal(190, 25, size=(h, w)).clip(0, 255).astype(np.uint8)
+    gray[40:55, 20:280] = 20
+    return np.repeat(gray[:, :, None], 3, axis=2)
+
+
+def test_formats_agree():
+    """三种输出格式内容一致"""
+    img = _make_test_image()
+    if not main_module.USE_OPENCV:
+        img = Image.fromarray(img)
+    processor = SimpleBinarizationProcessor()
+
+    color = np.asarray(processor.apply_binarization(img, output_format=OUTPUT_COLOR))
+    gray = np.asarray(processor.apply_binarization(img, output_format=OUTPUT_GRAY))
+    packed = processor.apply_binarization(img, output_format=OUTPUT_PACKED)
+
+    assert gray.ndim == 2
+    assert np.array_equal(color[:, :, 0], gray)
+    assert isinstance(packed, PackedBitmap)
+    assert packed.shape == gray.shape
+    assert packed.data.nbytes == gray.shape[0] * ((gray.shape[1] + 7) // 8)
+    assert np.array_equal(packed.unpack(), gray)
+    assert np.array_equal(np.array(packed.to_pil().convert('L')), gray)
+
+
+def test_tiled_packed_matches():
+    """分块打包输出与整幅打包输出一致（块宽自动对齐到 8）"""
+    img = _make_test_image()
+    if not main_module.USE_OPENCV:
+        img = Image.fromarray(img)
+    processor = SimpleBinarizationProcessor()
+
+    expected = processor.apply_binarization(img, output_format=OUTPUT_PACKED)
+    actual = processor.apply_binarization_tiled(img, tile_size=(64, 100),
+                                                output_format=OUTPUT_PACKED)
+    assert np.array_equal(actual.data, expected.data)
+
+    gray = processor.apply_binarization_tiled(img, tile_size=64, output_format=OUTPUT_GRAY)
+    assert np.array_equal(np.asarray(gray), expected.unpack())
+
+
+def test_unpack_row_step():
+    """缩略图只解包采样行"""
+    binary = (np.arange(40 * 13).reshape(40, 13) % 3 == 0).astype(np.uint8) * 255
+    packed = PackedBitmap.from_binary(binary)
+    assert np.array_equal(packed.unpack(row_step=4), binary[::4])
+
+
+def test_save_packed_png():
+    """1 位结果直接保存为 1 位 PNG"""
+    binary = np.zeros((30, 45), dtype=np.uint8)
+    binary[::2] = 255
+    packed = PackedBitmap.from_binary(binary)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'out.png')
+        save_image_file(path, packed)
+        saved = Image.open(path)
+        assert saved.mode == '1'
+        assert np.array_equal(np.array(saved.convert('L')), binary)
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 输出格式测试")
+    print("=" * 80)
+
+    test_formats_agree()
+    test_tiled_packed_matches()
+    test_unpack_row_step()
+    test_save_packed_png()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
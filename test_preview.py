@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试快速预览（缩小代理图二值化）
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import SimpleBinarizationProcessor, OUTPUT_GRAY
+
+
+def _make_page(h=1500, w=2000):
+    """带阴影的合成页面：粗文字块，缩小后仍可辨认"""
+    rng = np.random.default_rng(0)
+    page = np.full((h, w), 230.0)
+    for y in range(100, h - 100, 80):
+        page[y:y + 30, 150:w - 150] = 40
+    page *= np.linspace(0.5, 1.0, w)[None, :]
+    page += rng.normal(0, 5, size=page.shape)
+    gray = page.clip(0, 255).astype(np.uint8)
+    return np.repeat(gray[:, :, None], 3, axis=2)
+
+
+def _as_input(image):
+    if main_module.USE_OPENCV:
+        return image
+    from PIL import Image
+    return Image.fromarray(image)
+
+
+def test_scaled_block_size():
+    """窗口大小按比例缩放并保持奇数"""
+    processor = SimpleBinarizationProcessor(block_size=31)
+    assert processor.scaled_block_size(1.0) == 31
+    assert processor.scaled_block_size(0.5) == 17
+    assert processor.scaled_block_size(0.01) == 3
+    assert all(processor.scaled_block_size(s / 10) % 2 == 1 for s in range(1, 11))
+
+
+def test_preview_size_and_parameters():
+    """预览图最长边等于 max_size，处理后参数恢复"""
+    processor = SimpleBinarizationProcessor(block_size=51)
+    preview = np.asarray(processor.apply_binarization_preview(_as_input(_make_page()),
+                                                              max_size=400))
+    assert preview.shape == (300, 400)
+    assert processor.block_size == 51
+
+
+def test_preview_matches_full_resolution():
+    """预览结果与全分辨率结果缩小后基本一致，且明显更快"""
+    image = _as_input(_make_page())
+    processor = SimpleBinarizationProcessor(block_size=51, c_value=10)
+
+    start = time.perf_counter()
+    preview = np.asarray(processor.apply_binarization_preview(image, max_size=400))
+    preview_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    full = np.asarray(processor.apply_binarization(image, denoise=True,
+                                                   output_format=OUTPUT_GRAY))
+    full_ms = (time.perf_counter() - start) * 1000
+
+    # 全分辨率结果按 5x5 块多数表决缩小到预览尺寸
+    reduced = full.reshape(300, 5, 400, 5).mean(axis=(1, 3)) > 127
+    agreement = np.mean(reduced == (preview > 127))
+
+    print(f"  ⏱️  preview {preview_ms:.1f} ms, full {full_ms:.1f} ms, agreement {agreement:.3f}")
+    assert agreement > 0.95
+    assert preview_ms < full_ms
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 快速预览测试")
+    print("=" * 80)
+
+    test_scaled_block_size()
+    test_preview_size_and_parameters()
+    test_preview_matches_full_resolution()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试二值化结果缓存
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, ResultCache, PackedBitmap,
+                  OUTPUT_GRAY, OUTPUT_PACKED)
+
+
+def _make_image(seed=0, h=90, w=120):
+    rng = np.random.default_rng(seed)
+    image = rng.integers(100, 256, size=(h, w, 3), dtype=np.uint8)
+    if main_module.USE_OPENCV:
+        return image
+    return Image.fromarray(image)
+
+
+def test_hit_and_miss_counters():
+    """相同输入和参数命中，参数变化则未命中"""
+    processor = SimpleBinarizationProcessor(cache=ResultCache())
+    image = _make_image()
+
+    first = processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    second = processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    assert processor.cache.stats()['hits'] == 1
+    assert processor.cache.stats()['misses'] == 1
+    assert np.array_equal(np.asarray(first), np.asarray(second))
+
+    processor.set_parameters(15, 2, 5)
+    processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    processor.apply_binarization(image, denoise=False, output_format=OUTPUT_GRAY)
+    processor.apply_binarization(_make_image(seed=1), output_format=OUTPUT_GRAY)
+    assert processor.cache.misses == 4
+    assert processor.cache.hits == 1
+
+
+def test_cached_arrays_are_read_only():
+    """命中返回的数组不可修改，调用方原结果不受影响"""
+    cache = ResultCache()
+    result = np.zeros((10, 10), dtype=np.uint8)
+    cache.put('k', result)
+    result[0, 0] = 255
+
+    cached = cache.get('k')
+    assert cached[0, 0] == 0
+    assert not cached.flags.writeable
+
+    # 打包结果同样复制后只读（内存命中和磁盘命中）
+    page = _make_image(seed=5)
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = SimpleBinarizationProcessor(cache=ResultCache(cache_dir=tmp))
+        first = processor.apply_binarization(page, output_format=OUTPUT_PACKED)
+        expected = first.data.copy()
+        first.data[:] = 0
+        hit = processor.apply_binarization(page, output_format=OUTPUT_PACKED)
+        assert processor.last_metadata['from_cache']
+        assert np.array_equal(hit.data, expected)
+        assert not hit.data.flags.writeable
+        hit.data = np.zeros_like(expected)
+        again = processor.apply_binarization(page, output_format=OUTPUT_PACKED)
+        assert np.array_equal(again.data, expected)
+
+        from_disk = ResultCache(cache_dir=tmp).get(processor._cache_key(
+            page, True, OUTPUT_PACKED))
+        assert np.array_equal(from_disk.data, expected)
+        assert not from_disk.data.flags.writeable
+
+
+def test_lru_eviction_by_bytes():
+    """超过字节上限时淘汰最久未使用的条目"""
+    cache = ResultCache(max_bytes=250)
+    for key in 'abc':
+        cache.put(key, np.zeros(100, dtype=np.uint8))
+    assert cache.get('a') is None
+    assert cache.get('b') is not None
+
+    cache.put('d', np.zeros(100, dtype=np.uint8))
+    assert cache.get('c') is None
+    assert cache.get('b') is not None
+    assert cache.stats()['bytes'] <= 250
+
+
+def test_disk_cache_shared_between_instances():
+    """磁盘缓存可在不同实例（进程）之间共享，三种结果格式都能还原"""
+    gray = (np.arange(35 * 20).reshape(35, 20) % 2 * 255).astype(np.uint8)
+    results = {
+        'array': gray,
+        'packed': PackedBitmap.from_binary(gray),
+        'pil': Image.fromarray(gray).convert('RGB'),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = ResultCache(cache_dir=tmp)
+        for key, result in results.items():
+            writer.put(key, result)
+
+        reader = ResultCache(cache_dir=tmp)
+        assert np.array_equal(reader.get('array'), gray)
+        assert np.array_equal(reader.get('packed').unpack(), gray)
+        assert reader.get('pil').mode == 'RGB'
+        assert reader.disk_hits == 3
+
+        # 第二次从内存命中
+        reader.get('array')
+        assert reader.disk_hits == 3
+        assert reader.hits == 4
+
+
+def test_tiled_shares_cache_with_whole_frame():
+    """分块结果与整幅结果逐位一致，共用缓存"""
+    processor = SimpleBinarizationProcessor(cache=ResultCache())
+    image = _make_image(h=150, w=170)
+
+    whole = processor.apply_binarization(image, output_format=OUTPUT_PACKED)
+    tiled = processor.apply_binarization_tiled(image, tile_size=64, output_format=OUTPUT_PACKED)
+    assert processor.cache.hits == 1
+    assert np.array_equal(whole.data, tiled.data)
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 结果缓存测试")
+    print("=" * 80)
+
+    test_hit_and_miss_counters()
+    test_cached_arrays_are_read_only()
+    test_lru_eviction_by_bytes()
+    test_disk_cache_shared_between_instances()
+    test_tiled_shares_cache_with_whole_frame()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试区域处理（apply_binarization_roi）与缩放查看器的按块懒惰二值化
+"""
+
+import sys
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, ResultCache, TileViewport, PackedBitmap,
+                  OUTPUT_GRAY, OUTPUT_PACKED, OUTPUT_COLOR, THRESHOLD_SAUVOLA,
+                  DENOISE_BILATERAL, DENOISE_MEDIAN)
+from synthetic_docs import make_document
+
+
+def _backends():
+    return ['pillow'] + (['opencv'] if main_module.USE_OPENCV else [])
+
+
+def test_roi_matches_full_frame():
+    """区域结果与整幅处理后裁剪同一区域逐位一致（含图像边缘的区域）"""
+    page = make_document(700, 900, shadow='radial', noise=5, seed=0)
+    configs = [{}, {'denoise_method': DENOISE_BILATERAL}, {'denoise_method': DENOISE_MEDIAN},
+               {'threshold_method': THRESHOLD_SAUVOLA, 'block_size': 31},
+               {'normalize_illumination': True, 'auto_parameters': True}]
+    rects = [(120, 200, 150, 90), (0, 0, 64, 64), (650, 850, 200, 200)]
+    for backend in _backends():
+        use_opencv = main_module.USE_OPENCV
+        try:
+            main_module.USE_OPENCV = backend == 'opencv'
+            image = page if backend == 'opencv' else Image.fromarray(page)
+            for config in configs:
+                processor = SimpleBinarizationProcessor(**config)
+                full = np.asarray(processor.apply_binarization(image, output_format=OUTPUT_GRAY))
+                for x, y, w, h in rects:
+                    roi = processor.apply_binarization_roi(image, (x, y, w, h),
+                                                           output_format=OUTPUT_GRAY)
+                    assert np.array_equal(np.asarray(roi), full[y:y + h, x:x + w]), \
+                        (backend, config, (x, y))
+        finally:
+            main_module.USE_OPENCV = use_opencv
+
+
+def test_roi_formats_and_cache():
+    """输出格式与 apply_binarization 相同；区域进入缓存键；区域在图像外时报错"""
+    page = make_document(400, 300, seed=1)
+    processor = SimpleBinarizationProcessor(cache=ResultCache())
+    full = processor.apply_binarization(page, output_format=OUTPUT_GRAY)
+
+    packed = processor.apply_binarization_roi(page, (16, 10, 80, 40), output_format=OUTPUT_PACKED)
+    assert isinstance(packed, PackedBitmap) and packed.shape == (40, 80)
+    assert np.array_equal(packed.unpack(), full[10:50, 16:96])
+    color = processor.apply_binarization_roi(page, (16, 10, 80, 40), output_format=OUTPUT_COLOR)
+    assert np.asarray(color).shape[:2] == (40, 80)
+
+    first = processor.apply_binarization_roi(page, (0, 0, 50, 50), output_format=OUTPUT_GRAY)
+    assert not processor.last_metadata['from_cache']
+    processor.apply_binarization_roi(page, (50, 50, 50, 50), output_format=OUTPUT_GRAY)
+    assert not processor.last_metadata['from_cache']
+    again = processor.apply_binarization_roi(page, (0, 0, 50, 50), output_format=OUTPUT_GRAY)
+    assert processor.last_metadata['from_cache'] and np.array_equal(again, first)
+
+    try:
+        processor.apply_binarization_roi(page, (500, 0, 10, 10))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError expected for a region outside the image')
+
+
+def test_roi_cost_follows_region():
+    """大页面上的小区域：耗时只是整幅处理的一小部分"""
+    if not main_module.USE_OPENCV:
+        print("  ⏭️  OpenCV 不可用，跳过")
+        return
+    page = make_document(2480, 3508, noise=6, seed=2, channels=1)
+    processor = SimpleBinarizationProcessor(denoise_method=DENOISE_BILATERAL,
+                                            denoise_cache_size=0)
+
+    start = time.perf_counter()
+    processor.apply_binarization(page, output_format=OUTPUT_GRAY)
+    full = time.perf_counter() - start
+    start = time.perf_counter()
+    processor.apply_binarization_roi(page, (1000, 1500, 400, 200), output_format=OUTPUT_GRAY)
+    roi = time.perf_counter() - start
+    print(f"  ⏱️  整幅 {full * 1000:.0f} ms, 400x200 区域 {roi * 1000:.0f} ms")
+    assert roi < 0.1 * full
+
+
+def test_viewport_lazy_tiles():
+    """放大后只处理可见的块；平移复用已处理的块；参数变化时块失效"""
+    page = make_document(1600, 2000, noise=4, seed=3, channels=1)
+    processor = SimpleBinarizationProcessor(denoise_cache_size=0)
+    full = processor.apply_binarization(page, output_format=OUTPUT_GRAY)
+
+    calls = []
+    roi = processor.apply_binarization_roi
+
+    def counting_roi(*args, **kwargs):
+        calls.append(args[1])
+        return roi(*args, **kwargs)
+
+    processor.apply_binarization_roi = counting_roi
+    viewport = TileViewport((1600, 2000), view_size=400, tile_size=256)
+    assert viewport.max_zoom == 8
+    viewport.set_zoom(4)
+    x, y, w, h = viewport.visible_rect()
+    assert (w, h) == (400, 500)
+
+    view = viewport.render(processor, page)
+    assert np.array_equal(view, full[y:y + h, x:x + w])
+    first_calls = len(calls)
+    assert first_calls == len(viewport.visible_tiles()) <= 9
+
+    viewport.pan(20, 0)
+    x, y, w, h = viewport.visible_rect()
+    view = viewport.render(processor, page)
+    assert np.array_equal(view, full[y:y + h, x:x + w])
+    assert len(calls) - first_calls <= 3
+
+    # 平移不会超出图像；缩小到 1 倍时可见区域为整页
+    viewport.pan(10000, 10000)
+    x, y, w, h = viewport.visible_rect()
+    assert x + w == 1600 and y + h == 2000
+    viewport.set_zoom(1)
+    assert viewport.visible_rect() == (0, 0, 1600, 2000)
+
+    viewport.set_zoom(8)
+    viewport.render(processor, page)
+    count = len(calls)
+    processor.set_parameters(21, 4, 5)
+    viewport.render(processor, page)
+    assert len(calls) - count == len(viewport.visible_tiles())
+
+
+def test_viewport_plans_page_once():
+    """查看器每组参数只估计一次整页决定和光照场，各块共用；结果仍与整幅处理一致"""
+    page = make_document(1600, 2000, shadow='radial', noise=6, seed=4, channels=1)
+    processor = SimpleBinarizationProcessor(auto_denoise=True, auto_parameters=True,
+                                            normalize_illumination=True,
+                                            cache=ResultCache(), denoise_cache_size=0)
+    full = np.asarray(processor.apply_binarization(page, output_format=OUTPUT_GRAY))
+
+    counts = {'plan': 0, 'illumination': 0, 'digest': 0}
+    plan_page = processor.plan_page
+    estimate = main_module.IlluminationField.estimate
+    digest = main_module._content_digest
+
+    def counting_plan(*args, **kwargs):
+        counts['plan'] += 1
+        return plan_page(*args, **kwargs)
+
+    def counting_estimate(*args, **kwargs):
+        counts['illumination'] += 1
+        return estimate(*args, **kwargs)
+
+    def counting_digest(*args, **kwargs):
+        counts['digest'] += 1
+        return digest(*args, **kwargs)
+
+    processor.plan_page = counting_plan
+    main_module.IlluminationField.estimate = counting_estimate
+    main_module._content_digest = counting_digest
+    try:
+        viewport = TileViewport((1600, 2000), view_size=400, tile_size=256)
+        viewport.set_zoom(4)
+        view = viewport.render(processor, page)
+        x, y, w, h = viewport.visible_rect()
+        assert np.array_equal(view, full[y:y + h, x:x + w])
+        viewport.pan(300, 300)
+        view = viewport.render(processor, page)
+        x, y, w, h = viewport.visible_rect()
+        assert np.array_equal(view, full[y:y + h, x:x + w])
+        assert counts == {'plan': 1, 'illumination': 1, 'digest': 1}, counts
+
+        processor.set_parameters(21, 4, 5)
+        viewport.render(processor, page)
+        assert counts['plan'] == 2
+    finally:
+        main_module.IlluminationField.estimate = estimate
+        main_module._content_digest = digest
+
+    # 设置变化后旧的 PagePlan 不能再使用
+    plan = plan_page(page)
+    processor.set_threshold_method(THRESHOLD_SAUVOLA)
+    try:
+        processor.apply_binarization_roi(page, (0, 0, 64, 64), page=plan)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError expected for a stale page plan')
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 区域处理 / 缩放查看测试")
+    print("=" * 80)
+
+    test_roi_matches_full_frame()
+    test_roi_formats_and_cache()
+    test_roi_cost_follows_region()
+    test_viewport_lazy_tiles()
+    test_viewport_plans_page_once()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
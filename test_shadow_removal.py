@@ -12,6 +12,7 @@ from PIL import Image, ImageDraw, ImageFont
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(__file__))
 
+from synthetic_docs import apply_shadow
 from main import SimpleBinarizationProcessor
 
 
@@ -21,17 +22,10 @@ def create_test_image_with_shadow():
     
     # 创建 800x600 的白色图像
     img = Image.new('L', (800, 600), color=255)
-    draw = ImageDraw.Draw(img)
     
     # 添加渐变阴影（左侧暗，右侧亮）
-    for x in range(800):
-        # 从左到右，亮度从 100 渐变到 255
-        brightness = int(100 + (155 * x / 800))
-        for y in range(600):
-            current = img.getpixel((x, y))
-            # 混合原始亮度和渐变
-            new_brightness = int(current * brightness / 255)
-            img.putpixel((x, y), new_brightness)
+    # 从左到右，亮度从 100 渐变到 255
+    img = Image.fromarray(apply_shadow(np.array(img), 'linear', strength=155 / 255))
     
     # 添加黑色文字（模拟文档）
     try:
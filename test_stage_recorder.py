@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分阶段耗时 / 内存记录
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import contextlib
+import threading
+import tracemalloc
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import SimpleBinarizationProcessor, StageRecorder, OUTPUT_GRAY
+from synthetic_docs import make_document
+
+
+def _run(backend, recorder, verbose=False, denoise=True):
+    """在指定后端上处理一张合成页面"""
+    page = make_document(320, 240, seed=0)
+    use_opencv = main_module.USE_OPENCV
+    try:
+        if backend == 'pillow':
+            main_module.USE_OPENCV = False
+            page = Image.fromarray(page)
+        processor = SimpleBinarizationProcessor(recorder=recorder, verbose=verbose)
+        return processor.apply_binarization(page, denoise=denoise, output_format=OUTPUT_GRAY)
+    finally:
+        main_module.USE_OPENCV = use_opencv
+
+
+def test_stages_recorded_per_backend():
+    """每个阶段一条记录，包含后端、尺寸和时间"""
+    backends = ['pillow'] + (['opencv'] if main_module.USE_OPENCV else [])
+    expected = {
+        'opencv': ['gray', 'denoise', 'threshold', 'output'],
+        'pillow': ['gray', 'denoise', 'threshold', 'postprocess', 'output'],
+    }
+    for backend in backends:
+        recorder = StageRecorder(device='test')
+        _run(backend, recorder)
+        assert [r['stage'] for r in recorder.records] == expected[backend]
+        for record in recorder.records:
+            assert record['backend'] == backend
+            assert (record['width'], record['height']) == (320, 240)
+            assert record['device'] == 'test'
+            assert record['wall_ms'] >= 0 and record['cpu_ms'] >= 0
+            assert 'peak_kb' not in record
+
+
+def test_memory_and_callback():
+    """track_memory 记录峰值分配，callback 逐条收到记录"""
+    seen = []
+    recorder = StageRecorder(track_memory=True, callback=seen.append)
+    try:
+        _run('pillow', recorder, denoise=False)
+    finally:
+        recorder.stop()
+    assert not tracemalloc.is_tracing()
+    assert seen == recorder.records
+    threshold = next(r for r in seen if r['stage'] == 'threshold')
+    # float64 灰度图 + 积分图，至少 320x240x8 字节
+    assert threshold['peak_kb'] > 320 * 240 * 8 / 1024
+
+    summary = recorder.summary()
+    assert summary['threshold']['count'] == 1
+    assert 'denoise' not in summary
+
+
+def test_nested_stages_and_threads():
+    """内层阶段不清掉外层阶段的峰值；一个线程结束阶段不影响其他线程的内存跟踪"""
+    recorder = StageRecorder(track_memory=True)
+    try:
+        with recorder.stage('outer'):
+            block = bytearray(4 * 1024 * 1024)
+            del block
+            with recorder.stage('inner'):
+                small = bytearray(64 * 1024)
+                del small
+
+        inner_done = threading.Event()
+        outer_may_finish = threading.Event()
+
+        def short_stage():
+            with recorder.stage('short'):
+                pass
+            inner_done.set()
+            outer_may_finish.wait(10)
+
+        with recorder.stage('long'):
+            thread = threading.Thread(target=short_stage)
+            thread.start()
+            inner_done.wait(10)
+            assert tracemalloc.is_tracing()
+            block = bytearray(2 * 1024 * 1024)
+            del block
+            outer_may_finish.set()
+            thread.join()
+    finally:
+        recorder.stop()
+
+    peaks = {r['stage']: r['peak_kb'] for r in recorder.records}
+    assert peaks['outer'] >= 4 * 1024, peaks
+    assert 64 <= peaks['inner'] < 4 * 1024, peaks
+    assert peaks['long'] >= 2 * 1024, peaks
+    assert not tracemalloc.is_tracing()
+
+
+def test_silent_by_default():
+    """默认不打印，verbose=True 时打印进度"""
+    quiet, loud = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(quiet):
+        _run('pillow', None)
+    with contextlib.redirect_stdout(loud):
+        _run('pillow', None, verbose=True)
+    assert quiet.getvalue() == ''
+    assert '二值化完成' in loud.getvalue()
+
+
+def test_export_jsonl():
+    """导出为 JSON Lines"""
+    recorder = StageRecorder()
+    _run('pillow', recorder)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stages.jsonl')
+        count = recorder.export_jsonl(path)
+        with open(path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+    assert count == len(lines) == len(recorder.records)
+    assert lines[0]['stage'] == 'gray'
+
+    recorder.clear()
+    assert recorder.records == []
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 分阶段记录测试")
+    print("=" * 80)
+
+    test_stages_recorded_per_backend()
+    test_memory_and_callback()
+    test_nested_stages_and_threads()
+    test_silent_by_default()
+    test_export_jsonl()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
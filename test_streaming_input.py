@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试内存映射 / 灰度直读输入（PGM、未压缩 TIFF、raw）
+"""
+
+import sys
+import os
+import struct
+import tempfile
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, OUTPUT_GRAY, OUTPUT_PACKED, DENOISE_MEDIAN,
+                  open_memmap_image, open_raw_image, load_grayscale_file, load_image_file,
+                  ImageHandle)
+from synthetic_docs import make_document
+
+
+def _write_gapped_tiff(path, gray, rows_per_strip):
+    """手写未压缩灰度 TIFF，条带之间留空隙（无法整幅映射）"""
+    h, w = gray.shape
+    strips = [gray[y:y + rows_per_strip].tobytes() for y in range(0, h, rows_per_strip)]
+    count = len(strips)
+    entries = 9
+    ifd_size = 2 + entries * 12 + 4
+    offsets_at = 8 + ifd_size
+    counts_at = offsets_at + 4 * count
+    data_at = counts_at + 4 * count
+
+    offsets, position = [], data_at
+    for strip in strips:
+        offsets.append(position)
+        position += len(strip) + 16
+
+    def entry(tag, kind, n, value):
+        return struct.pack('<HHII', tag, kind, n, value)
+
+    with open(path, 'wb') as f:
+        f.write(b'II*\x00' + struct.pack('<I', 8) + struct.pack('<H', entries))
+        f.write(entry(256, 4, 1, w) + entry(257, 4, 1, h) + entry(258, 3, 1, 8) +
+                entry(259, 3, 1, 1) + entry(262, 3, 1, 1) + entry(273, 4, count, offsets_at) +
+                entry(277, 3, 1, 1) + entry(278, 4, 1, rows_per_strip) +
+                entry(279, 4, count, counts_at) + struct.pack('<I', 0))
+        f.write(struct.pack(f'<{count}I', *offsets))
+        f.write(struct.pack(f'<{count}I', *(len(s) for s in strips)))
+        for strip in strips:
+            f.write(strip + b'\x00' * 16)
+
+
+def test_memmap_formats():
+    """未压缩 8 位灰度 PGM / TIFF 内存映射，压缩或彩色文件回退为解码"""
+    gray = make_document(240, 180, seed=0, channels=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, options in (('page.pgm', {}), ('page.tif', {}),
+                              ('strips.tif', {'tiffinfo': {278: 32}})):
+            path = os.path.join(tmp, name)
+            Image.fromarray(gray).save(path, **options)
+            mapped = open_memmap_image(path)
+            assert isinstance(mapped, np.memmap), name
+            assert np.array_equal(mapped, gray), name
+
+        gapped = os.path.join(tmp, 'gapped.tif')
+        _write_gapped_tiff(gapped, gray, 50)
+        assert open_memmap_image(gapped) is None
+        assert np.array_equal(load_grayscale_file(gapped), gray)
+
+        lzw = os.path.join(tmp, 'lzw.tif')
+        Image.fromarray(gray).save(lzw, compression='tiff_lzw')
+        assert open_memmap_image(lzw) is None
+        assert np.array_equal(load_grayscale_file(lzw), gray)
+
+        raw = os.path.join(tmp, 'page.raw')
+        with open(raw, 'wb') as f:
+            f.write(b'\xff' * 64 + gray.tobytes())
+        assert np.array_equal(open_raw_image(raw, 240, 180, offset=64), gray)
+
+        assert open_memmap_image(os.path.join(tmp, 'missing.pgm')) is None
+
+
+def test_grayscale_jpeg():
+    """灰度 JPEG（压缩的 'L' 模式文件）回退为解码，两个后端都能读取"""
+    gray = make_document(240, 180, seed=3, channels=1)
+    backends = ['pillow'] + (['opencv'] if main_module.USE_OPENCV else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'page.jpg')
+        Image.fromarray(gray).save(path, quality=95)
+        with Image.open(path) as image:
+            assert image.mode == 'L'
+            decoded = np.asarray(image)
+        assert open_memmap_image(path) is None
+        for backend in backends:
+            use_opencv = main_module.USE_OPENCV
+            try:
+                main_module.USE_OPENCV = backend == 'opencv'
+                loaded = load_grayscale_file(path)
+                handle_gray = ImageHandle(path).gray()
+            finally:
+                main_module.USE_OPENCV = use_opencv
+            for result in (loaded, handle_gray):
+                assert result is not None and result.shape == gray.shape, backend
+                # 不同 JPEG 解码器的 IDCT 实现可能相差 1 个灰度级
+                assert np.abs(result.astype(int) - decoded).max() <= 1, backend
+
+
+def test_color_file_matches_processor_gray():
+    """彩色文件读成灰度后，二值化结果与按原方式读入 3 通道图像相同"""
+    page = make_document(300, 220, shadow='radial', seed=1)
+    backends = ['pillow'] + (['opencv'] if main_module.USE_OPENCV else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'page.png')
+        Image.fromarray(page[:, :, ::-1]).save(path)
+        for backend in backends:
+            use_opencv = main_module.USE_OPENCV
+            try:
+                main_module.USE_OPENCV = backend == 'opencv'
+                gray = load_grayscale_file(path)
+                assert gray.ndim == 2
+                processor = SimpleBinarizationProcessor()
+                expected = processor.apply_binarization(load_image_file(path),
+                                                        output_format=OUTPUT_GRAY)
+                result = processor.apply_binarization(gray, output_format=OUTPUT_GRAY)
+                tiled = processor.apply_binarization_tiled(gray, tile_size=128,
+                                                           output_format=OUTPUT_GRAY)
+            finally:
+                main_module.USE_OPENCV = use_opencv
+            assert np.array_equal(np.asarray(result), np.asarray(expected)), backend
+            assert np.array_equal(np.asarray(tiled), np.asarray(expected)), backend
+
+
+def test_tiled_memmap_memory_is_flat():
+    """分块处理内存映射的大页面：峰值分配远小于页面本身"""
+    width, height = 3000, 4000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'scan.pgm')
+        Image.fromarray(make_document(width, height, seed=2, channels=1)).save(path)
+        page = open_memmap_image(path)
+
+        processor = SimpleBinarizationProcessor(denoise_method=DENOISE_MEDIAN,
+                                                denoise_cache_size=0)
+        tracemalloc.start()
+        try:
+            result = processor.apply_binarization_tiled(page, tile_size=512,
+                                                        output_format=OUTPUT_PACKED)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del page
+
+    print(f"  📊 {width}x{height} 灰度页面 {width * height / 1e6:.0f} MB，"
+          f"分块处理峰值分配 {peak / 1e6:.1f} MB")
+    assert result.shape == (height, width)
+    assert peak < 0.5 * width * height
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 内存映射输入测试")
+    print("=" * 80)
+
+    test_memmap_formats()
+    test_grayscale_jpeg()
+    test_color_file_matches_processor_gray()
+    test_tiled_memmap_memory_is_flat()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
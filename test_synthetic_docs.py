@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试合成文档生成器
+"""
+
+import sys
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_docs import make_document, apply_shadow, shadow_field, SHADOW_KINDS
+
+
+def test_linear_shadow_matches_pixel_loop():
+    """向量化线性阴影与旧的 getpixel / putpixel 循环逐像素一致"""
+    img = Image.new('L', (80, 60), color=255)
+    for x in range(80):
+        brightness = int(100 + (155 * x / 80))
+        for y in range(60):
+            img.putpixel((x, y), int(img.getpixel((x, y)) * brightness / 255))
+
+    shadowed = apply_shadow(np.full((60, 80), 255, dtype=np.uint8), 'linear', strength=155 / 255)
+    assert np.array_equal(shadowed, np.array(img))
+
+
+def test_deterministic_by_seed():
+    """相同种子生成相同图像，不同种子不同"""
+    a = make_document(320, 240, shadow='radial', seed=3)
+    b = make_document(320, 240, shadow='radial', seed=3)
+    c = make_document(320, 240, shadow='radial', seed=4)
+    assert np.array_equal(a, b)
+    assert not np.array_equal(a, c)
+
+
+def test_shapes_and_options():
+    """任意尺寸、单通道 / 三通道，文字密度影响墨迹比例"""
+    for kind in SHADOW_KINDS:
+        page = make_document(333, 211, shadow=kind, seed=1)
+        assert page.shape == (211, 333, 3) and page.dtype == np.uint8
+
+    options = dict(shadow=None, noise=0, line_art=0, channels=1)
+    gray = make_document(200, 300, text_density=1.0, **options)
+    empty = make_document(200, 300, text_density=0.0, **options)
+    assert gray.shape == (300, 200)
+    assert (gray < 128).mean() > 0.05
+    assert (empty < 128).mean() == 0
+
+
+def test_shadow_fields():
+    """各阴影类型的明暗分布"""
+    linear = shadow_field(100, 50, 'linear')
+    assert linear[0, 0] < linear[0, -1]
+    vignette = shadow_field(101, 101, 'vignette')
+    assert vignette[0, 0] < vignette[50, 50] == 1.0
+    radial = shadow_field(100, 100, 'radial', strength=0.5)
+    assert 0.5 <= radial.min() < radial.max() <= 1.0
+
+
+def test_large_page_is_fast():
+    """1200 万像素页面在秒级以内生成"""
+    start = time.perf_counter()
+    make_document(4000, 3000, shadow='vignette', seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"  ⏱️  4000x3000: {elapsed * 1000:.0f} ms")
+    assert elapsed < 5.0
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 合成文档生成器测试")
+    print("=" * 80)
+
+    test_linear_shadow_matches_pixel_loop()
+    test_deterministic_by_seed()
+    test_shapes_and_options()
+    test_shadow_fields()
+    test_large_page_is_fast()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
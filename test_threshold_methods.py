@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 Niblack / Sauvola / Wolf 阈值方法
+"""
+
+import sys
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import (SimpleBinarizationProcessor, ResultCache, OUTPUT_GRAY, THRESHOLD_METHODS,
+                  THRESHOLD_SAUVOLA, THRESHOLD_WOLF, _window_sums, _local_statistics_threshold)
+from synthetic_docs import make_document, shadow_field
+
+
+def _low_contrast_page(width=800, height=600):
+    """低对比度（文字 150 / 背景 190）+ 圆形阴影 + 噪声，返回 (灰度图, 文字掩码)"""
+    ink = make_document(width, height, shadow=None, noise=0, line_art=0, channels=1) < 128
+    rng = np.random.default_rng(0)
+    page = np.where(ink, 150.0, 190.0) * shadow_field(width, height, 'radial', 0.5, seed=1)
+    page += rng.normal(0, 4, size=page.shape)
+    return page.clip(0, 255).astype(np.uint8), ink
+
+
+def _as_input(gray):
+    if main_module.USE_OPENCV:
+        return np.repeat(gray[:, :, None], 3, axis=2)
+    return Image.fromarray(gray).convert('RGB')
+
+
+def test_backends_agree():
+    """两个后端的窗口和 / 平方和逐位一致"""
+    if not main_module.USE_OPENCV:
+        print("  ⏭️  OpenCV 不可用，跳过")
+        return
+    gray, _ = _low_contrast_page(300, 200)
+    opencv_sums = _window_sums(gray, 21)
+    try:
+        main_module.USE_OPENCV = False
+        numpy_sums = _window_sums(gray, 21)
+    finally:
+        main_module.USE_OPENCV = True
+    assert np.array_equal(opencv_sums[0], numpy_sums[0])
+    assert np.array_equal(opencv_sums[1], numpy_sums[1])
+
+
+def test_cost_independent_of_window():
+    """大窗口不比小窗口明显更慢"""
+    gray, _ = _low_contrast_page(1600, 1200)
+    timings = {}
+    for window in (15, 151):
+        start = time.perf_counter()
+        for _ in range(3):
+            _local_statistics_threshold(gray, window, THRESHOLD_SAUVOLA, 0.2)
+        timings[window] = time.perf_counter() - start
+    print(f"  ⏱️  window 15: {timings[15] * 333:.1f} ms, window 151: {timings[151] * 333:.1f} ms")
+    assert timings[151] < timings[15] * 2
+
+
+def test_low_contrast_accuracy():
+    """低对比度阴影页面上 Sauvola / Wolf 明显优于默认方法"""
+    gray, ink = _low_contrast_page()
+    accuracy = {}
+    for method in THRESHOLD_METHODS:
+        processor = SimpleBinarizationProcessor(block_size=31, threshold_method=method)
+        result = np.asarray(processor.apply_binarization(_as_input(gray), denoise=False,
+                                                         output_format=OUTPUT_GRAY))
+        accuracy[method] = np.mean((result == 0) == ink)
+    print(f"  📊 {', '.join(f'{m}={a:.3f}' for m, a in accuracy.items())}")
+    assert accuracy['sauvola'] > 0.95 and accuracy['wolf'] > 0.95
+    assert accuracy['sauvola'] > accuracy['adaptive'] + 0.1
+
+
+def test_tiled_and_cache_key():
+    """Sauvola 分块结果与整幅一致；Wolf 分块时整幅处理；方法和 k 进入缓存键"""
+    gray, _ = _low_contrast_page(300, 220)
+    image = _as_input(gray)
+    for method in (THRESHOLD_SAUVOLA, THRESHOLD_WOLF):
+        processor = SimpleBinarizationProcessor(block_size=25, threshold_method=method)
+        whole = np.asarray(processor.apply_binarization(image, denoise=False, output_format=OUTPUT_GRAY))
+        tiled = np.asarray(processor.apply_binarization_tiled(image, denoise=False, tile_size=96,
+                                                              output_format=OUTPUT_GRAY))
+        assert np.array_equal(whole, tiled), method
+
+    processor = SimpleBinarizationProcessor(cache=ResultCache())
+    processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    processor.set_threshold_method(THRESHOLD_SAUVOLA)
+    processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    processor.set_threshold_method(THRESHOLD_SAUVOLA, k=0.3)
+    processor.apply_binarization(image, output_format=OUTPUT_GRAY)
+    assert processor.cache.misses == 3 and processor.cache.hits == 0
+
+    try:
+        processor.set_threshold_method('otsu')
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 阈值方法测试")
+    print("=" * 80)
+
+    test_backends_agree()
+    test_cost_independent_of_window()
+    test_low_contrast_accuracy()
+    test_tiled_and_cache_key()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
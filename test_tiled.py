@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分块二值化（与整幅处理逐位一致）
+"""
+
+import sys
+import os
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as main_module
+from main import SimpleBinarizationProcessor
+
+
+def _make_test_image(h=520, w=700):
+    """带噪点、渐变阴影和文字块的测试图像 (BGR)"""
+    rng = np.random.default_rng(0)
+    shadow = np.linspace(0.45, 1.0, w)[None, :]
+    gray = rng.normal(200, 20, size=(h, w)) * shadow
+    gray[60:75, 40:650] = 30
+    gray[200:400:20, 100:500] = 40
+    gray = gray.clip(0, 255).astype(np.uint8)
+    return np.repeat(gray[:, :, None], 3, axis=2)
+
+
+def test_tiled_matches_whole_frame_opencv():
+    """OpenCV 路径：不同块大小、条带模式都与整幅结果逐位一致"""
+    if not main_module.USE_OPENCV:
+        print("⚠️  OpenCV 不可用，跳过")
+        return
+
+    img = _make_test_image()
+    for block_size in (11, 31):
+        processor = SimpleBinarizationProcessor(block_size=block_size)
+        for denoise in (True, False):
+            expected = processor.apply_binarization(img, denoise=denoise)
+            for tile_size in (128, (100, 256), (96, 4096)):
+                actual = processor.apply_binarization_tiled(img, denoise=denoise,
+                                                            tile_size=tile_size)
+                assert actual.shape == expected.shape
+                assert np.array_equal(actual, expected), (block_size, denoise, tile_size)
+
+
+def test_tiled_matches_whole_frame_pillow():
+    """Pillow 路径：分块结果与整幅结果逐位一致"""
+    from PIL import Image
+
+    img = Image.fromarray(_make_test_image()[:, :, 0]).convert('RGB')
+    saved = main_module.USE_OPENCV
+    main_module.USE_OPENCV = False
+    try:
+        processor = SimpleBinarizationProcessor(block_size=15, c_value=3)
+        for denoise in (True, False):
+            expected = np.array(processor.apply_binarization(img, denoise=denoise))
+            actual = np.array(processor.apply_binarization_tiled(img, denoise=denoise,
+                                                                 tile_size=150))
+            assert np.array_equal(actual, expected), denoise
+    finally:
+        main_module.USE_OPENCV = saved
+
+
+def test_tile_halo():
+    """重叠边宽随 block_size 与去噪窗口变化"""
+    processor = SimpleBinarizationProcessor(block_size=31)
+    assert processor.tile_halo(denoise=False) >= 15
+    assert processor.tile_halo(denoise=True) > processor.tile_halo(denoise=False)
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 分块二值化测试")
+    print("=" * 80)
+
+    test_tiled_matches_whole_frame_opencv()
+    test_tiled_matches_whole_frame_pillow()
+    test_tile_halo()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试没有安装 OpenCV 时的 Pillow 备用方案（子进程中屏蔽 cv2 模块后导入 main）
+
+只切换 USE_OPENCV 时 cv2 仍可导入，遗漏的 cv2 调用不会暴露，因此在子进程中
+令 import cv2 失败。
+"""
+
+import sys
+import os
+import subprocess
+import textwrap
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+PRELUDE = """
+import sys, os
+sys.modules['cv2'] = None  # import cv2 抛出 ImportError
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+sys.path.insert(0, {root!r})
+import numpy as np
+from PIL import Image
+import main
+from main import SimpleBinarizationProcessor, OUTPUT_GRAY
+from synthetic_docs import make_document
+assert not main.USE_OPENCV
+"""
+
+
+def _run_without_opencv(code):
+    """在屏蔽 cv2 的子进程中执行代码，返回标准输出"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    script = PRELUDE.format(root=root) + textwrap.dedent(code)
+    completed = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                               cwd=root, timeout=600)
+    assert completed.returncode == 0, completed.stderr[-3000:]
+    return completed.stdout
+
+
+def test_color_arrays_without_opencv():
+    """3 通道数组（RGB）走噪声估计、自动参数和光照场估计时不调用 cv2"""
+    output = _run_without_opencv("""
+        page = make_document(400, 300, shadow='radial', noise=6, seed=0)[:, :, ::-1].copy()
+        expected_gray = np.asarray(Image.fromarray(page).convert('L'))
+        assert np.array_equal(main._gray_of(page), expected_gray)
+
+        processor = SimpleBinarizationProcessor(auto_denoise=True, auto_parameters=True,
+                                                normalize_illumination=True)
+        result = processor.apply_binarization(page, output_format=OUTPUT_GRAY)
+        assert np.asarray(result).shape == (300, 400)
+
+        stack = np.stack([page, page[::-1].copy()])
+        batch = processor.apply_binarization_batch(stack)
+        assert batch.shape == (2, 300, 400)
+        print('ok')
+    """)
+    assert output.strip().endswith('ok')
+
+
+def test_preview_of_arrays_without_opencv():
+    """大于预览尺寸的数组（load_grayscale_file 的结果）在代理图上预览"""
+    output = _run_without_opencv("""
+        gray = make_document(1200, 900, noise=4, seed=1, channels=1)
+        processor = SimpleBinarizationProcessor()
+        preview = np.asarray(processor.apply_binarization_preview(gray))
+        assert preview.shape == (300, 400), preview.shape
+        color = make_document(1200, 900, seed=2)
+        assert np.asarray(processor.apply_binarization_preview(color)).shape == (300, 400)
+        print('ok')
+    """)
+    assert output.strip().endswith('ok')
+
+
+def main():
+    """主函数"""
+    print("=" * 80)
+    print("🧪 无 OpenCV 环境测试")
+    print("=" * 80)
+
+    test_color_arrays_without_opencv()
+    test_preview_of_arrays_without_opencv()
+
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == "__main__":
+    main()